@@ -0,0 +1,134 @@
+import sys
+import os
+import re
+import json
+import argparse
+import subprocess
+
+# Dynamically add the parent directory (neil/) to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from config import NFLConfig
+
+config = NFLConfig()
+
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "import_time.json")
+# Differences below this many milliseconds are timer noise, never regressions
+NOISE_FLOOR_MS = 20
+# "import time: <self us> | <cumulative us> | <indent><module>", one line per module as it finishes
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$")
+
+
+def import_profile(module, python=sys.executable):
+    """
+    Imports a module in a fresh interpreter under `python -X importtime`.
+
+    Modules the interpreter loads at startup (before the import statement runs) are left out,
+    so the total is what importing the module itself costs.
+
+    Returns:
+        list[dict]: One entry per imported module (module, depth, self_ms, cumulative_ms), in
+            the order the imports finished.
+    """
+    result = subprocess.run([python, "-X", "importtime", "-c", f"import {module}"], cwd=REPO_DIR,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+    startup = subprocess.run([python, "-X", "importtime", "-c", "pass"], cwd=REPO_DIR,
+                             capture_output=True, text=True).stderr
+    startup_modules = {m.group(4) for m in map(IMPORTTIME_LINE.match, startup.splitlines()) if m}
+
+    entries = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match and match.group(4) not in startup_modules:
+            entries.append({"module": match.group(4), "depth": len(match.group(3)) // 2,
+                            "self_ms": int(match.group(1)) / 1000, "cumulative_ms": int(match.group(2)) / 1000})
+    return entries
+
+
+def total_import_ms(entries):
+    """Import time of the outermost imports, which include everything they imported."""
+    return sum(entry["cumulative_ms"] for entry in entries if entry["depth"] == 0)
+
+
+def heaviest_packages(entries, limit=8):
+    """Top-level packages (numpy, pandas, ...) imported along the way, by cumulative import time."""
+    packages = [entry for entry in entries if entry["depth"] > 0 and "." not in entry["module"]]
+    return sorted(packages, key=lambda entry: entry["cumulative_ms"], reverse=True)[:limit]
+
+
+def forbidden_imports(entries, forbidden):
+    """The modules of `forbidden` (or their submodules) that were imported."""
+    imported = {entry["module"] for entry in entries}
+    return [name for name in forbidden if any(m == name or m.startswith(f"{name}.") for m in imported)]
+
+
+def check_module(module, repeat=3, budget_ms=None, forbidden=(), baseline_ms=None, threshold=None):
+    """
+    Profiles a module's import `repeat` times and checks the fastest run against its budget,
+    its baseline on this machine (more than threshold slower and above the noise floor is a
+    regression) and its forbidden imports.
+
+    Returns:
+        dict: module, milliseconds, budget_ms, baseline_ms, regression, forbidden modules
+            imported, heaviest packages and whether the module passed every check.
+    """
+    runs = [import_profile(module) for _ in range(repeat)]
+    entries = min(runs, key=total_import_ms)
+    milliseconds = total_import_ms(entries)
+    loaded = forbidden_imports(entries, forbidden)
+    regression = (baseline_ms is not None and threshold is not None
+                  and milliseconds > baseline_ms * (1 + threshold) and milliseconds - baseline_ms > NOISE_FLOOR_MS)
+    return {
+        "module": module,
+        "milliseconds": milliseconds,
+        "budget_ms": budget_ms,
+        "baseline_ms": baseline_ms,
+        "regression": regression,
+        "forbidden_imported": loaded,
+        "heaviest": heaviest_packages(entries),
+        "ok": (budget_ms is None or milliseconds <= budget_ms) and not regression and not loaded,
+    }
+
+
+if __name__ == "__main__":
+    checked = sorted(set(config.IMPORT_TIME_BUDGET_MS) | set(config.IMPORT_FORBIDDEN_MODULES))
+    parser = argparse.ArgumentParser(description="Measure entry point import time with python -X importtime.")
+    parser.add_argument("modules", nargs="*", default=checked,
+                        help="Modules to import (default: those with a budget or forbidden imports in config).")
+    parser.add_argument("--repeat", type=int, default=3, help="Imports per module; the fastest is kept.")
+    parser.add_argument("--threshold", type=float, default=config.BENCHMARK_REGRESSION_THRESHOLD,
+                        help="Slowdown (fraction) over the baseline flagged as a regression.")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the import times as the new baseline.")
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH) and not args.save_baseline:
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)["milliseconds"]
+
+    failures, measured = 0, {}
+    for module in args.modules:
+        report = check_module(module, args.repeat, config.IMPORT_TIME_BUDGET_MS.get(module),
+                              config.IMPORT_FORBIDDEN_MODULES.get(module, ()), baseline.get(module), args.threshold)
+        measured[module] = report["milliseconds"]
+        budget = f" (budget {report['budget_ms']:.0f} ms)" if report["budget_ms"] is not None else ""
+        base = f", baseline {report['baseline_ms']:.0f} ms" if report["baseline_ms"] is not None else ""
+        print(f"{'✅' if report['ok'] else '⚠️'} {module}: {report['milliseconds']:.0f} ms{budget}{base}")
+        for entry in report["heaviest"]:
+            print(f"    {entry['module']:<24} {entry['cumulative_ms']:8.1f} ms")
+        if report["regression"]:
+            print(f"    more than {args.threshold:.0%} slower than its baseline")
+        if report["forbidden_imported"]:
+            print(f"    imports {report['forbidden_imported']}, which it should not need")
+        failures += not report["ok"]
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(BASELINE_PATH), exist_ok=True)
+        with open(BASELINE_PATH, "w") as f:
+            json.dump({"python": sys.version.split()[0], "milliseconds": measured}, f, indent=2)
+        print(f"📁 Baseline saved to {BASELINE_PATH}")
+
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,215 @@
+import sys
+import os
+import io
+import json
+import time
+import shutil
+import argparse
+import platform
+from datetime import datetime
+from contextlib import redirect_stdout, nullcontext
+
+# Dynamically add the parent directory (neil/) to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import sqlite3
+import pandas as pd
+import sklearn
+from config import NFLConfig
+from utils import training_data_filter
+from feature_cache import TRAINING_ORDER
+from benchmarks.synthetic_data import write_synthetic_database
+from data_transform.build_sql_tables import build_sql_tables
+from data_transform.transform_weekly_scores import transform_weekly_scores
+from data_transform.transform_schedules import transform_schedules
+from data_transform.transform_base_model import transform_base_model
+from models.train_random_forest_base import run_classification_pipeline
+from prediction.rf_base_model import run_sequential_backtest
+
+config = NFLConfig()
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_DIR = os.path.join(BENCHMARK_DIR, "baselines")
+# Differences below this many seconds are timer noise, never regressions
+NOISE_FLOOR_SECONDS = 0.05
+
+
+def bench_build_sql_tables(conn):
+    build_sql_tables(db_path=config.DB_PATH, force=True, verbose=False)
+
+
+def bench_transform_weekly_scores(conn):
+    transform_weekly_scores(conn)
+
+
+def bench_transform_schedules(conn):
+    transform_schedules(conn)
+
+
+def bench_transform_base_model(conn):
+    transform_base_model(conn)
+
+
+def bench_run_classification_pipeline(conn):
+    training_data = pd.read_sql(
+        f"SELECT * FROM {config.RF_TRAINING_DATA} WHERE {training_data_filter(config)} ORDER BY {TRAINING_ORDER}", conn)
+    start = time.perf_counter()
+    run_classification_pipeline(training_data, config, conn)
+    return time.perf_counter() - start  # Only the pipeline; loading the rows is not part of it
+
+
+def bench_rf_base_model_backtest(conn):
+    # A cold run: no registered models or cached matrices from a previous repetition
+    shutil.rmtree(config.MODEL_REGISTRY_DIR, ignore_errors=True)
+    shutil.rmtree(config.FEATURE_CACHE_DIR, ignore_errors=True)
+    run_sequential_backtest()
+
+
+# Benchmark name -> function(conn), in pipeline order; each stage reads what the ones before it wrote.
+# A function may return its own timed seconds to exclude setup work.
+BENCHMARKS = {
+    "build_sql_tables": bench_build_sql_tables,
+    "transform_weekly_scores": bench_transform_weekly_scores,
+    "transform_schedules": bench_transform_schedules,
+    "transform_base_model": bench_transform_base_model,
+    "run_classification_pipeline": bench_run_classification_pipeline,
+    "rf_base_model_backtest": bench_rf_base_model_backtest,
+}
+
+
+def prepare_dataset(scale, data_dir, seed=0):
+    """
+    Returns the synthetic staging database for a scale, generating it on first use.
+
+    Returns:
+        tuple: (database path, rows per staging table)
+    """
+    dataset_dir = os.path.join(data_dir, f"scale_{scale}x")
+    db_path = os.path.join(dataset_dir, f"synthetic_seed{seed}.db")
+    rows_path = f"{db_path}.json"
+    if not os.path.exists(rows_path):
+        os.makedirs(dataset_dir, exist_ok=True)
+        if os.path.exists(db_path):
+            os.remove(db_path)
+        rows = write_synthetic_database(db_path, scale, seed, verbose=False)
+        with open(rows_path, "w") as f:
+            json.dump(rows, f)
+    with open(rows_path) as f:
+        return db_path, json.load(f)
+
+
+def run_scale(scale, names, data_dir, seed=0, repeat=1, verbose=False):
+    """
+    Times the selected benchmarks on a fresh copy of the scale's synthetic database.
+    Each benchmark keeps its fastest of `repeat` runs.
+
+    Returns:
+        dict: The result document (scale, rows, per-benchmark seconds, environment).
+    """
+    source_db, rows = prepare_dataset(scale, data_dir, seed)
+    work_dir = os.path.join(data_dir, f"scale_{scale}x", "work")
+    shutil.rmtree(work_dir, ignore_errors=True)
+    os.makedirs(work_dir)
+    shutil.copyfile(source_db, os.path.join(work_dir, config.DB_PATH))
+
+    timings = {}
+    previous_dir = os.getcwd()
+    os.chdir(work_dir)  # DB_PATH, the model registry and the feature cache are relative paths
+    try:
+        for name in BENCHMARKS:
+            if name not in names:
+                continue
+            runs = []
+            for _ in range(repeat):
+                conn = sqlite3.connect(config.DB_PATH)
+                cpu_start, wall_start = time.process_time(), time.perf_counter()
+                with nullcontext() if verbose else redirect_stdout(io.StringIO()):
+                    timed = BENCHMARKS[name](conn)
+                wall = time.perf_counter() - wall_start
+                runs.append({"seconds": timed if timed is not None else wall,
+                             "cpu_seconds": time.process_time() - cpu_start})
+                conn.close()
+            timings[name] = min(runs, key=lambda r: r["seconds"])
+            print(f"⏱️ {scale}x {name}: {timings[name]['seconds']:.3f}s")
+    finally:
+        os.chdir(previous_dir)
+
+    return {
+        "scale": scale,
+        "seed": seed,
+        "rows": rows,
+        "timings": timings,
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "pandas": pd.__version__,
+            "sklearn": sklearn.__version__,
+        },
+        "created_at": datetime.now().isoformat(timespec='seconds'),
+    }
+
+
+def baseline_path(scale):
+    return os.path.join(BASELINE_DIR, f"scale_{scale}x.json")
+
+
+def compare_to_baseline(result, baseline, threshold):
+    """
+    Compares a result with its baseline. A benchmark regresses when it is more than threshold
+    (a fraction) slower than its baseline and the difference is above the noise floor.
+
+    Returns:
+        pd.DataFrame: One row per benchmark present in both.
+    """
+    rows = []
+    for name, timing in result["timings"].items():
+        base = baseline["timings"].get(name)
+        if base is None:
+            continue
+        change = timing["seconds"] / base["seconds"] - 1 if base["seconds"] > 0 else 0.0
+        rows.append({
+            "benchmark": name,
+            "baseline_seconds": base["seconds"],
+            "seconds": timing["seconds"],
+            "change": change,
+            "regression": change > threshold and timing["seconds"] - base["seconds"] > NOISE_FLOOR_SECONDS,
+        })
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time pipeline stages on synthetic data and compare with baselines.")
+    parser.add_argument("--scales", type=int, nargs="+", default=config.BENCHMARK_SCALES,
+                        help="Multiples of the real data volume, e.g. 1 10 100.")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS),
+                        help="Benchmarks to run; later stages need the tables earlier ones build.")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per benchmark; the fastest is kept.")
+    parser.add_argument("--threshold", type=float, default=config.BENCHMARK_REGRESSION_THRESHOLD,
+                        help="Slowdown (fraction) flagged as a regression.")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the new baselines.")
+    parser.add_argument("--data-dir", default=config.BENCHMARK_DATA_DIR, help="Where synthetic databases are kept.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true", help="Show the pipeline's own output.")
+    args = parser.parse_args()
+
+    regressions = 0
+    for scale in args.scales:
+        result = run_scale(scale, set(args.only), os.path.abspath(args.data_dir), args.seed, args.repeat, args.verbose)
+        path = baseline_path(scale)
+        if args.save_baseline:
+            os.makedirs(BASELINE_DIR, exist_ok=True)
+            with open(path, "w") as f:
+                json.dump(result, f, indent=2)
+            print(f"📁 Baseline for {scale}x saved to {path}")
+        elif os.path.exists(path):
+            with open(path) as f:
+                comparison = compare_to_baseline(result, json.load(f), args.threshold)
+            print(comparison.to_string(index=False, formatters={"change": "{:+.1%}".format}))
+            for name in comparison.loc[comparison["regression"], "benchmark"]:
+                print(f"⚠️ Regression at {scale}x: {name}")
+            regressions += int(comparison["regression"].sum())
+        else:
+            print(f"No baseline for {scale}x yet; run with --save-baseline to create one.")
+
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,243 @@
+import sys
+import os
+import time
+import argparse
+
+# Dynamically add the parent directory (neil/) to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import sqlite3
+import numpy as np
+import pandas as pd
+from config import NFLConfig
+from utils import bulk_write_dataframe
+
+config = NFLConfig()
+
+TEAMS = ['ARI', 'ATL', 'BAL', 'BUF', 'CAR', 'CHI', 'CIN', 'CLE', 'DAL', 'DEN', 'DET', 'GB', 'HOU', 'IND', 'JAX', 'KC',
+         'LV', 'LAC', 'LA', 'MIA', 'MIN', 'NE', 'NO', 'NYG', 'NYJ', 'PHI', 'PIT', 'SF', 'SEA', 'TB', 'TEN', 'WAS']
+
+REGULAR_SEASON_WEEKS = 18
+# Playoff week -> (game_type, games per 32 teams)
+PLAYOFF_ROUNDS = {19: ('WC', 6), 20: ('DIV', 4), 21: ('CON', 2), 22: ('SB', 1)}
+
+# Per-player stat columns of stg_weekly_scores, as nfl_data_py.import_weekly_data returns them
+WEEKLY_STAT_COLUMNS = [
+    'passing_yards', 'rushing_yards', 'passing_tds', 'rushing_tds', 'interceptions', 'sacks', 'rushing_fumbles',
+    'receiving_tds', 'special_teams_tds', 'carries', 'targets', 'receptions', 'receiving_yards',
+    'passing_2pt_conversions', 'rushing_2pt_conversions', 'receiving_fumbles', 'rushing_first_downs',
+    'receiving_first_downs', 'receiving_2pt_conversions', 'completions', 'attempts', 'sack_yards', 'sack_fumbles',
+    'sack_fumbles_lost', 'passing_air_yards', 'passing_yards_after_catch', 'passing_first_downs',
+    'rushing_fumbles_lost', 'receiving_fumbles_lost', 'receiving_air_yards', 'receiving_yards_after_catch',
+]
+
+
+def team_codes(scale):
+    """The 32 real team codes at scale 1; 32 * scale synthetic codes above it."""
+    if scale == 1:
+        return np.array(TEAMS)
+    return np.array([f"T{i:04d}" for i in range(32 * scale)])
+
+
+def moneyline(win_probability):
+    """American odds for a win probability."""
+    p = np.clip(win_probability, 0.02, 0.98)
+    return np.round(np.where(p >= 0.5, -100 * p / (1 - p), 100 * (1 - p) / p))
+
+
+def synthetic_schedules(seasons, scale=1, seed=0, current_season=None, played_through_week=None):
+    """
+    Schedules with the columns of nfl_data_py.import_schedules: 18 regular-season weeks in
+    which every team plays once, then four playoff rounds, about 300 * scale games per season.
+
+    Each team has a strength per season that drives the spread, the moneylines and the
+    scores, so a trained model has signal to find. Games of current_season after
+    played_through_week have no score yet.
+    """
+    rng = np.random.default_rng(seed)
+    teams = team_codes(scale)
+    current_season = current_season or config.CURRENT_SEASON
+    played_through_week = config.TRAINING_CUTOFF_WEEK if played_through_week is None else played_through_week
+
+    frames = []
+    for season in seasons:
+        strength = rng.normal(0, 1, len(teams))
+        for week in range(1, REGULAR_SEASON_WEEKS + len(PLAYOFF_ROUNDS) + 1):
+            order = rng.permutation(len(teams))
+            if week in PLAYOFF_ROUNDS:
+                game_type, games = PLAYOFF_ROUNDS[week][0], PLAYOFF_ROUNDS[week][1] * scale
+            else:
+                game_type, games = 'REG', len(teams) // 2
+            home, away = order[0:2 * games:2], order[1:2 * games:2]
+            frames.append(pd.DataFrame({
+                'season': season, 'game_type': game_type, 'week': week,
+                'home_team': teams[home], 'away_team': teams[away],
+                'strength_diff': strength[home] - strength[away],
+            }))
+    games = pd.concat(frames, ignore_index=True)
+    n = len(games)
+
+    spread = np.round((games['strength_diff'].to_numpy() * 3 + 1.5) * 2) / 2  # Positive: home favored, half points
+    home_win = 1 / (1 + np.exp(-spread / 6))
+    played = ((games['season'] < current_season) | (games['week'] <= played_through_week)).to_numpy()
+    home_score = np.where(played, np.maximum(0, np.round(rng.normal(22 + spread / 2, 9, n))), np.nan)
+    away_score = np.where(played, np.maximum(0, np.round(rng.normal(22 - spread / 2, 9, n))), np.nan)
+    gameday = pd.to_datetime(games['season'].astype(str) + "-09-07") + pd.to_timedelta((games['week'] - 1) * 7, unit="D")
+
+    return pd.DataFrame({
+        'game_id': games['season'].astype(str) + "_" + games['week'].map("{:02d}".format) + "_"
+                   + games['away_team'] + "_" + games['home_team'],
+        'season': games['season'],
+        'game_type': games['game_type'],
+        'week': games['week'],
+        'gameday': gameday.dt.strftime("%Y-%m-%d"),
+        'weekday': "Sunday",
+        'gametime': rng.choice(["13:00", "16:25", "20:20"], n),
+        'away_team': games['away_team'],
+        'away_score': away_score,
+        'home_team': games['home_team'],
+        'home_score': home_score,
+        'location': "Home",
+        'total': home_score + away_score,
+        'overtime': np.where(played, (rng.random(n) < 0.05).astype(float), np.nan),
+        'away_rest': rng.choice([6, 7, 7, 7, 10, 13], n),
+        'home_rest': rng.choice([6, 7, 7, 7, 10, 13], n),
+        'away_moneyline': moneyline(1 - home_win),
+        'home_moneyline': moneyline(home_win),
+        'spread_line': spread,
+        'away_spread_odds': -110.0,
+        'home_spread_odds': -110.0,
+        'total_line': np.round(rng.normal(44, 3, n) * 2) / 2,
+        'under_odds': -110.0,
+        'over_odds': -110.0,
+        'div_game': (rng.random(n) < 0.35).astype(int),
+        'roof': rng.choice(["outdoors", "dome", "closed", "open"], n),
+        'surface': rng.choice(["grass", "fieldturf"], n),
+        'temp': np.round(rng.normal(60, 15, n)),
+        'wind': np.round(rng.gamma(2, 4, n)),
+        'away_qb_id': games['away_team'] + "-00",
+        'home_qb_id': games['home_team'] + "-00",
+        'away_qb_name': "QB " + games['away_team'],
+        'home_qb_name': "QB " + games['home_team'],
+        'away_coach': "Coach " + games['away_team'],
+        'home_coach': "Coach " + games['home_team'],
+        'referee': rng.choice([f"Referee {i}" for i in range(17)], n),
+        'stadium_id': games['home_team'] + "00",
+        'stadium': "Stadium " + games['home_team'],
+    })
+
+
+def synthetic_weekly_scores(schedules, players_per_team=10, seed=0):
+    """
+    Player stat lines with the columns of nfl_data_py.import_weekly_data for every played game
+    in schedules: players_per_team rows per team and game (player 0 is the quarterback,
+    players 1-2 running backs, the rest receivers).
+
+    Touchdowns are drawn so that 6 points per touchdown never exceed the team's score, which
+    keeps the kicking points derived in int_weekly_scores.sql non-negative.
+    """
+    if players_per_team < 3:
+        raise ValueError("players_per_team must be at least 3 (a quarterback, a running back and a receiver).")
+    rng = np.random.default_rng(seed)
+    games = schedules[schedules['home_score'].notna()]
+    teams = np.concatenate([games['home_team'].to_numpy(), games['away_team'].to_numpy()])
+    scores = np.concatenate([games['home_score'].to_numpy(), games['away_score'].to_numpy()]).astype(int)
+    seasons = np.tile(games['season'].to_numpy(), 2)
+    weeks = np.tile(games['week'].to_numpy(), 2)
+    season_types = np.where(np.tile(games['game_type'].to_numpy(), 2) == 'REG', 'REG', 'POST')
+
+    n_team_games, P = len(teams), players_per_team
+    n = n_team_games * P
+    player = np.tile(np.arange(P), n_team_games)
+    team_game = np.repeat(np.arange(n_team_games), P)
+    is_qb, is_rb = player == 0, (player >= 1) & (player <= 2)
+    carries_rate = np.where(is_qb, 3, np.where(player == 1, 14, np.where(player == 2, 6, 0.2)))
+    targets_rate = np.where(is_qb, 0, np.where(is_rb, 3, np.maximum(1, 8 - player)))
+
+    stats = {column: np.zeros(n) for column in WEEKLY_STAT_COLUMNS}
+    stats['attempts'] = np.where(is_qb, np.maximum(10, np.round(rng.normal(34, 6, n))), 0)
+    stats['completions'] = rng.binomial(stats['attempts'].astype(int), 0.64).astype(float)
+    stats['passing_yards'] = np.round(stats['completions'] * rng.normal(11, 1.5, n))
+    stats['passing_air_yards'] = np.round(stats['passing_yards'] * 0.55)
+    stats['passing_yards_after_catch'] = stats['passing_yards'] - stats['passing_air_yards']
+    stats['passing_first_downs'] = np.round(stats['completions'] * 0.5)
+    stats['interceptions'] = np.where(is_qb, rng.poisson(0.8, n), 0).astype(float)
+    stats['sacks'] = np.where(is_qb, rng.poisson(2.3, n), 0).astype(float)
+    stats['sack_yards'] = stats['sacks'] * 6
+    stats['sack_fumbles'] = rng.binomial(stats['sacks'].astype(int), 0.08).astype(float)
+    stats['sack_fumbles_lost'] = rng.binomial(stats['sack_fumbles'].astype(int), 0.5).astype(float)
+    stats['carries'] = rng.poisson(carries_rate).astype(float)
+    stats['rushing_yards'] = np.round(stats['carries'] * rng.normal(4.3, 1.2, n))
+    stats['rushing_first_downs'] = np.round(np.maximum(stats['rushing_yards'], 0) / 12)
+    stats['rushing_fumbles'] = rng.binomial(stats['carries'].astype(int), 0.01).astype(float)
+    stats['rushing_fumbles_lost'] = rng.binomial(stats['rushing_fumbles'].astype(int), 0.5).astype(float)
+    stats['targets'] = rng.poisson(targets_rate).astype(float)
+    stats['receptions'] = rng.binomial(stats['targets'].astype(int), 0.65).astype(float)
+    stats['receiving_yards'] = np.round(stats['receptions'] * rng.normal(11, 3, n))
+    stats['receiving_air_yards'] = np.round(stats['receiving_yards'] * 0.55)
+    stats['receiving_yards_after_catch'] = stats['receiving_yards'] - stats['receiving_air_yards']
+    stats['receiving_first_downs'] = np.round(stats['receptions'] * 0.55)
+    stats['receiving_fumbles'] = rng.binomial(stats['receptions'].astype(int), 0.01).astype(float)
+    stats['receiving_fumbles_lost'] = rng.binomial(stats['receiving_fumbles'].astype(int), 0.5).astype(float)
+    for column in ('passing_2pt_conversions', 'rushing_2pt_conversions', 'receiving_2pt_conversions'):
+        stats[column] = (rng.random(n) < 0.005).astype(float)
+
+    # Touchdowns: each goes to a random non-quarterback; receiving touchdowns also count for the quarterback
+    touchdowns = scores // 7
+    for k in range(touchdowns.max(initial=0)):
+        scoring = np.flatnonzero(touchdowns > k)
+        scorer = scoring * P + rng.integers(1, P, len(scoring))
+        rushing = rng.random(len(scoring)) < 0.4
+        np.add.at(stats['rushing_tds'], scorer[rushing], 1)
+        np.add.at(stats['receiving_tds'], scorer[~rushing], 1)
+        np.add.at(stats['passing_tds'], scoring[~rushing] * P, 1)
+
+    players = pd.Series(teams[team_game]) + "-" + pd.Series(player).map("{:02d}".format)
+    return pd.DataFrame({
+        'player_id': players,
+        'player_name': "Player " + players,
+        'recent_team': teams[team_game],
+        'season': seasons[team_game],
+        'season_type': season_types[team_game],
+        'week': weeks[team_game],
+        **stats,
+    })
+
+
+def write_synthetic_database(db_path, scale=1, seed=0, seasons=None, players_per_team=10, verbose=True):
+    """
+    Writes synthetic stg_schedules and stg_weekly_scores tables at scale times the real volume
+    (7 seasons of about 300 games) into db_path. Weekly rows are generated and written one
+    season at a time to bound memory at large scales.
+
+    Returns:
+        dict: Rows written per table.
+    """
+    seasons = sorted(seasons or config.SEASONS)
+    start = time.perf_counter()
+    schedules = synthetic_schedules(seasons, scale, seed)
+    conn = sqlite3.connect(db_path)
+    rows = {config.STAGING_SCHEDULES_TABLE: bulk_write_dataframe(schedules, conn, config.STAGING_SCHEDULES_TABLE,
+                                                                 verbose=verbose)}
+    rows[config.STAGING_WEEKLY_STATS_TABLE] = 0
+    for i, season in enumerate(seasons):
+        weekly = synthetic_weekly_scores(schedules[schedules['season'] == season], players_per_team, seed + season)
+        rows[config.STAGING_WEEKLY_STATS_TABLE] += bulk_write_dataframe(
+            weekly, conn, config.STAGING_WEEKLY_STATS_TABLE, if_exists='replace' if i == 0 else 'append',
+            verbose=verbose)
+    conn.close()
+    if verbose:
+        print(f"🧪 Synthetic {scale}x database written to {db_path} in {time.perf_counter() - start:.2f}s: {rows}")
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write synthetic staging tables at a multiple of the real data volume.")
+    parser.add_argument("--scale", type=int, default=1, help="Volume multiple (teams per season are 32 * scale).")
+    parser.add_argument("--db", default=None, help="Output database (default: synthetic_{scale}x.db).")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--players-per-team", type=int, default=10, help="Player rows per team and game.")
+    args = parser.parse_args()
+
+    write_synthetic_database(args.db or f"synthetic_{args.scale}x.db", args.scale, args.seed,
+                             players_per_team=args.players_per_team)
@@ -0,0 +1,83 @@
+import sys
+import os
+import time
+import argparse
+
+# Dynamically add the parent directory (neil/) to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import sqlite3
+import pandas as pd
+from config import NFLConfig
+from utils import load_existing_nfl_data, apply_table_dtypes, table_exists
+from data_transform.transform_weekly_scores import select_and_clean_columns, aggregate_team_stats
+
+config = NFLConfig()
+
+
+def frame_memory_mb(data):
+    """In-memory size of a frame, strings included."""
+    return data.memory_usage(deep=True).sum() / (1024 * 1024)
+
+
+def memory_report(conn, tables=None):
+    """
+    Memory of each table with a declared schema (config.TABLE_DTYPES), loaded with pandas'
+    default dtypes and with the compact ones.
+
+    Returns:
+        pd.DataFrame: One row per table that exists.
+    """
+    rows = []
+    for table in tables or config.TABLE_DTYPES:
+        if not table_exists(conn, table):
+            continue
+        default = load_existing_nfl_data(conn, table, compact=False)
+        compact = apply_table_dtypes(default.copy(), table)
+        rows.append({
+            "table": table,
+            "rows": len(default),
+            "default_mb": frame_memory_mb(default),
+            "compact_mb": frame_memory_mb(compact),
+            "reduction": frame_memory_mb(default) / max(frame_memory_mb(compact), 1e-9),
+        })
+    return pd.DataFrame(rows)
+
+
+def time_weekly_aggregation(conn, repeat=5):
+    """
+    Fastest of `repeat` runs of the transform_weekly_scores cleaning and groupby on the
+    player-level staging frame, with default and with compact dtypes.
+
+    Returns:
+        dict: {"default": seconds, "compact": seconds}
+    """
+    timings = {}
+    for label, compact in (("default", False), ("compact", True)):
+        data = load_existing_nfl_data(conn, config.STAGING_WEEKLY_STATS_TABLE, compact=compact)
+        runs = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            aggregate_team_stats(select_and_clean_columns(data, config.WEEKLY_STATS_COLUMNS))
+            runs.append(time.perf_counter() - start)
+        timings[label] = min(runs)
+    return timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare table memory with default and compact dtypes.")
+    parser.add_argument("--db", default=config.DB_PATH)
+    parser.add_argument("--repeat", type=int, default=5, help="Runs of the weekly aggregation; the fastest is kept.")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    report = memory_report(conn)
+    if report.empty:
+        print(f"None of {list(config.TABLE_DTYPES)} exist in {args.db}.")
+    else:
+        print(report.to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+        print(f"Total: {report['default_mb'].sum():.1f} MB -> {report['compact_mb'].sum():.1f} MB")
+    if table_exists(conn, config.STAGING_WEEKLY_STATS_TABLE):
+        timings = time_weekly_aggregation(conn, args.repeat)
+        print(f"Weekly score aggregation: {timings['default']:.3f}s default, {timings['compact']:.3f}s compact")
+    conn.close()
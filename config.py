@@ -1,5 +1,7 @@
+import os
+import json
 from datetime import datetime
-import nfl_data_py as nfl
+from endpoint_cache import cached_endpoint, LazyEndpoint
 
 class NFLConfig:
     def __init__(self, target_week=None, training_cutoff_week = None):
@@ -22,10 +24,147 @@ class NFLConfig:
         self.STAGING_SCHEDULES_TABLE = "stg_schedules"
         self.RF_TRAINING_DATA = 'rf_training_data'
         self.RF_PREDICTION_DATA = 'rf_prediction_table'
+        self.TEAM_FEATURES_TABLE = 'team_features'
 
-        # Endpoint configurations
-        self.SCHEDULE_ENDPOINT = nfl.import_schedules
-        self.WEEKLY_DATA_ENPOINT = nfl.import_weekly_data
+        # Rolling team features (data_transform/team_features.sql)
+        self.FEATURE_WINDOW_GAMES = 3  # Trailing games per team, crossing season boundaries
+
+        # Random forest hyperparameters used by models/train_*.py
+        # Parameters written by models/tune_random_forest.py are merged in when the file exists
+        self.RF_PARAMS = {'random_state': 42}
+        self.RF_PARAMS_PATH = "rf_params.json"
+        if os.path.exists(self.RF_PARAMS_PATH):
+            with open(self.RF_PARAMS_PATH) as f:
+                self.RF_PARAMS.update(json.load(f))
+
+        # Hyperparameter search (models/tune_random_forest.py): walk-forward folds of
+        # TUNING_FOLD_WEEKS weeks in each validation season, successive halving on tree count
+        self.TUNING_PARAM_GRID = {
+            'max_depth': [None, 6, 12],
+            'min_samples_leaf': [1, 5, 20],
+            'max_features': ['sqrt', 0.5],
+        }
+        self.TUNING_VALIDATION_SEASONS = [2022, 2023]
+        self.TUNING_FOLD_WEEKS = 6
+        self.TUNING_MIN_ESTIMATORS = 25  # Trees per candidate in the first rung
+        self.TUNING_MAX_ESTIMATORS = 225
+        self.TUNING_HALVING_FACTOR = 3  # Each rung keeps 1/factor of the candidates with factor times the trees
+        self.TUNING_MAX_WORKERS = None  # Worker processes; None uses every CPU
+        self.TUNING_TRIALS_TABLE = "rf_tuning_trials"
+
+        # Evaluation in run_classification_pipeline: "oob" fits once on every row and reports
+        # out-of-bag metrics; "kfold" keeps the 70/30 holdout plus k-fold cross-validation
+        self.MODEL_EVALUATION = "oob"
+        self.CV_FOLDS = 5
+        self.CV_N_JOBS = -1  # Folds fitted in parallel; -1 uses every CPU
+
+        # Walk-forward backtests (prediction/parallel_backtest.py, prediction/backtest.py)
+        self.BACKTEST_MAX_WORKERS = None  # Worker processes; None uses every CPU
+        self.BACKTEST_PREDICTIONS_TABLE = 'backtest_predictions'
+        self.BACKTEST_PREDICTION_KEYS = ['config_name', 'season', 'week', 'game_id']
+
+        # Model registry (model_registry.py): artifacts keyed by pipeline, parameters and training data version
+        self.MODEL_REGISTRY_DIR = "model_registry"
+        self.MODEL_REGISTRY_COMPRESS = 3  # joblib compression level of stored artifacts
+        self.MODEL_REGISTRY_MMAP = True  # Memory-map model arrays on load
+        self.MODEL_NAME = "random_forest_model"  # Registry name of the model the prediction scripts load
+        self.BASE_MODEL_NAME = "random_forest_base_model"  # models/train_model.py's model, trained on BASE_MODEL_TABLE
+        self.USE_COMPILED_FOREST = True  # Prediction scripts score with models/forest_arrays.py (same probabilities)
+
+        # Feature-matrix cache (feature_cache.py): training tables as float32 .npy arrays, rebuilt
+        # when the table's version changes, so weekly retrains slice rows instead of re-reading SQLite
+        self.FEATURE_CACHE_DIR = "feature_cache"
+        self.FEATURE_CACHE_MMAP = True  # Memory-map the cached arrays on load
+
+        # Prediction service (prediction/prediction_service.py)
+        self.PREDICTION_SERVICE_HOST = "127.0.0.1"
+        self.PREDICTION_SERVICE_PORT = 8765
+        self.PREDICTION_SERVICE_SOCKET = None  # Unix socket path; overrides host/port when set
+        self.PREDICTION_BATCH_WINDOW_MS = 1  # Requests arriving within this window share one model call
+        self.PREDICTION_RELOAD_SECONDS = 5  # How often the registry and input tables are checked for changes
+        self.PREDICTION_SERVICE_TABLES = [self.TEAM_FEATURES_TABLE, 'int_schedules']  # Reload inputs when these change
+
+        # Warm-start weekly retraining (models/incremental_forest.py)
+        self.INCREMENTAL_TREE_BUDGET = 100  # Trees kept in the forest; the oldest are retired first
+        self.INCREMENTAL_TREES_PER_UPDATE = 10  # Trees grown on the newest data each week
+        self.INCREMENTAL_WINDOW_WEEKS = 4  # Most recent weeks the new trees are trained on
+        self.INCREMENTAL_FULL_REFIT_EVERY = 4  # Weeks between quality checks against a full refit
+        self.INCREMENTAL_MIN_AGREEMENT = 0.8  # Below this prediction agreement the full refit replaces the forest
+        self.INCREMENTAL_RETRAIN = False  # Weekly training updates the registered forest with the new week instead of refitting
+
+        # Stage instrumentation (instrumentation.py): wall/CPU time, rows, peak RSS and page reads of
+        # every pipeline stage, recorded in PIPELINE_RUNS_TABLE
+        self.RECORD_PIPELINE_RUNS = True
+        self.PIPELINE_RUNS_TABLE = "pipeline_runs"
+        self.STAGE_BUDGET_SECONDS = {}  # Stage name -> seconds, e.g. {"import_data": 60}; slower stages are flagged
+
+        # In-process pipeline (pipeline.py): import -> transform -> build_sql_tables -> train -> predict
+        self.PIPELINE_MAX_WORKERS = 3  # Steps run concurrently once their upstream steps are done
+
+        # Benchmarks (benchmarks/run_benchmarks.py) on synthetic data (benchmarks/synthetic_data.py)
+        self.BENCHMARK_SCALES = [1, 10]  # Multiples of the real data volume; 100 works but takes a while
+        self.BENCHMARK_DATA_DIR = "benchmark_data"  # Generated databases, reused across runs
+        self.BENCHMARK_REGRESSION_THRESHOLD = 0.2  # Benchmarks this much slower than their baseline are flagged
+
+        # Import-time budgets (benchmarks/import_time.py), measured with `python -X importtime`
+        # Budgets sit just above the measured cost, so a return to eager imports (~600 ms before) fails them;
+        # `import_time.py --save-baseline` also stores a per-machine baseline, checked with BENCHMARK_REGRESSION_THRESHOLD
+        self.IMPORT_TIME_BUDGET_MS = {"prediction.rf_predict_outcomes": 600}  # Module -> milliseconds
+        self.IMPORT_FORBIDDEN_MODULES = {  # Module -> libraries importing it must not load
+            "prediction.rf_predict_outcomes": ["nfl_data_py", "sklearn", "joblib"],
+            "data_transform.build_sql_tables": ["nfl_data_py", "pandas", "sklearn"],
+            "pipeline": ["nfl_data_py", "pandas", "sklearn"],
+            "instrumentation": ["nfl_data_py", "pandas"],
+        }
+
+        # SQLite bulk-load tuning (utils.bulk_write_dataframe)
+        self.BULK_CHUNK_SIZE = 10000  # Rows per executemany batch
+        self.SQLITE_CACHE_SIZE_KB = 262144  # 256 MB page cache during bulk loads
+
+        # SQL model materialization (utils.run_sql_file_and_save_to_table)
+        # "table" runs CREATE TABLE ... AS SELECT inside SQLite; "dataframe" round-trips through pandas.
+        self.SQL_MATERIALIZATION = "table"
+        self.SQL_SAMPLE_ROWS = 5  # Rows fetched for logging after an in-database build
+
+        # SQL model DAG (data_transform/sql_dag.py)
+        self.TABLE_VERSIONS_TABLE = "table_versions"  # Version counter bumped by every table writer
+        self.SQL_BUILD_STATE_TABLE = "sql_build_state"  # SQL hash + upstream versions of each built model
+        self.SQL_DAG_MAX_WORKERS = 4
+
+        # Partition-incremental SQL models ("-- materialized: incremental")
+        self.PARTITION_VERSIONS_TABLE = "partition_versions"  # Table version at which each (season, week) last changed
+        self.PARTITION_WATERMARKS_TABLE = "partition_watermarks"  # Upstream partition versions each model has processed
+        self.INCREMENTAL_MAX_PARTITIONS = 8  # Above this many changed partitions a full rebuild is cheaper
+
+        # Ingestion configuration
+        # Tracks which (season, week) partitions of each staging table are complete so
+        # refreshes only request seasons that still have open partitions.
+        self.INCREMENTAL_IMPORT = True
+        self.INGEST_PARTITIONS_TABLE = "ingest_partitions"
+        self.IMPORT_MAX_WORKERS = 4  # Concurrent season fetches in data_import/import_concurrent.py
+
+        # Primary keys of the imported tables. Keyed tables are written with an upsert of
+        # new or changed rows (compared by row fingerprint) instead of being rewritten.
+        self.TABLE_KEYS = {
+            self.STAGING_WEEKLY_STATS_TABLE: ['player_id', 'season', 'week'],
+            self.WEEKLY_SCORES_TABLE: ['player_id', 'season', 'week'],
+            self.STAGING_SCHEDULES_TABLE: ['game_id'],
+            self.SCHEDULES_TABLE: ['game_id'],
+        }
+
+        # Endpoint cache configuration
+        # Each season's response is cached on disk; closed seasons never expire and the
+        # current season is re-fetched after CACHE_CURRENT_SEASON_TTL_DAYS. Set NEIL_OFFLINE=1
+        # to replay imports from the cache without touching the network.
+        self.USE_ENDPOINT_CACHE = True
+        self.CACHE_DIR = "nfl_cache"
+        self.CACHE_FORMAT = "parquet"  # "parquet" or "arrow" (Arrow IPC)
+        self.CACHE_CURRENT_SEASON_TTL_DAYS = 7
+        self.OFFLINE_MODE = os.environ.get("NEIL_OFFLINE", "0") == "1"
+
+        # Endpoint configurations (nfl_data_py is imported on the first fetch, not with the config)
+        self.SCHEDULE_ENDPOINT = cached_endpoint(LazyEndpoint("nfl_data_py", "import_schedules"), self)
+        self.WEEKLY_DATA_ENPOINT = cached_endpoint(LazyEndpoint("nfl_data_py", "import_weekly_data"), self)
         
         # Column configurations
         self.WEEKLY_STATS_COLUMNS = [
@@ -60,5 +199,28 @@ class NFLConfig:
             'CON': 'POST',
             'SB': 'POST'
         }
+
+        # Compact in-memory dtypes per table (utils.load_existing_nfl_data); the transforms keep them.
+        # Listed columns are cast to their dtype and every other float column of a listed table to
+        # COMPACT_FLOAT_DTYPE. Stats are counts, which float32 holds exactly. Set COMPACT_DTYPES to
+        # False to load pandas' defaults (int64, float64, strings).
+        self.COMPACT_DTYPES = True
+        self.COMPACT_FLOAT_DTYPE = "float32"
+        team_keys = {'season': 'int16', 'week': 'int8', 'season_type': 'category', 'recent_team': 'category'}
+        game_keys = {'season': 'int16', 'week': 'int8', 'game_type': 'category', 'season_type': 'category',
+                     'home_team': 'category', 'away_team': 'category'}
+        self.TABLE_DTYPES = {
+            self.STAGING_WEEKLY_STATS_TABLE: dict(team_keys, **{
+                'player_id': 'category', 'player_name': 'category', 'player_display_name': 'category',
+                'position': 'category', 'position_group': 'category', 'headshot_url': 'category',
+                'opponent_team': 'category',
+            }),
+            self.WEEKLY_SCORES_TABLE: team_keys,
+            self.STAGING_SCHEDULES_TABLE: dict(game_keys, **{
+                'weekday': 'category', 'gametime': 'category', 'location': 'category', 'roof': 'category',
+                'surface': 'category', 'stadium_id': 'category', 'stadium': 'category',
+            }),
+            self.SCHEDULES_TABLE: game_keys,
+        }
     
   
\ No newline at end of file
@@ -0,0 +1,112 @@
+import sys
+import os
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Dynamically add the parent directory (neil/) to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import sqlite3
+import pandas as pd
+from config import NFLConfig
+from utils import (seasons_to_import, write_open_partitions, load_existing_nfl_data,
+                   load_to_sqlite, sync_keyed_table)
+
+config = NFLConfig()
+
+
+def import_jobs(config):
+    """Endpoints to import as (name, endpoint, staging table, final table)."""
+    return [
+        ('schedules', config.SCHEDULE_ENDPOINT, config.STAGING_SCHEDULES_TABLE, config.SCHEDULES_TABLE),
+        ('weekly_stats', config.WEEKLY_DATA_ENPOINT, config.STAGING_WEEKLY_STATS_TABLE, config.WEEKLY_SCORES_TABLE),
+    ]
+
+
+def fetch_season(endpoint, season):
+    """Fetches a single season from an endpoint and returns the data with the fetch time."""
+    start = time.perf_counter()
+    data = endpoint([season])
+    return data, time.perf_counter() - start
+
+
+def import_seasons_concurrently(conn, config, max_workers=None, seasons=None):
+    """
+    Fetches every open season of every endpoint in parallel and streams each finished
+    season straight into its staging table.
+
+    Fetches run on a thread pool (network and parsing release the GIL); all SQLite writes
+    happen on the calling thread as results complete, so a single connection is enough.
+    The full import is bounded by the slowest season instead of the sum of all of them.
+
+    Args:
+        conn (sqlite3.Connection): SQLite connection object.
+        config (NFLConfig): Configuration with endpoints, tables and seasons.
+        max_workers (int, optional): Thread pool size. Defaults to config.IMPORT_MAX_WORKERS.
+        seasons (list, optional): Seasons to consider. Defaults to config.SEASONS.
+
+    Returns:
+        pd.DataFrame: Per-season timings (fetch and write seconds, rows written).
+    """
+    max_workers = max_workers or config.IMPORT_MAX_WORKERS
+    seasons = seasons or config.SEASONS
+    jobs = import_jobs(config)
+
+    timings = []
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {}
+        for name, endpoint, staging_table, _ in jobs:
+            open_seasons = seasons_to_import(conn, staging_table, seasons)
+            print(f"{name}: {len(open_seasons)} of {len(seasons)} seasons open {open_seasons}")
+            for season in open_seasons:
+                future = executor.submit(fetch_season, endpoint, season)
+                futures[future] = (name, staging_table, season)
+
+        for future in as_completed(futures):
+            name, staging_table, season = futures[future]
+            try:
+                data, fetch_seconds = future.result()
+            except Exception as e:
+                print(f"Error fetching {name} {season}: {e}")
+                timings.append({'endpoint': name, 'season': season, 'fetch_seconds': None,
+                                'write_seconds': None, 'rows': 0, 'error': str(e)})
+                continue
+
+            write_start = time.perf_counter()
+            written = write_open_partitions(conn, staging_table, data)
+            write_seconds = time.perf_counter() - write_start
+            timings.append({'endpoint': name, 'season': season, 'fetch_seconds': round(fetch_seconds, 2),
+                            'write_seconds': round(write_seconds, 2), 'rows': len(written), 'error': None})
+            print(f"{name} {season}: fetched in {fetch_seconds:.2f}s, wrote {len(written)} rows in {write_seconds:.2f}s")
+
+    timings = pd.DataFrame(timings, columns=['endpoint', 'season', 'fetch_seconds', 'write_seconds', 'rows', 'error'])
+    print(f"Concurrent import finished in {time.perf_counter() - start:.2f}s with {max_workers} workers.")
+    return timings
+
+
+def refresh_final_tables(conn, config):
+    """Copies each staging table into its final table, as import_data does."""
+    for name, _, staging_table, final_table in import_jobs(config):
+        if staging_table in config.TABLE_KEYS:
+            sync_keyed_table(conn, staging_table, final_table, config.TABLE_KEYS[staging_table])
+            continue
+        data = load_existing_nfl_data(conn, staging_table)
+        if not data.empty:
+            load_to_sqlite(data, conn, final_table)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import schedules and weekly stats for all seasons concurrently.")
+    parser.add_argument("--workers", type=int, default=config.IMPORT_MAX_WORKERS, help="Maximum concurrent fetches.")
+    parser.add_argument("--seasons", type=int, nargs="+", default=None, help="Seasons to import (default: config.SEASONS).")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(config.DB_PATH)
+
+    timings = import_seasons_concurrently(conn, config, max_workers=args.workers, seasons=args.seasons)
+    print(timings.sort_values('fetch_seconds', ascending=False).to_string(index=False))
+    refresh_final_tables(conn, config)
+
+    conn.close()
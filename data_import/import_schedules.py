@@ -7,7 +7,6 @@ import numpy as np
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 import sqlite3
-import nfl_data_py as nfl
 from config import NFLConfig
 from utils import import_data
 config = NFLConfig()
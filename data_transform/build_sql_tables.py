@@ -1,24 +1,55 @@
 import sys
 import os
-import pandas as pd 
-import numpy as np 
+import argparse
 
 # Dynamically add the parent directory (neil/) to sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 
-import sqlite3
 from config import NFLConfig
-from utils import run_sql_file_and_save_to_table
-
+from data_transform.sql_dag import SQLDag, SQLModel
+from instrumentation import instrumented
 
 
 config = NFLConfig()
 
-with sqlite3.connect(config.DB_PATH) as conn:
-    run_sql_file_and_save_to_table(conn, "data_transform/int_schedules.sql", "int_schedules")
-    run_sql_file_and_save_to_table(conn, "data_transform/int_weekly_scores.sql", "int_weekly_score")
-    run_sql_file_and_save_to_table(conn, "data_transform/int_team_stats.sql", "int_team_stats")
-    run_sql_file_and_save_to_table(conn, "data_transform/rf_training_data.sql", "rf_training_data")
-    run_sql_file_and_save_to_table(conn, "data_transform/team_stats.sql", "team_stats")
+TRANSFORM_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Output table -> SQL model file. Build order comes from the table references in each file.
+SQL_MODELS = {
+    "int_schedules": "int_schedules.sql",
+    "int_weekly_score": "int_weekly_scores.sql",
+    "int_team_stats": "int_team_stats.sql",
+    "rf_training_data": "rf_training_data.sql",
+    "team_stats": "team_stats.sql",
+    "team_features": "team_features.sql",
+}
+
+
+def sql_model_params(config):
+    """Values for the {placeholders} in the SQL model files."""
+    return {"feature_window_games": config.FEATURE_WINDOW_GAMES}
+
+
+def build_sql_dag(db_path=None):
+    """Returns the DAG of SQL models in data_transform/."""
+    params = sql_model_params(config)
+    models = [SQLModel(table_name, os.path.join(TRANSFORM_DIR, file_name), params=params)
+              for table_name, file_name in SQL_MODELS.items()]
+    return SQLDag(models, db_path=db_path or config.DB_PATH)
+
+
+@instrumented()
+def build_sql_tables(db_path=None, max_workers=None, force=False, select=None, verbose=True):
+    """Builds every SQL model that is out of date; see SQLDag.run."""
+    return build_sql_dag(db_path).run(max_workers=max_workers, force=force, select=select, verbose=verbose)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the SQL transform tables.")
+    parser.add_argument("--workers", type=int, default=config.SQL_DAG_MAX_WORKERS, help="Concurrent model builds.")
+    parser.add_argument("--force", action="store_true", help="Rebuild every model even if it is up to date.")
+    parser.add_argument("--select", nargs="+", help="Only build these models and their downstream models.")
+    args = parser.parse_args()
 
+    build_sql_tables(max_workers=args.workers, force=args.force, select=args.select)
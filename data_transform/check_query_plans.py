@@ -0,0 +1,64 @@
+import sys
+import os
+
+# Dynamically add the parent directory (neil/) to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import sqlite3
+from config import NFLConfig
+from utils import check_query_plan, render_prediction_sql
+from data_transform.build_sql_tables import build_sql_dag
+
+config = NFLConfig()
+
+# Target weeks on both sides of the season boundary
+PREDICTION_CHECK_WEEKS = [1, 2, 3, 10]
+
+
+def transform_queries():
+    """Yields (label, query) for every SQL model in data_transform/, with its placeholders filled in."""
+    for name, model in sorted(build_sql_dag().models.items()):
+        yield os.path.basename(model.sql_file_path), model.query
+
+
+def prediction_queries():
+    """Yields (label, query) for the prediction SQL rendered for representative target weeks."""
+    for week in PREDICTION_CHECK_WEEKS:
+        week_config = NFLConfig(target_week=week, training_cutoff_week=week - 1)
+        yield f"rf_prediction_table.sql (week {week})", render_prediction_sql(week_config).strip().rstrip(";")
+
+
+def check_all_query_plans(conn):
+    """
+    Runs EXPLAIN QUERY PLAN on every transform and prediction query.
+
+    Transforms may scan their driving table (they rebuild whole tables), but every join must
+    be an index lookup. Prediction queries select a single week, so any full scan of a real
+    table is reported.
+
+    Returns:
+        dict: label -> list of problems, only for queries with problems.
+    """
+    failures = {}
+    for label, query in transform_queries():
+        problems = check_query_plan(conn, query, allow_driving_scan=True)
+        if problems:
+            failures[label] = problems
+    for label, query in prediction_queries():
+        problems = check_query_plan(conn, query, allow_driving_scan=False)
+        if problems:
+            failures[label] = problems
+    return failures
+
+
+if __name__ == "__main__":
+    with sqlite3.connect(config.DB_PATH) as conn:
+        failures = check_all_query_plans(conn)
+
+    if failures:
+        for label, problems in failures.items():
+            print(f"FAIL {label}")
+            for problem in problems:
+                print(f"    {problem}")
+        sys.exit(1)
+    print("All transform and prediction queries use indexes for their joins.")
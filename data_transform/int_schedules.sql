@@ -1,3 +1,8 @@
+-- index: season, week
+-- index: home_team, season, week
+-- index: away_team, season, week
+-- materialized: incremental
+-- partition_by: season, week
 select 
     game_id, 
     season, 
@@ -1,3 +1,7 @@
+-- index: recent_team, season, week
+-- index: season, week
+-- materialized: incremental
+-- partition_by: season, week
 SELECT 
     recent_team,
     season, 
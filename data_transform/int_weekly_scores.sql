@@ -1,3 +1,4 @@
+-- index: season, week
 --predictors are removed from this query: home/away score, outcome, total
 
 WITH score_data AS (
@@ -1,50 +1,8 @@
+-- index: season, week
+-- materialized: incremental
+-- partition_by: season, week
 --predictors are removed from this query: home/away score, outcome, total
 
-WITH score_data AS (
-    SELECT
-        s.season, 
-        s.week,
-        s.home_team,
-        s.away_team, 
-        SUM(s.home_score) AS home_score, 
-        SUM(s.away_score) AS away_score, 
-        IFNULL(SUM(home_ws.touchdown_points), 0) AS home_touchdown_points, 
-        IFNULL(SUM(away_ws.touchdown_points), 0) AS away_touchdown_points,
-        SUM(s.home_score) - IFNULL(SUM(home_ws.touchdown_points), 0) AS home_kicking_points, 
-        SUM(s.away_score) - IFNULL(SUM(away_ws.touchdown_points), 0) AS away_kicking_points
-    FROM int_schedules AS s
-    LEFT JOIN int_team_stats AS home_ws 
-        ON home_ws.recent_team = s.home_team
-        AND home_ws.week = s.week 
-        AND home_ws.season = s.season
-        AND home_ws.season_type = s.game_type 
-    LEFT JOIN int_team_stats AS away_ws
-        ON away_ws.recent_team = s.away_team
-        AND away_ws.week = s.week 
-        AND away_ws.season = s.season
-        AND away_ws.season_type = s.game_type 
-    GROUP BY
-        s.season, 
-        s.week,
-        s.home_team,
-        s.away_team
-)
-
-, kicking_stats AS (
-    SELECT 
-        season,
-        week,
-    	team,
-    	kicking_points
-    FROM (
-        SELECT season, week, home_team AS team, home_kicking_points AS kicking_points
-        FROM score_data
-        UNION ALL
-        SELECT season, week, away_team AS team, away_kicking_points AS kicking_points
-        FROM score_data
-    )
-) 
-
 SELECT 
     s.season, 
     s.week, 
@@ -84,7 +42,6 @@ SELECT
     home_stats.passing_2pt_conversions as passing_2pt_conversions_home, 
     home_stats.rushing_2pt_conversions as rushing_2pt_conversions_home, 
     home_stats.touchdown_points as touchdown_points_home,
-    hks.kicking_points as kicking_points_home,
     **/
     away_stats.passing_yards as passing_yards_away, 
     away_stats.rushing_yards as rushing_yards_away, 
@@ -105,8 +62,7 @@ SELECT
     away_stats.receptions as receptions_away
     --away_stats.passing_2pt_conversions as passing_2pt_conversions_away, 
     --away_stats.rushing_2pt_conversions as rushing_2pt_conversions_away, 
-    --away_stats.touchdown_points as touchdown_points_away, 
-    --aks.kicking_points as kicking_points_away
+    --away_stats.touchdown_points as touchdown_points_away
 FROM int_schedules s
 LEFT JOIN int_team_stats AS home_stats
     ON s.home_team = home_stats.recent_team
@@ -115,16 +71,4 @@ LEFT JOIN int_team_stats AS home_stats
 LEFT JOIN int_team_stats AS away_stats
     ON s.away_team = away_stats.recent_team
     AND s.season = away_stats.season
-    AND s.week = away_stats.week
- LEFT JOIN 
- 	kicking_stats as hks 
- ON 
- 	 home_stats.recent_team = hks.team
- 	AND s.season = hks.season
- 	AND s.week = hks.week 
- LEFT JOIN 
- 	kicking_stats as aks
- ON 
- 	away_stats.recent_team = aks.team 
- 	AND s.season = aks.season
- 	AND s.week = aks.week;
+    AND s.week = away_stats.week;
@@ -0,0 +1,380 @@
+import sys
+import os
+import json
+import hashlib
+import tempfile
+import threading
+import time
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# Dynamically add the parent directory (neil/) to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import sqlite3
+from config import NFLConfig
+from instrumentation import stage
+from utils import (read_sql_file, table_aliases, table_exists, table_columns, materialize_query, parse_model_indexes,
+                   parse_model_directive, create_model_indexes, get_table_versions, get_partition_versions,
+                   bump_table_version, configure_bulk_pragmas)
+
+config = NFLConfig()
+
+
+PARTITION_COLUMNS = ['season', 'week']
+
+
+class SQLModel:
+    """
+    One node of the SQL DAG: an output table built from a .sql file.
+
+    A model declaring "-- materialized: incremental" and "-- partition_by: season, week" is
+    rebuilt one (season, week) partition at a time when only a few upstream partitions changed.
+    Models whose rows depend on earlier partitions (rolling windows) also declare
+    "-- incremental_scope: following", so a change rebuilds that partition and every later one.
+
+    Args:
+        params (dict, optional): Values substituted into {placeholders} in the SQL file.
+    """
+
+    def __init__(self, table_name, sql_file_path, params=None):
+        self.table_name = table_name
+        self.sql_file_path = sql_file_path
+        self.query = read_sql_file(sql_file_path)
+        if params:
+            self.query = self.query.format(**params)
+        self.sql_hash = hashlib.sha256(self.query.encode("utf-8")).hexdigest()
+        self.references = sorted(set(table_aliases(self.query).values()))
+        self.upstream = []  # Filled in by SQLDag once every model is known
+        self.materialized = parse_model_directive(self.query, "materialized", "table").lower()
+        self.partition_by = [c.strip() for c in parse_model_directive(self.query, "partition_by", "").split(",") if c.strip()]
+        if self.materialized not in ("table", "incremental"):
+            raise ValueError(f"{table_name}: unknown materialization '{self.materialized}'.")
+        if self.materialized == "incremental" and self.partition_by != PARTITION_COLUMNS:
+            raise ValueError(f"{table_name}: incremental models must declare '-- partition_by: season, week'.")
+        self.incremental_scope = parse_model_directive(self.query, "incremental_scope", "partition").lower()
+        if self.incremental_scope not in ("partition", "following"):
+            raise ValueError(f"{table_name}: unknown incremental scope '{self.incremental_scope}'.")
+
+    def __repr__(self):
+        return f"SQLModel({self.table_name} <- {self.upstream or self.references})"
+
+
+class SQLDag:
+    """
+    Builds SQL models in dependency order, running independent models concurrently and
+    skipping models whose SQL and upstream table versions are unchanged since the last build.
+
+    Dependencies are parsed from the FROM/JOIN references of each model. References to
+    tables that no model produces (e.g. stg_schedules) are sources: they are not built,
+    but their versions still decide whether downstream models rebuild.
+
+    Each model is evaluated on its own connection into a scratch database attached to it, so
+    the expensive SELECTs run in parallel against WAL snapshots of the main database. Only the
+    final copy into the main database is serialized, since SQLite allows one writer at a time.
+
+    Incremental models keep a watermark per (season, week): the versions at which each upstream
+    table last changed that partition. Writers that know which partitions they touched (e.g.
+    upsert_dataframe) record them, so a late stat correction to one week rebuilds one week of
+    int_team_stats and rf_training_data instead of every season.
+    """
+
+    def __init__(self, models, db_path=None):
+        self.db_path = db_path or config.DB_PATH
+        self.models = {model.table_name: model for model in models}
+        for model in self.models.values():
+            model.upstream = [ref for ref in model.references if ref in self.models and ref != model.table_name]
+        self.order = self.topological_order()
+        self.write_lock = threading.Lock()
+
+    def topological_order(self):
+        """Returns model names so that every model comes after its upstream models."""
+        order, visiting, done = [], set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Cycle detected in SQL models at '{name}'.")
+            visiting.add(name)
+            for upstream in self.models[name].upstream:
+                visit(upstream)
+            visiting.discard(name)
+            done.add(name)
+            order.append(name)
+
+        for name in sorted(self.models):
+            visit(name)
+        return order
+
+    def downstream_of(self, names):
+        """Returns the given models plus every model that depends on them."""
+        selected = set(names)
+        for name in self.order:
+            if any(upstream in selected for upstream in self.models[name].upstream):
+                selected.add(name)
+        return selected
+
+    def connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=60)
+        conn.execute("PRAGMA busy_timeout=60000")
+        return conn
+
+    def ensure_state_table(self, conn):
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {config.SQL_BUILD_STATE_TABLE} (
+                table_name TEXT PRIMARY KEY,
+                sql_hash TEXT NOT NULL,
+                upstream_versions TEXT NOT NULL,
+                built_at TEXT,
+                build_seconds REAL
+            )
+        """)
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {config.PARTITION_WATERMARKS_TABLE} (
+                table_name TEXT NOT NULL,
+                season INTEGER NOT NULL,
+                week INTEGER NOT NULL,
+                upstream_signature TEXT NOT NULL,
+                PRIMARY KEY (table_name, season, week)
+            )
+        """)
+        conn.commit()
+
+    def upstream_partition_signatures(self, conn, model):
+        """
+        Returns {(season, week): signature} where the signature lists the version at which each
+        upstream table last changed that partition. None if any upstream table is untracked or
+        not partitioned by season and week, in which case only a full build is safe.
+        """
+        signatures = {}
+        for ref in model.references:
+            tracked = get_partition_versions(conn, ref)
+            if tracked is None or not set(PARTITION_COLUMNS) <= set(table_columns(conn, ref)[0]):
+                return None
+            base_version, versions = tracked
+            present = conn.execute(
+                f'SELECT DISTINCT season, week FROM "{ref}" WHERE season IS NOT NULL AND week IS NOT NULL'
+            ).fetchall()
+            for partition in present:
+                signatures.setdefault(partition, {})[ref] = versions.get(partition, base_version)
+        return {partition: json.dumps(refs, sort_keys=True) for partition, refs in signatures.items()}
+
+    def changed_partitions(self, conn, model, signatures):
+        """
+        Returns the partitions whose upstream signature differs from the one recorded at the last
+        build, including partitions that disappeared upstream. None if a full build is needed.
+        """
+        state = conn.execute(f"SELECT sql_hash FROM {config.SQL_BUILD_STATE_TABLE} WHERE table_name = ?",
+                             (model.table_name,)).fetchone()
+        if signatures is None or state is None or state[0] != model.sql_hash or not table_exists(conn, model.table_name):
+            return None
+        watermarks = dict(((season, week), signature) for season, week, signature in conn.execute(
+            f"SELECT season, week, upstream_signature FROM {config.PARTITION_WATERMARKS_TABLE} WHERE table_name = ?",
+            (model.table_name,)
+        ))
+        if not watermarks:
+            return None
+        partitions = set(signatures) | set(watermarks)
+        changed = sorted(p for p in partitions if signatures.get(p) != watermarks.get(p))
+        if model.incremental_scope == "following":
+            # Rebuilt with a single range query, so there is no partition limit
+            return sorted(p for p in partitions if changed and p >= changed[0])
+        if len(changed) > config.INCREMENTAL_MAX_PARTITIONS:
+            return None
+        return changed
+
+    def save_watermarks(self, conn, model, signatures, partitions=None):
+        """Records the upstream signature of the given partitions (all partitions if omitted)."""
+        if partitions is None:
+            conn.execute(f"DELETE FROM {config.PARTITION_WATERMARKS_TABLE} WHERE table_name = ?", (model.table_name,))
+            partitions = list(signatures)
+        for season, week in partitions:
+            if (season, week) in signatures:
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {config.PARTITION_WATERMARKS_TABLE} VALUES (?, ?, ?, ?)",
+                    (model.table_name, season, week, signatures[(season, week)])
+                )
+            else:
+                conn.execute(
+                    f"DELETE FROM {config.PARTITION_WATERMARKS_TABLE} WHERE table_name = ? AND season = ? AND week = ?",
+                    (model.table_name, season, week)
+                )
+
+    def build_partitions(self, conn, model, partitions, signatures):
+        """
+        Replaces the given (season, week) partitions of an incremental model in one transaction.
+        The season/week filter is pushed down into the model query, so each partition reads
+        only its own rows from the upstream tables. Models with incremental_scope "following"
+        replace everything from the earliest given partition onwards with a single query.
+
+        Returns:
+            int: Rows written.
+        """
+        row_count = 0
+        with self.write_lock:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if model.incremental_scope == "following":
+                    if partitions:
+                        season, week = partitions[0]
+                        tail = "season > ? OR (season = ? AND week >= ?)"
+                        conn.execute(f'DELETE FROM main."{model.table_name}" WHERE {tail}', (season, season, week))
+                        cursor = conn.execute(
+                            f'INSERT INTO main."{model.table_name}" SELECT * FROM ({model.query}) WHERE {tail}',
+                            (season, season, week)
+                        )
+                        row_count += cursor.rowcount
+                else:
+                    for season, week in partitions:
+                        conn.execute(f'DELETE FROM main."{model.table_name}" WHERE season = ? AND week = ?',
+                                     (season, week))
+                        cursor = conn.execute(
+                            f'INSERT INTO main."{model.table_name}" SELECT * FROM ({model.query}) WHERE season = ? AND week = ?',
+                            (season, week)
+                        )
+                        row_count += cursor.rowcount
+                self.save_watermarks(conn, model, signatures, partitions)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            if partitions:
+                bump_table_version(conn, model.table_name, partitions)
+        return row_count
+
+    def record_build(self, conn, model, upstream_versions, seconds):
+        with self.write_lock:
+            conn.execute(
+                f"""INSERT OR REPLACE INTO {config.SQL_BUILD_STATE_TABLE}
+                    (table_name, sql_hash, upstream_versions, built_at, build_seconds) VALUES (?, ?, ?, ?, ?)""",
+                (model.table_name, model.sql_hash, json.dumps(upstream_versions, sort_keys=True),
+                 datetime.now().isoformat(), seconds)
+            )
+            conn.commit()
+
+    def is_up_to_date(self, conn, model, upstream_versions):
+        """A model is up to date if its table exists and its SQL and inputs match the last build."""
+        if None in upstream_versions.values() or not table_exists(conn, model.table_name):
+            return False
+        row = conn.execute(
+            f"SELECT sql_hash, upstream_versions FROM {config.SQL_BUILD_STATE_TABLE} WHERE table_name = ?",
+            (model.table_name,)
+        ).fetchone()
+        return row is not None and row[0] == model.sql_hash and json.loads(row[1]) == upstream_versions
+
+    def build_model(self, model, force=False, verbose=True):
+        """
+        Builds one model unless it is up to date. Incremental models rebuild only their changed
+        partitions when they can and fall back to a full build otherwise. Each call is recorded as
+        stage "sql:<table>" in the pipeline_runs table.
+
+        Returns:
+            dict: table, status ("built", "incremental" or "skipped"), rows, partitions and seconds.
+        """
+        with stage(f"sql:{model.table_name}") as run:
+            result = self._build_model(model, force, verbose)
+            run.rows_out, run.detail = result['rows'], result['status']
+        return result
+
+    def _build_model(self, model, force, verbose):
+        start = time.perf_counter()
+        conn = self.connect()
+        try:
+            upstream_versions = get_table_versions(conn, model.references)
+            if not force and self.is_up_to_date(conn, model, upstream_versions):
+                return {'table': model.table_name, 'status': 'skipped', 'rows': None, 'partitions': None,
+                        'seconds': round(time.perf_counter() - start, 3)}
+
+            signatures = None
+            if model.materialized == "incremental":
+                signatures = self.upstream_partition_signatures(conn, model)
+                changed = None if force else self.changed_partitions(conn, model, signatures)
+                if changed is not None:
+                    if verbose:
+                        print(f"Updating {len(changed)} partitions of {model.table_name}: {changed}")
+                    row_count = self.build_partitions(conn, model, changed, signatures)
+                    seconds = time.perf_counter() - start
+                    self.record_build(conn, model, upstream_versions, seconds)
+                    if verbose:
+                        print(f"Table '{model.table_name}' updated with {row_count} rows in {seconds:.2f}s.")
+                    return {'table': model.table_name, 'status': 'incremental', 'rows': row_count,
+                            'partitions': len(changed), 'seconds': round(seconds, 3)}
+
+            if verbose:
+                print(f"Building {model.table_name} from {os.path.basename(model.sql_file_path)}")
+
+            # Evaluate the query into a private scratch database; this part runs in parallel
+            with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(self.db_path))) as scratch_dir:
+                scratch_path = os.path.join(scratch_dir, f"{model.table_name}.db")
+                conn.execute("ATTACH DATABASE ? AS build", (scratch_path,))
+                conn.execute("PRAGMA build.journal_mode=OFF")
+                conn.execute("PRAGMA build.synchronous=OFF")
+                conn.execute(f'CREATE TABLE build."{model.table_name}" AS {model.query}')
+                conn.commit()
+
+                # Copy into the main database; one writer at a time
+                with self.write_lock:
+                    row_count = materialize_query(conn, f'SELECT * FROM build."{model.table_name}"', model.table_name)
+                    create_model_indexes(conn, model.table_name, parse_model_indexes(model.query), verbose=False)
+                    if signatures is not None:
+                        self.save_watermarks(conn, model, signatures)
+                        conn.commit()
+                conn.execute("DETACH DATABASE build")
+
+            seconds = time.perf_counter() - start
+            self.record_build(conn, model, upstream_versions, seconds)
+            if verbose:
+                print(f"Table '{model.table_name}' built with {row_count} rows in {seconds:.2f}s.")
+            return {'table': model.table_name, 'status': 'built', 'rows': row_count, 'partitions': None,
+                    'seconds': round(seconds, 3)}
+        finally:
+            conn.close()
+
+    def run(self, max_workers=None, force=False, select=None, verbose=True):
+        """
+        Builds the DAG. Independent models run concurrently on a thread pool.
+
+        Args:
+            max_workers (int, optional): Concurrent model builds. Defaults to config.SQL_DAG_MAX_WORKERS.
+            force (bool): Rebuild every selected model even if it is up to date.
+            select (list, optional): Only build these models and everything downstream of them.
+            verbose (bool): If True, prints progress.
+
+        Returns:
+            list[dict]: One result per model, in completion order.
+        """
+        max_workers = max_workers or config.SQL_DAG_MAX_WORKERS
+        selected = self.downstream_of(select) if select else set(self.order)
+
+        conn = self.connect()
+        configure_bulk_pragmas(conn)  # WAL lets builders read while another model is written
+        self.ensure_state_table(conn)
+        conn.close()
+
+        start = time.perf_counter()
+        results = []
+        pending = [name for name in self.order if name in selected]
+        finished = set(self.order) - selected
+        running = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while pending or running:
+                for name in list(pending):
+                    if all(upstream in finished for upstream in self.models[name].upstream):
+                        pending.remove(name)
+                        running[executor.submit(self.build_model, self.models[name], force, verbose)] = name
+                if not running:
+                    raise RuntimeError(f"SQL models {pending} are waiting on upstream models that never finished.")
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    results.append(future.result())
+                    finished.add(name)
+
+        if verbose:
+            built = [r['table'] for r in results if r['status'] == 'built']
+            updated = [r['table'] for r in results if r['status'] == 'incremental']
+            print(f"SQL DAG finished in {time.perf_counter() - start:.2f}s: {len(built)} built {built}, "
+                  f"{len(updated)} updated incrementally {updated}, "
+                  f"{len(results) - len(built) - len(updated)} up to date.")
+        return results
@@ -0,0 +1,147 @@
+-- index: recent_team, season, week
+-- index: season, week
+-- materialized: incremental
+-- partition_by: season, week
+-- incremental_scope: following
+--Rolling team features for prediction: one row per team per scheduled game, aggregated over the
+--team's previous {feature_window_games} played games. The window follows the team's own games, so
+--early-season weeks reach back into the previous season and bye weeks do not shorten it.
+--A change to one week changes the features of every later game, hence incremental_scope: following.
+
+WITH appearances AS (
+    SELECT season, week, home_team AS recent_team FROM int_schedules
+    UNION
+    SELECT season, week, away_team AS recent_team FROM int_schedules
+),
+
+-- Each team's scheduled games and played games in one stream. Played games carry the stats;
+-- scheduled games sort first within a week so they only see games played before them.
+team_timeline AS (
+    SELECT
+        recent_team,
+        season,
+        week,
+        0 AS is_game,
+        NULL AS passing_yards,
+        NULL AS rushing_yards,
+        NULL AS receiving_yards,
+        NULL AS passing_tds,
+        NULL AS rushing_tds,
+        NULL AS receiving_tds,
+        NULL AS special_teams_tds,
+        NULL AS interceptions,
+        NULL AS sacks,
+        NULL AS rushing_fumbles,
+        NULL AS receiving_fumbles,
+        NULL AS sack_fumbles,
+        NULL AS receptions,
+        NULL AS targets,
+        NULL AS carries,
+        NULL AS passing_2pt_conversions,
+        NULL AS rushing_2pt_conversions,
+        NULL AS touchdown_points
+    FROM appearances
+
+    UNION ALL
+
+    SELECT
+        CASE
+            WHEN recent_team = 'OAK' THEN 'LV'
+            ELSE recent_team
+        END AS recent_team,
+        season,
+        week,
+        1 AS is_game,
+        passing_yards,
+        rushing_yards,
+        receiving_yards,
+        passing_tds,
+        rushing_tds,
+        receiving_tds,
+        special_teams_tds,
+        interceptions,
+        sacks,
+        rushing_fumbles,
+        receiving_fumbles,
+        sack_fumbles,
+        receptions,
+        targets,
+        carries,
+        passing_2pt_conversions,
+        rushing_2pt_conversions,
+        touchdown_points
+    FROM int_team_stats
+),
+
+-- games_played numbers each team's games; on a scheduled game it is the count of games before it
+numbered AS (
+    SELECT
+        *,
+        SUM(is_game) OVER (
+            PARTITION BY recent_team
+            ORDER BY season, week, is_game
+            ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+        ) AS games_played
+    FROM team_timeline
+),
+
+-- The trailing window covers games numbered games_played - N + 1 .. games_played; the stats of
+-- scheduled-game rows are NULL, so the aggregates only see played games
+features AS (
+    SELECT
+        recent_team,
+        season,
+        week,
+        is_game,
+        COUNT(passing_yards) OVER trailing AS games_in_window,
+        AVG(passing_yards) OVER trailing AS passing_yards_avg,
+        AVG(rushing_yards) OVER trailing AS rushing_yards_avg,
+        AVG(receiving_yards) OVER trailing AS receiving_yards_avg,
+        SUM(passing_tds) OVER trailing AS passing_tds,
+        SUM(rushing_tds) OVER trailing AS rushing_tds,
+        SUM(special_teams_tds) OVER trailing AS special_teams_tds,
+        SUM(interceptions) OVER trailing AS interceptions,
+        SUM(sacks) OVER trailing AS sacks,
+        SUM(rushing_fumbles) OVER trailing AS rushing_fumbles,
+        SUM(receiving_fumbles) OVER trailing AS receiving_fumbles,
+        SUM(sack_fumbles) OVER trailing AS sack_fumbles,
+        AVG(receptions) OVER trailing AS avg_receptions,
+        AVG(targets) OVER trailing AS avg_targets,
+        AVG(carries) OVER trailing AS avg_carries,
+        SUM(passing_2pt_conversions) OVER trailing AS passing_2pt_conversions,
+        SUM(rushing_2pt_conversions) OVER trailing AS rushing_2pt_conversions,
+        AVG(touchdown_points) OVER trailing AS touchdown_points,
+        AVG(receiving_tds) OVER trailing AS receiving_tds
+    FROM numbered
+    WINDOW trailing AS (
+        PARTITION BY recent_team
+        ORDER BY games_played
+        RANGE BETWEEN {feature_window_games} - 1 PRECEDING AND CURRENT ROW
+    )
+)
+
+SELECT
+    recent_team,
+    season,
+    week,
+    games_in_window,
+    passing_yards_avg,
+    rushing_yards_avg,
+    receiving_yards_avg,
+    passing_tds,
+    rushing_tds,
+    special_teams_tds,
+    interceptions,
+    sacks,
+    rushing_fumbles,
+    receiving_fumbles,
+    sack_fumbles,
+    avg_receptions,
+    avg_targets,
+    avg_carries,
+    passing_2pt_conversions,
+    rushing_2pt_conversions,
+    touchdown_points,
+    receiving_tds
+FROM features
+WHERE is_game = 0;
@@ -1,3 +1,4 @@
+-- index: recent_team, season, week
 with schedules as(  
 SELECT 
     season,
@@ -7,6 +7,7 @@ import numpy as np
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from config import NFLConfig
+from instrumentation import instrumented
 from utils import load_existing_nfl_data, load_to_sqlite,calculate_current_week
 
 import sqlite3
@@ -54,14 +55,18 @@ def calculate_game_related_metrics(merged_data):
 
     return merged_data
 
-if __name__ == "__main__":
-    conn = sqlite3.connect(config.DB_PATH)
-    config = NFLConfig()  # Load config
-
+@instrumented()
+def transform_base_model(conn, schedules=None, team_stats=None):
+    """
+    Merges team stats into the schedules and saves the game-level base model table.
+    schedules and team_stats are the frames transform_schedules and transform_weekly_scores
+    return; either one not given is read from its table.
+    """
     # Step 1: Load data from SQLite
-    schedules = load_existing_nfl_data(conn, config.SCHEDULES_TABLE)   
-
-    team_stats  = load_existing_nfl_data(conn, config.WEEKLY_SCORES_TABLE)
+    if schedules is None:
+        schedules = load_existing_nfl_data(conn, config.SCHEDULES_TABLE)
+    if team_stats is None:
+        team_stats = load_existing_nfl_data(conn, config.WEEKLY_SCORES_TABLE)
     # Step 2: Merge data
     base_data = merge_team_stats_with_schedules(schedules, team_stats)
 
@@ -71,4 +76,11 @@ if __name__ == "__main__":
     # Step 4: Save the final data to a new SQLite table
     load_to_sqlite(base_data, conn,config.BASE_MODEL_TABLE )
 
+    return base_data
+
+if __name__ == "__main__":
+    conn = sqlite3.connect(config.DB_PATH)
+
+    base_data = transform_base_model(conn)
+
     conn.close()
\ No newline at end of file
@@ -7,6 +7,7 @@ import numpy as np
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from config import NFLConfig
+from instrumentation import instrumented
 from utils import load_existing_nfl_data, schedule_filter, load_to_sqlite
 
 import sqlite3
@@ -18,7 +19,7 @@ def select_filter_schedules(schedules, config):
     """Selects and filters relevant schedule data based on season and week."""
     try:
         # Apply season and week filters using pandas query
-        schedules = schedules.query(schedule_filter(schedules))
+        schedules = schedules.query(schedule_filter(config))
         
         # Map game types to season types
         schedules['season_type'] = schedules['game_type'].map(config.GAME_TYPE_MAPPING)
@@ -29,7 +30,7 @@ def select_filter_schedules(schedules, config):
         return schedules
     except Exception as e:
         print(f"Error in filtering schedules: {str(e)}")
-        print(f"Filter being applied: {schedule_filter(schedules)}")
+        print(f"Filter being applied: {schedule_filter(config)}")
         raise
 
 def calculate_game_metrics(schedules):
@@ -38,6 +39,7 @@ def calculate_game_metrics(schedules):
     schedules['game_total_points'] = schedules['home_score'] + schedules['away_score']
     return schedules
 
+@instrumented()
 def transform_schedules(conn):
     schedule_data = load_existing_nfl_data( conn, config.STAGING_SCHEDULES_TABLE)
 
@@ -5,6 +5,7 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from config import NFLConfig
+from instrumentation import instrumented
 from utils import load_existing_nfl_data, load_to_sqlite,calculate_current_week
 
 import sqlite3
@@ -14,12 +15,16 @@ config = NFLConfig()
 
 
 def select_and_clean_columns(data, columns):
-    """Selects relevant columns and fills NaN values with 0."""
-    return data[columns].fillna(0)
+    """Selects relevant columns and fills NaN stat values with 0 (categorical keys have no 0 category)."""
+    data = data[columns]
+    return data.fillna({column: 0 for column in data.select_dtypes('number').columns})
 
 def aggregate_team_stats(data):
-    """Groups by team, season, and week, and sums values for each group."""
-    return data.groupby(['recent_team', 'season', 'season_type', 'week']).sum().reset_index()
+    """
+    Groups by team, season, and week, and sums values for each group. Categorical keys group by
+    their integer codes, and observed=True keeps only the combinations that occur.
+    """
+    return data.groupby(['recent_team', 'season', 'season_type', 'week'], observed=True).sum().reset_index()
 
 def calculate_derived_metrics(stats):
     """Calculates touchdowns, 2pt conversions, total score, total yards offense, and turnovers."""
@@ -31,6 +36,7 @@ def calculate_derived_metrics(stats):
 
     return stats
 
+@instrumented()
 def transform_weekly_scores(conn):
     """
     Main function to import, transform, and load weekly NFL data into SQLite.
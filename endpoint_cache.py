@@ -0,0 +1,184 @@
+# endpoint_cache.py
+import os
+import sys
+import time
+import importlib
+from datetime import datetime
+
+FORMAT_EXTENSIONS = {
+    'parquet': '.parquet',
+    'arrow': '.arrow',
+}
+
+
+class LazyEndpoint:
+    """
+    An endpoint named by module and function (e.g. "nfl_data_py", "import_schedules") that is
+    only imported on its first call. NFLConfig is built by every script at import time, so
+    resolving endpoints eagerly would make prediction and SQL-only runs load nfl_data_py too.
+    """
+
+    def __init__(self, module_name, function_name):
+        self.module_name = module_name
+        self.function_name = function_name
+        self.__name__ = function_name  # Cache directories are named after the endpoint function
+        self._function = None
+
+    def resolve(self):
+        if self._function is None:
+            self._function = getattr(importlib.import_module(self.module_name), self.function_name)
+        return self._function
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __repr__(self):
+        return f"LazyEndpoint({self.module_name}.{self.function_name})"
+
+
+class CachedEndpoint:
+    """
+    Wraps an nfl_data_py endpoint (e.g. nfl.import_schedules) with an on-disk cache.
+
+    Each season's response is stored as its own columnar file under
+    {cache_dir}/{endpoint name}/{season}.parquet (or .arrow for Arrow IPC), so a call
+    for several seasons only hits the network for the seasons that are missing or stale.
+
+    Closed seasons (before current_season) never expire. The current season, and any
+    later one, expires after ttl_days. In offline mode the network is never touched:
+    every requested season is served from the cache regardless of age, and a season
+    that was never cached raises FileNotFoundError.
+    """
+
+    def __init__(self, endpoint, cache_dir, current_season, ttl_days=7, file_format='parquet', offline=False):
+        if file_format not in FORMAT_EXTENSIONS:
+            raise ValueError(f"Unsupported cache format '{file_format}'. Use one of {list(FORMAT_EXTENSIONS)}.")
+        self.endpoint = endpoint
+        self.name = getattr(endpoint, '__name__', str(endpoint))
+        self.cache_dir = cache_dir
+        self.current_season = current_season
+        self.ttl_days = ttl_days
+        self.file_format = file_format
+        self.offline = offline
+        # Keep the wrapped endpoint's name so logs and cache keys stay readable
+        self.__name__ = self.name
+
+    def season_path(self, season):
+        """Returns the cache file path for one season of this endpoint."""
+        return os.path.join(self.cache_dir, self.name, f"{season}{FORMAT_EXTENSIONS[self.file_format]}")
+
+    def is_fresh(self, season):
+        """Returns True if the cached file for the season exists and has not expired."""
+        path = self.season_path(season)
+        if not os.path.exists(path):
+            return False
+        if self.offline or season < self.current_season:
+            return True
+        age_days = (time.time() - os.path.getmtime(path)) / 86400
+        return age_days < self.ttl_days
+
+    def read_season(self, season):
+        """Reads one cached season from disk."""
+        import pandas as pd
+        path = self.season_path(season)
+        if self.file_format == 'arrow':
+            return pd.read_feather(path)
+        return pd.read_parquet(path)
+
+    def write_season(self, season, data):
+        """Writes one season's response to disk, replacing any previous file atomically."""
+        path = self.season_path(season)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        data = data.reset_index(drop=True)
+        if self.file_format == 'arrow':
+            data.to_feather(tmp_path)
+        else:
+            data.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+    def invalidate(self, seasons=None):
+        """Deletes cached files for the given seasons (all seasons if None)."""
+        endpoint_dir = os.path.join(self.cache_dir, self.name)
+        if not os.path.isdir(endpoint_dir):
+            return
+        extension = FORMAT_EXTENSIONS[self.file_format]
+        for file_name in os.listdir(endpoint_dir):
+            season = file_name[:-len(extension)] if file_name.endswith(extension) else None
+            if season is not None and (seasons is None or int(season) in seasons):
+                os.remove(os.path.join(endpoint_dir, file_name))
+
+    def __call__(self, seasons, *args, **kwargs):
+        import pandas as pd
+        seasons = list(seasons)
+        stale = [season for season in seasons if not self.is_fresh(season)]
+
+        if stale and self.offline:
+            raise FileNotFoundError(
+                f"Offline mode: no cached {self.name} data for seasons {stale} in {self.cache_dir}."
+            )
+
+        fetched = {}
+        if stale:
+            print(f"Fetching {self.name} for seasons {stale} (cached: {len(seasons) - len(stale)}).")
+            response = self.endpoint(stale, *args, **kwargs)
+            for season, season_data in response.groupby('season', sort=False):
+                self.write_season(int(season), season_data)
+                fetched[int(season)] = season_data
+
+        frames = []
+        for season in seasons:
+            if season in fetched:
+                frames.append(fetched[season])
+            elif os.path.exists(self.season_path(season)):
+                frames.append(self.read_season(season))
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
+
+
+def cached_endpoint(endpoint, config):
+    """Wraps an endpoint with the cache settings from an NFLConfig."""
+    if not config.USE_ENDPOINT_CACHE:
+        return endpoint
+    return CachedEndpoint(
+        endpoint,
+        cache_dir=config.CACHE_DIR,
+        current_season=config.CURRENT_SEASON,
+        ttl_days=config.CACHE_CURRENT_SEASON_TTL_DAYS,
+        file_format=config.CACHE_FORMAT,
+        offline=config.OFFLINE_MODE,
+    )
+
+
+def list_cache_entries(cache_dir):
+    """Returns a DataFrame describing every cached endpoint/season file."""
+    import pandas as pd
+    entries = []
+    if os.path.isdir(cache_dir):
+        for endpoint_name in sorted(os.listdir(cache_dir)):
+            endpoint_dir = os.path.join(cache_dir, endpoint_name)
+            if not os.path.isdir(endpoint_dir):
+                continue
+            for file_name in sorted(os.listdir(endpoint_dir)):
+                path = os.path.join(endpoint_dir, file_name)
+                entries.append({
+                    'endpoint': endpoint_name,
+                    'file': file_name,
+                    'size_kb': round(os.path.getsize(path) / 1024, 1),
+                    'fetched_at': datetime.fromtimestamp(os.path.getmtime(path)).isoformat(timespec='seconds'),
+                })
+    return pd.DataFrame(entries)
+
+
+if __name__ == "__main__":
+    # Warm the cache for every configured season so later imports can run offline:
+    #   python endpoint_cache.py            -> fetch missing/stale seasons, then list the cache
+    #   NEIL_OFFLINE=1 python data_import/import_schedules.py  -> replay from the cache only
+    from config import NFLConfig
+
+    config = NFLConfig()
+    if "--list" not in sys.argv:
+        for endpoint in (config.SCHEDULE_ENDPOINT, config.WEEKLY_DATA_ENPOINT):
+            endpoint(config.SEASONS)
+    print(list_cache_entries(config.CACHE_DIR))
@@ -0,0 +1,188 @@
+# feature_cache.py
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from utils import get_table_versions
+
+# Training rows are read in a fixed order: train_test_split is positional, and the physical
+# order of rf_training_data changes when partitions are rebuilt incrementally
+TRAINING_ORDER = "season, week, home_team, away_team"
+
+MATRIX_FILES = {"X": "X.npy", "y": "y.npy", "keys": "keys.npy"}
+META_FILE = "meta.json"
+
+
+def training_window(season_week_keys, season, week):
+    """
+    Row range of the training matrix for one (season, week) job.
+
+    The matrix is ordered by season and week, so every training set is a contiguous slice:
+    week 1 trains on the previous season, later weeks on everything up to the week before.
+    Each week's window is the previous week's window with one more week appended.
+
+    Returns:
+        tuple: (start, stop) row positions.
+    """
+    if week == 1:
+        start = np.searchsorted(season_week_keys, (season - 1) * 100, side="left")
+        stop = np.searchsorted(season_week_keys, season * 100, side="left")
+    else:
+        start = 0
+        stop = np.searchsorted(season_week_keys, season * 100 + week - 1, side="right")
+    return int(start), int(stop)
+
+
+class FeatureMatrix:
+    """
+    The training rows of one table as arrays: X (float32, C-contiguous, one column per
+    feature), y (the target) and keys (season * 100 + week of each row, ascending).
+
+    Loaded from the cache the arrays are memory-mapped, so slicing a window of rows reads
+    only those pages and worker processes share one copy through the page cache.
+    """
+
+    def __init__(self, X, y, keys, meta, path=None):
+        self.X = X
+        self.y = y
+        self.keys = keys
+        self.meta = meta
+        self.path = path
+
+    @property
+    def feature_names(self):
+        return self.meta["feature_names"]
+
+    def __len__(self):
+        return len(self.keys)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+        arrays = {name: np.load(os.path.join(path, file), mmap_mode='r' if mmap else None)
+                  for name, file in MATRIX_FILES.items()}
+        return cls(arrays["X"], arrays["y"], arrays["keys"], meta, path)
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        for name, file in MATRIX_FILES.items():
+            np.save(os.path.join(path, file), getattr(self, name))
+        with open(os.path.join(path, META_FILE), "w") as f:
+            json.dump(self.meta, f, indent=2)
+
+    def window(self, season, week):
+        """Expanding training window for a target (season, week); see training_window."""
+        return training_window(self.keys, season, week)
+
+    def rows_between(self, first, last):
+        """Row range of the (season, week) pairs first through last, inclusive."""
+        start = np.searchsorted(self.keys, first[0] * 100 + first[1], side="left")
+        stop = np.searchsorted(self.keys, last[0] * 100 + last[1], side="right")
+        return int(start), int(stop)
+
+    def frame(self, rows=None):
+        """
+        Rows [start, stop) as a DataFrame of the feature columns plus the target, the shape the
+        run_classification_pipeline functions train on. Columns that were integers in the table
+        are integers again; every other feature stays float32.
+        """
+        start, stop = rows if rows is not None else (0, len(self))
+        data = pd.DataFrame(self.X[start:stop], columns=self.feature_names)
+        for column in self.meta["integer_columns"]:
+            data[column] = data[column].astype("int64")
+        data[self.meta["target"]] = self.y[start:stop]
+        return data
+
+
+class FeatureCache:
+    """
+    Materialized feature matrices under {root}/, one directory per table, filter and table version.
+
+    An entry is valid as long as its table's version in table_versions is unchanged, so a loop
+    that retrains every week parses the SQLite rows once per table change instead of once per
+    model. Tables that are not version-tracked are read on every load and keyed by the hash of
+    their rows. Writing a new version of an entry removes the older ones.
+    """
+
+    def __init__(self, root, mmap=True):
+        self.root = root
+        self.mmap = mmap
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def entry_prefix(table, where, target, drop_columns, order):
+        identity = {"table": table, "where": where, "target": target, "drop": list(drop_columns), "order": order}
+        digest = hashlib.sha256(json.dumps(identity, sort_keys=True).encode()).hexdigest()[:16]
+        return f"{table}-{digest}-"
+
+    def load(self, conn, table, where=None, target="outcome", drop_columns=("home_team", "away_team"),
+             order=TRAINING_ORDER):
+        """
+        Returns the FeatureMatrix of `SELECT * FROM table [WHERE where] ORDER BY order`, building
+        it on a cache miss. Every column except the target and drop_columns is a feature.
+        """
+        prefix = self.entry_prefix(table, where, target, drop_columns, order)
+        version = get_table_versions(conn, [table])[table]
+        if version is not None:
+            path = os.path.join(self.root, f"{prefix}v{version}")
+            if os.path.exists(os.path.join(path, META_FILE)):
+                return FeatureMatrix.load(path, self.mmap)
+
+        query = f"SELECT * FROM {table}" + (f" WHERE {where}" if where else "") + f" ORDER BY {order}"
+        data = pd.read_sql(query, conn)
+        if version is None or get_table_versions(conn, [table])[table] != version:
+            # Untracked, or rewritten while it was read: only the rows themselves identify the entry
+            row_hashes = pd.util.hash_pandas_object(data, index=False).to_numpy()
+            version = "rows-" + hashlib.sha256(row_hashes.tobytes()).hexdigest()[:16]
+            path = os.path.join(self.root, f"{prefix}{version}")
+            if os.path.exists(os.path.join(path, META_FILE)):
+                return FeatureMatrix.load(path, self.mmap)
+        else:
+            version = f"v{version}"
+
+        matrix = build_feature_matrix(data, target, drop_columns)
+        matrix.meta.update(table=table, version=version, where=where, order=order,
+                           created_at=datetime.now().isoformat(timespec='seconds'))
+        tmp_path = tempfile.mkdtemp(dir=self.root, prefix=".tmp-")
+        matrix.save(tmp_path)
+        try:
+            os.rename(tmp_path, path)
+        except OSError:
+            shutil.rmtree(tmp_path)  # Another process wrote the same entry first
+        for entry in os.listdir(self.root):
+            if entry.startswith(prefix) and os.path.join(self.root, entry) != path:
+                shutil.rmtree(os.path.join(self.root, entry), ignore_errors=True)
+        print(f"🧊 Cached {len(data)} x {len(matrix.feature_names)} feature matrix of '{table}' ({version})")
+        return FeatureMatrix.load(path, self.mmap)
+
+
+def build_feature_matrix(data, target="outcome", drop_columns=("home_team", "away_team")):
+    """Converts training rows (ordered by season and week) into an in-memory FeatureMatrix."""
+    features = data.drop(columns=[target, *drop_columns], errors='ignore')
+    y = data[target]
+    y = y.to_numpy(dtype="int64") if pd.api.types.is_integer_dtype(y) else y.to_numpy(dtype="float64", na_value=np.nan)
+    meta = {
+        "feature_names": list(features.columns),
+        "integer_columns": [c for c in features.columns if pd.api.types.is_integer_dtype(features[c])],
+        "target": target,
+        "rows": len(data),
+    }
+    X = np.ascontiguousarray(features.to_numpy(dtype="float32", na_value=np.nan))
+    keys = (data['season'] * 100 + data['week']).to_numpy(dtype="int64")
+    return FeatureMatrix(X, y, keys, meta)
+
+
+def feature_cache(config):
+    """Opens the feature cache configured in an NFLConfig."""
+    return FeatureCache(config.FEATURE_CACHE_DIR, mmap=config.FEATURE_CACHE_MMAP)
+
+
+def training_matrix(conn, config):
+    """The cached feature matrix of the whole training table (config.RF_TRAINING_DATA)."""
+    return feature_cache(config).load(conn, config.RF_TRAINING_DATA)
@@ -0,0 +1,272 @@
+# instrumentation.py
+import os
+import sys
+import time
+import atexit
+import sqlite3
+import argparse
+import functools
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from config import NFLConfig
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+config = NFLConfig()
+
+# One id per pipeline run; child processes inherit it, so pool workers report under the parent's run
+RUN_ID = os.environ.setdefault("NEIL_RUN_ID", f"{datetime.now():%Y%m%dT%H%M%S}-{os.getpid()}")
+
+RUN_COLUMNS = ['run_id', 'stage', 'parent', 'entry_point', 'started_at', 'wall_seconds', 'cpu_seconds',
+               'rows_in', 'rows_out', 'peak_rss_mb', 'page_reads', 'status', 'detail']
+
+_local = threading.local()
+_pending = []
+_pending_lock = threading.Lock()
+
+
+def peak_rss_mb():
+    """High-water mark of the process's resident memory so far, in MB (None where unsupported)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KB on Linux
+
+
+def read_calls():
+    """
+    read() system calls made by the process so far (Linux only, None elsewhere).
+
+    SQLite fetches one database page per read call (the database is not memory-mapped), so over
+    a SQL stage the difference is its page reads, including pages served from the OS cache.
+    Other file reads in the same process are counted too.
+    """
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                if line.startswith("syscr:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+class StageRun:
+    """Measurements of one stage. The stage sets rows_in, rows_out and detail itself when it knows them."""
+
+    def __init__(self, name, rows_in=None):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.detail = None
+
+
+@contextmanager
+def stage(name, rows_in=None):
+    """
+    Measures the enclosed block as one pipeline stage and records it in config.PIPELINE_RUNS_TABLE:
+    wall time, CPU time, rows in/out, peak RSS and page reads.
+
+        with stage("sql:team_features") as run:
+            run.rows_out = materialize_query(...)
+
+    CPU time, peak RSS and page reads are process-wide, so stages running concurrently in
+    threads of one process share them. Records are buffered and written when the outermost
+    stage of a thread ends, over a separate connection.
+    """
+    if not config.RECORD_PIPELINE_RUNS:
+        yield StageRun(name, rows_in)
+        return
+
+    stack = _local.__dict__.setdefault("stack", [])
+    run = StageRun(name, rows_in)
+    parent = stack[-1].name if stack else None
+    stack.append(run)
+    started_at = datetime.now().isoformat(timespec='seconds')
+    reads_before = read_calls()
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    status = "ok"
+    try:
+        yield run
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        wall_seconds = time.perf_counter() - wall_start
+        cpu_seconds = time.process_time() - cpu_start
+        reads_after = read_calls()
+        stack.pop()
+        record = {
+            'run_id': RUN_ID, 'stage': name, 'parent': parent,
+            'entry_point': os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else None,
+            'started_at': started_at, 'wall_seconds': round(wall_seconds, 4), 'cpu_seconds': round(cpu_seconds, 4),
+            'rows_in': run.rows_in, 'rows_out': run.rows_out, 'peak_rss_mb': peak_rss_mb(),
+            'page_reads': reads_after - reads_before if reads_before is not None else None,
+            'status': status, 'detail': run.detail,
+        }
+        budget = config.STAGE_BUDGET_SECONDS.get(name)
+        if budget is not None and wall_seconds > budget:
+            print(f"⚠️ Stage '{name}' took {wall_seconds:.2f}s, over its {budget}s budget")
+        with _pending_lock:
+            _pending.append(record)
+        if not stack:
+            flush_runs()
+
+
+def is_dataframe(value):
+    """isinstance(value, pd.DataFrame) without importing pandas: until it is loaded nothing is one."""
+    # Another thread may be halfway through importing pandas, before DataFrame is defined
+    frame_type = getattr(sys.modules.get("pandas"), "DataFrame", None)
+    return frame_type is not None and isinstance(value, frame_type)
+
+
+def instrumented(name=None):
+    """
+    Decorator form of stage(). rows_in is the length of the first DataFrame argument and
+    rows_out the length of a returned DataFrame.
+
+        @instrumented()
+        def transform_weekly_scores(conn): ...
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            frames = [a for a in (*args, *kwargs.values()) if is_dataframe(a)]
+            with stage(name or func.__name__, rows_in=len(frames[0]) if frames else None) as run:
+                result = func(*args, **kwargs)
+                if is_dataframe(result):
+                    run.rows_out = len(result)
+                return result
+        return wrapper
+    return decorate
+
+
+def ensure_pipeline_runs(conn):
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {config.PIPELINE_RUNS_TABLE} (
+            run_id TEXT,
+            stage TEXT,
+            parent TEXT,
+            entry_point TEXT,
+            started_at TEXT,
+            wall_seconds REAL,
+            cpu_seconds REAL,
+            rows_in INTEGER,
+            rows_out INTEGER,
+            peak_rss_mb REAL,
+            page_reads INTEGER,
+            status TEXT,
+            detail TEXT
+        )
+    """)
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{config.PIPELINE_RUNS_TABLE}_run "
+                 f"ON {config.PIPELINE_RUNS_TABLE} (run_id, stage)")
+
+
+def flush_runs(db_path=None):
+    """
+    Writes the buffered stage records. If the database is locked by a long write they stay
+    buffered for the next flush (at the latest when the process exits).
+    """
+    with _pending_lock:
+        records, _pending[:] = list(_pending), []
+    if not records:
+        return
+    conn = sqlite3.connect(db_path or config.DB_PATH, timeout=1)
+    try:
+        with conn:
+            ensure_pipeline_runs(conn)
+            conn.executemany(
+                f"INSERT INTO {config.PIPELINE_RUNS_TABLE} ({', '.join(RUN_COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in RUN_COLUMNS)})",
+                [tuple(record[column] for column in RUN_COLUMNS) for record in records]
+            )
+    except sqlite3.OperationalError:
+        with _pending_lock:
+            _pending[:0] = records
+    finally:
+        conn.close()
+
+
+atexit.register(flush_runs)
+
+
+def slowest_stages(conn, last_runs=None, limit=20):
+    """
+    Stages ordered by mean wall time across runs (optionally only the last_runs runs), with
+    their budget from config.STAGE_BUDGET_SECONDS and the worst run's wall time.
+
+    Returns:
+        pd.DataFrame: One row per stage.
+    """
+    import pandas as pd
+    ensure_pipeline_runs(conn)
+    run_filter = ""
+    if last_runs:
+        run_filter = (f"WHERE run_id IN (SELECT run_id FROM {config.PIPELINE_RUNS_TABLE} GROUP BY run_id "
+                      f"ORDER BY MIN(started_at) DESC LIMIT {int(last_runs)})")
+    report = pd.read_sql(f"""
+        SELECT stage,
+               COUNT(DISTINCT run_id) AS runs,
+               COUNT(*) AS calls,
+               AVG(wall_seconds) AS mean_wall_seconds,
+               MAX(wall_seconds) AS max_wall_seconds,
+               AVG(cpu_seconds) AS mean_cpu_seconds,
+               AVG(rows_in) AS mean_rows_in,
+               AVG(rows_out) AS mean_rows_out,
+               MAX(peak_rss_mb) AS peak_rss_mb,
+               AVG(page_reads) AS mean_page_reads,
+               SUM(status = 'error') AS errors
+        FROM {config.PIPELINE_RUNS_TABLE}
+        {run_filter}
+        GROUP BY stage
+        ORDER BY mean_wall_seconds DESC
+        LIMIT {int(limit)}
+    """, conn)
+    report['budget_seconds'] = report['stage'].map(config.STAGE_BUDGET_SECONDS)
+    report['over_budget'] = report['max_wall_seconds'] > report['budget_seconds']
+    return report
+
+
+def budget_violations(conn, run_id=None):
+    """Stage calls of one run (default: the latest) that took longer than their budget."""
+    import pandas as pd
+    ensure_pipeline_runs(conn)
+    if run_id is None:
+        row = conn.execute(f"SELECT run_id FROM {config.PIPELINE_RUNS_TABLE} "
+                           f"ORDER BY started_at DESC, rowid DESC LIMIT 1").fetchone()
+        if row is None:
+            return pd.DataFrame(columns=['run_id', 'stage', 'wall_seconds', 'budget_seconds'])
+        run_id = row[0]
+    calls = pd.read_sql(f"SELECT run_id, stage, wall_seconds FROM {config.PIPELINE_RUNS_TABLE} WHERE run_id = ?",
+                        conn, params=(run_id,))
+    calls['budget_seconds'] = calls['stage'].map(config.STAGE_BUDGET_SECONDS)
+    return calls[calls['wall_seconds'] > calls['budget_seconds']].reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report the slowest pipeline stages recorded in pipeline_runs.")
+    parser.add_argument("--runs", type=int, default=None, help="Only the most recent N runs.")
+    parser.add_argument("--limit", type=int, default=20, help="Stages to show.")
+    parser.add_argument("--check", action="store_true",
+                        help="Exit with status 1 if a stage of the latest run exceeded its budget.")
+    args = parser.parse_args()
+
+    with sqlite3.connect(config.DB_PATH) as conn:
+        report = slowest_stages(conn, args.runs, args.limit)
+        violations = budget_violations(conn) if args.check else None
+    conn.close()
+
+    if report.empty:
+        print(f"No stages recorded in '{config.PIPELINE_RUNS_TABLE}' yet.")
+    else:
+        print(report.to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+    if violations is not None and not violations.empty:
+        print(f"\n⚠️ {len(violations)} stage(s) of run {violations['run_id'].iloc[0]} over budget:")
+        print(violations.to_string(index=False))
+        sys.exit(1)
@@ -0,0 +1,322 @@
+# model_registry.py
+import os
+import json
+import hashlib
+import sqlite3
+from datetime import datetime
+
+CATALOG_FILE = "catalog.db"
+CATALOG_TABLE = "models"
+CURRENT_TABLE = "current_models"  # Per model name, the key load_latest returns
+
+
+def training_signature(training_data, partition_versions=None):
+    """
+    Identifies the training data a model is fitted on.
+
+    With partition_versions (utils.get_partition_versions of the training table) the signature is
+    the version of every (season, week) partition in the training rows, so a model stays valid until
+    one of its own partitions is rebuilt. Otherwise the rows themselves are hashed.
+    """
+    partitions = training_data[['season', 'week']].drop_duplicates().sort_values(['season', 'week'])
+    if partition_versions is not None:
+        base_version, versions = partition_versions
+        return [[int(s), int(w), versions.get((s, w), base_version)] for s, w in partitions.itertuples(index=False)]
+    import pandas as pd
+    row_hashes = pd.util.hash_pandas_object(training_data, index=False).to_numpy()
+    return hashlib.sha256(row_hashes.tobytes() + ",".join(training_data.columns).encode()).hexdigest()
+
+
+def model_metadata(model, training_data):
+    """Catalog metadata of a fitted model: feature columns, training window and metrics."""
+    seasons_weeks = training_data['season'] * 100 + training_data['week']
+    metrics = {}
+    if hasattr(model, 'oob_score_'):
+        metrics['oob_accuracy'] = float(model.oob_score_)
+    return {
+        "feature_columns": list(getattr(model, 'feature_names_in_', [])),
+        "training_rows": len(training_data),
+        "training_start": int(seasons_weeks.min()) if len(training_data) else None,
+        "training_end": int(seasons_weeks.max()) if len(training_data) else None,
+        "metrics": metrics,
+    }
+
+
+class ModelRegistry:
+    """
+    Content-addressed store for trained models.
+
+    A model is registered under a key: the hash of what determines it (pipeline, hyperparameters,
+    training data signature). Looking the key up before training lets a repeated backtest reuse
+    an unchanged model instead of refitting and rewriting it.
+
+    Artifacts are stored once per content hash as compressed joblib files under
+    {root}/artifacts/, so identical models registered under different keys share one file.
+    The catalog ({root}/catalog.db) maps keys to artifacts and keeps each model's metadata.
+    Each model name has a current key: the one last saved or reused by get_or_train, which
+    is what load_latest returns.
+    With mmap, loading expands an artifact once into {root}/mmap/ and memory-maps its arrays
+    from there; prune_mmap() removes the expanded copies of models no longer loaded.
+    Forests can also be loaded compiled (models/forest_arrays.py): the node arrays are exported
+    once to {root}/compiled/ and later loads read them without unpickling any tree.
+    """
+
+    def __init__(self, root, compress=3, mmap=True):
+        self.root = root
+        self.compress = compress
+        self.mmap = mmap
+        os.makedirs(os.path.join(root, "artifacts"), exist_ok=True)
+        os.makedirs(os.path.join(root, "compiled"), exist_ok=True)
+        with self.connect() as conn:
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {CATALOG_TABLE} (
+                    model_key TEXT PRIMARY KEY,
+                    artifact_sha TEXT NOT NULL,
+                    model_name TEXT NOT NULL,
+                    season INTEGER,
+                    week INTEGER,
+                    identity TEXT,
+                    feature_columns TEXT,
+                    training_rows INTEGER,
+                    training_start INTEGER,
+                    training_end INTEGER,
+                    metrics TEXT,
+                    size_bytes INTEGER,
+                    created_at TEXT
+                )
+            """)
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{CATALOG_TABLE}_name ON {CATALOG_TABLE} (model_name, created_at)")
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {CURRENT_TABLE} (
+                    model_name TEXT PRIMARY KEY,
+                    model_key TEXT NOT NULL,
+                    promoted_at TEXT
+                )
+            """)
+
+    def connect(self):
+        # Backtest workers register models concurrently
+        return sqlite3.connect(os.path.join(self.root, CATALOG_FILE), timeout=30)
+
+    @staticmethod
+    def model_key(**identity):
+        """Hash of the identity fields, e.g. model_key(pipeline=..., params=..., training=...)."""
+        return hashlib.sha256(json.dumps(identity, sort_keys=True, default=str).encode()).hexdigest()
+
+    def artifact_path(self, sha):
+        return os.path.join(self.root, "artifacts", f"{sha}.joblib.z")
+
+    def mmap_path(self, sha):
+        return os.path.join(self.root, "mmap", f"{sha}.joblib")
+
+    def compiled_path(self, sha):
+        return os.path.join(self.root, "compiled", f"{sha}.npz")
+
+    def lookup(self, key):
+        """Returns the catalog entry of a key as a dict, or None if it is not registered."""
+        with self.connect() as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute(f"SELECT * FROM {CATALOG_TABLE} WHERE model_key = ?", (key,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def save(self, model, key, name, metadata=None, season=None, week=None, identity=None):
+        """
+        Registers a model under key. Keys that are already registered are left untouched, and
+        the artifact is only written if no identical model is stored yet.
+
+        Returns:
+            tuple: (artifact sha, True if a new artifact file was written)
+        """
+        existing = self.lookup(key)
+        if existing is not None:
+            self.promote(key, name)
+            return existing["artifact_sha"], False
+        import joblib
+
+        # The content hash is that of the uncompressed dump, streamed into the digest rather than to disk
+        stream = HashingWriter()
+        joblib.dump(model, stream)
+        sha = stream.hexdigest()
+
+        written = not os.path.exists(self.artifact_path(sha))
+        if written:
+            tmp_path = f"{self.artifact_path(sha)}.{os.getpid()}.tmp"
+            joblib.dump(model, tmp_path, compress=self.compress)
+            os.replace(tmp_path, self.artifact_path(sha))
+
+        metadata = metadata or {}
+        with self.connect() as conn:
+            conn.execute(
+                f"INSERT OR IGNORE INTO {CATALOG_TABLE} VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, sha, name, season, week, json.dumps(identity, sort_keys=True, default=str),
+                 json.dumps(metadata.get("feature_columns", [])), metadata.get("training_rows"),
+                 metadata.get("training_start"), metadata.get("training_end"),
+                 json.dumps(metadata.get("metrics", {})), os.path.getsize(self.artifact_path(sha)),
+                 datetime.now().isoformat(timespec='seconds'))
+            )
+        self.promote(key, name)
+        return sha, written
+
+    def promote(self, key, name):
+        """Makes a registered key the current model of a name, the one load_latest returns."""
+        with self.connect() as conn:
+            conn.execute(
+                f"INSERT INTO {CURRENT_TABLE} VALUES (?, ?, ?) ON CONFLICT(model_name) DO UPDATE SET "
+                f"model_key = excluded.model_key, promoted_at = excluded.promoted_at",
+                (name, key, datetime.now().isoformat(timespec='seconds'))
+            )
+
+    def load(self, key, compiled=False):
+        """Loads a registered model, memory-mapping its arrays when the registry allows it."""
+        entry = self.lookup(key)
+        if entry is None:
+            raise KeyError(f"No model registered under key {key}.")
+        return self.load_artifact(entry["artifact_sha"], compiled)
+
+    def load_artifact(self, sha, compiled=False):
+        if compiled:
+            return self.load_compiled(sha)  # Needs neither joblib nor sklearn once exported
+        import joblib
+        if not self.mmap:
+            return joblib.load(self.artifact_path(sha))
+        path = self.mmap_path(sha)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            joblib.dump(joblib.load(self.artifact_path(sha)), tmp_path)
+            os.replace(tmp_path, path)
+        return joblib.load(path, mmap_mode='r')
+
+    def prune_mmap(self, keep_latest=True):
+        """
+        Removes the expanded copies in {root}/mmap/ (and leftover temporary files). With
+        keep_latest, the copy of the latest model of each name stays, since that is the one the
+        prediction scripts and the service load. Compressed artifacts are never removed.
+
+        Returns:
+            int: Bytes freed.
+        """
+        directory = os.path.join(self.root, "mmap")
+        if not os.path.isdir(directory):
+            return 0
+        keep = set()
+        if keep_latest:
+            with self.connect() as conn:
+                names = [row[0] for row in conn.execute(f"SELECT DISTINCT model_name FROM {CATALOG_TABLE}")]
+            keep = {os.path.basename(self.mmap_path(self.latest_sha(name))) for name in names}
+        freed = 0
+        for file_name in os.listdir(directory):
+            if file_name in keep:
+                continue
+            path = os.path.join(directory, file_name)
+            freed += os.path.getsize(path)
+            os.remove(path)
+        return freed
+
+    def load_compiled(self, sha):
+        """Loads a forest as a CompiledForest, exporting its node arrays on first use."""
+        from models.forest_arrays import CompiledForest
+
+        path = self.compiled_path(sha)
+        if not os.path.exists(path):
+            tmp_path = f"{path[:-len('.npz')]}.{os.getpid()}.tmp.npz"
+            CompiledForest.from_sklearn(self.load_artifact(sha)).save(tmp_path)
+            os.replace(tmp_path, path)
+        return CompiledForest.load(path)
+
+    def latest_sha(self, name):
+        """Artifact hash of the current model of this name, or None."""
+        with self.connect() as conn:
+            row = conn.execute(
+                f"SELECT m.artifact_sha FROM {CURRENT_TABLE} AS c "
+                f"JOIN {CATALOG_TABLE} AS m ON m.model_key = c.model_key WHERE c.model_name = ?",
+                (name,)
+            ).fetchone()
+            if row is not None:
+                return row[0]
+            # Catalogs written before names had a current key: the newest registration
+            row = conn.execute(
+                f"SELECT artifact_sha FROM {CATALOG_TABLE} WHERE model_name = ? ORDER BY created_at DESC, rowid DESC LIMIT 1",
+                (name,)
+            ).fetchone()
+        return row[0] if row is not None else None
+
+    def load_latest(self, name, compiled=False):
+        """Loads the current model of this name."""
+        sha = self.latest_sha(name)
+        if sha is None:
+            raise FileNotFoundError(f"No '{name}' model in the registry at {self.root}; train one first.")
+        return self.load_artifact(sha, compiled)
+
+    def get_or_train(self, name, identity, train, training_data, season=None, week=None):
+        """
+        Returns the model registered for identity, or calls train() and registers its result.
+        Either way it becomes the current model of name.
+
+        Returns:
+            tuple: (model, True if it was trained now)
+        """
+        key = self.model_key(**identity)
+        if self.lookup(key) is not None:
+            self.promote(key, name)
+            return self.load(key), False
+        model = train()
+        self.save(model, key, name, model_metadata(model, training_data), season, week, identity)
+        return model, True
+
+    def entries(self):
+        """Returns the catalog as a DataFrame, newest first."""
+        import pandas as pd
+        with self.connect() as conn:
+            return pd.read_sql(f"SELECT * FROM {CATALOG_TABLE} ORDER BY created_at DESC, rowid DESC", conn)
+
+
+class HashingWriter:
+    """Write-only file object that feeds what is written into a SHA-256 digest."""
+
+    def __init__(self):
+        self.digest = hashlib.sha256()
+        self.position = 0
+
+    def write(self, data):
+        self.digest.update(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):  # joblib aligns array data on the stream position
+        return self.position
+
+    def hexdigest(self):
+        return self.digest.hexdigest()
+
+
+def model_registry(config):
+    """Opens the model registry configured in an NFLConfig."""
+    return ModelRegistry(config.MODEL_REGISTRY_DIR, compress=config.MODEL_REGISTRY_COMPRESS,
+                         mmap=config.MODEL_REGISTRY_MMAP)
+
+
+def model_identity(pipeline_module, config, training_data, partition_versions=None):
+    """What a trained model depends on: pipeline, hyperparameters, evaluation mode and training data."""
+    return {
+        "pipeline": pipeline_module,
+        "params": config.RF_PARAMS,
+        "evaluation": config.MODEL_EVALUATION,
+        "training": training_signature(training_data, partition_versions),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    from config import NFLConfig
+
+    parser = argparse.ArgumentParser(description="List the registered models.")
+    parser.add_argument("--prune-mmap", action="store_true",
+                        help="Remove the expanded mmap copies of all but the latest model of each name.")
+    args = parser.parse_args()
+
+    registry = model_registry(NFLConfig())
+    if args.prune_mmap:
+        print(f"🧹 Freed {registry.prune_mmap() / (1024 * 1024):.1f} MB from {os.path.join(registry.root, 'mmap')}")
+    print(registry.entries()[['model_name', 'season', 'week', 'training_rows', 'metrics',
+                              'size_bytes', 'artifact_sha', 'created_at']].to_string(index=False))
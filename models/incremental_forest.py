@@ -0,0 +1,294 @@
+import sys
+import os
+import time
+import argparse
+
+# Dynamically add the parent directory (neil/) to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import sqlite3
+import numpy as np
+import pandas as pd
+import joblib
+from sklearn.ensemble import RandomForestClassifier
+from config import NFLConfig
+from utils import (load_prediction_inputs, upsert_dataframe, delete_keyed_rows, training_data_filter,
+                   get_partition_versions, render_prediction_sql)
+from model_registry import model_registry, model_identity, model_metadata
+from models.train_random_forest_base import prepare_features_and_target
+from feature_cache import TRAINING_ORDER
+
+config = NFLConfig()
+
+
+def season_week_key(season, week):
+    return int(season) * 100 + int(week)
+
+
+def fit_full_forest(X, y, config, trained_through):
+    """
+    Fits a forest of config.INCREMENTAL_TREE_BUDGET trees on all of X with warm_start enabled,
+    so later updates can grow it. Every tree is tagged with the (season, week) key of the
+    newest data it saw; updates retire trees by that age.
+    """
+    params = dict(config.RF_PARAMS, n_estimators=config.INCREMENTAL_TREE_BUDGET, warm_start=True)
+    model = RandomForestClassifier(**params)
+    model.fit(X, y)
+    model.tree_weeks_ = [trained_through] * len(model.estimators_)
+    model.updates_since_full_fit_ = 0
+    return model
+
+
+def update_forest(model, X_new, y_new, config, trained_through):
+    """
+    Grows config.INCREMENTAL_TREES_PER_UPDATE trees on the newest rows only, then retires the
+    oldest trees so the forest stays within config.INCREMENTAL_TREE_BUDGET. The cost depends
+    on the size of the new data, not on the history.
+
+    Returns:
+        bool: False if the update was skipped (the new rows hold a single class).
+    """
+    if len(np.unique(y_new)) < len(model.classes_):
+        return False
+    # warm_start skips one seed per existing tree and draws the next ones; with a fixed seed and
+    # the forest held at its budget, every update would draw the same seeds. Keyed by the week,
+    # each update's trees get their own bootstrap samples and feature subsets.
+    base_seed = config.RF_PARAMS.get("random_state")
+    if base_seed is not None:
+        model.random_state = int(np.random.SeedSequence([base_seed, trained_through]).generate_state(1)[0])
+    model.n_estimators = len(model.estimators_) + config.INCREMENTAL_TREES_PER_UPDATE
+    model.fit(X_new, y_new)
+    model.tree_weeks_ = list(model.tree_weeks_) + [trained_through] * config.INCREMENTAL_TREES_PER_UPDATE
+
+    # estimators_ is in creation order, so the oldest trees come first
+    excess = len(model.estimators_) - config.INCREMENTAL_TREE_BUDGET
+    if excess > 0:
+        model.estimators_ = model.estimators_[excess:]
+        model.tree_weeks_ = model.tree_weeks_[excess:]
+        model.n_estimators = len(model.estimators_)
+    model.updates_since_full_fit_ = getattr(model, "updates_since_full_fit_", 0) + 1
+    return True
+
+
+def window_rows(training_data, keys, cutoff, config):
+    """
+    The training rows an update grows its trees on: the config.INCREMENTAL_WINDOW_WEEKS weeks
+    of the cutoff's season up to and including the cutoff week.
+    """
+    season, week = divmod(int(cutoff), 100)
+    window_start = season_week_key(season, max(week - config.INCREMENTAL_WINDOW_WEEKS + 1, 1))
+    return training_data[(keys >= window_start) & (keys <= cutoff)]
+
+
+def full_refit_due(model, config):
+    """True once every config.INCREMENTAL_FULL_REFIT_EVERY updates since the last full fit."""
+    updates = getattr(model, "updates_since_full_fit_", 0)
+    return updates > 0 and updates % config.INCREMENTAL_FULL_REFIT_EVERY == 0
+
+
+def compare_with_full_refit(model, full_model, X_check, y_check=None):
+    """
+    Quality check of the incremental forest against a full refit on the same prediction rows.
+
+    Returns:
+        dict: Prediction agreement, and both accuracies when outcomes are known.
+    """
+    incremental_pred = model.predict(X_check)
+    full_pred = full_model.predict(X_check)
+    check = {"agreement": float(np.mean(incremental_pred == full_pred)),
+             "incremental_accuracy": None, "full_accuracy": None}
+    if y_check is not None and len(y_check):
+        check["incremental_accuracy"] = float(np.mean(incremental_pred == y_check))
+        check["full_accuracy"] = float(np.mean(full_pred == y_check))
+    return check
+
+
+def full_refit_check(model, X_all, y_all, X_check, y_check, config, trained_through):
+    """
+    Fits a full forest on all history and compares it with the incremental forest on X_check.
+    If they agree on fewer than config.INCREMENTAL_MIN_AGREEMENT of the rows, the full refit
+    replaces the incremental forest.
+
+    Returns:
+        tuple: (the forest to keep, check dict with agreement, accuracies and replaced)
+    """
+    full_model = fit_full_forest(X_all, y_all, config, trained_through)
+    check = compare_with_full_refit(model, full_model, X_check[list(model.feature_names_in_)], y_check)
+    check["replaced"] = check["agreement"] < config.INCREMENTAL_MIN_AGREEMENT
+    return (full_model if check["replaced"] else model), check
+
+
+def retrain_incremental_model(conn, config=config):
+    """
+    Weekly retraining without a full refit, the way run_incremental_backtest validates it: loads
+    the forest last registered as config.MODEL_NAME and grows new trees on the
+    config.INCREMENTAL_WINDOW_WEEKS weeks up to the newest training week. Every
+    config.INCREMENTAL_FULL_REFIT_EVERY updates a full refit is trained and compared on the
+    target week's games; below config.INCREMENTAL_MIN_AGREEMENT the full refit is registered
+    instead. The check is recorded in the model's metrics.
+
+    If the latest registered model is not an incremental forest (or there is none yet), a
+    forest is fitted on all training rows.
+
+    Returns:
+        tuple: (model, True if it was trained and registered now)
+    """
+    registry = model_registry(config)
+    base_sha = registry.latest_sha(config.MODEL_NAME)
+    model = registry.load_artifact(base_sha) if base_sha is not None else None
+    if not hasattr(model, "tree_weeks_"):  # A full refit of models/train_random_forest_base.py
+        model, base_sha = None, None
+
+    training_data = pd.read_sql_query(
+        f"SELECT * FROM {config.RF_TRAINING_DATA} WHERE {training_data_filter(config)} ORDER BY {TRAINING_ORDER}", conn)
+    if training_data.empty:
+        return model, False
+    keys = training_data['season'] * 100 + training_data['week']
+    cutoff = int(keys.max())
+    if model is not None and cutoff <= max(model.tree_weeks_):
+        return model, False  # No week the forest has not seen yet
+
+    check = None
+    if model is None:
+        fitted = training_data
+        X, y = prepare_features_and_target(fitted, 'outcome', None)
+        model = fit_full_forest(X, y, config, cutoff)
+    else:
+        fitted = window_rows(training_data, keys, cutoff, config)
+        X_new, y_new = prepare_features_and_target(fitted, 'outcome', None)
+        if not update_forest(model, X_new, y_new, config, cutoff):
+            return model, False
+        if full_refit_due(model, config):
+            X_all, y_all = prepare_features_and_target(training_data, 'outcome', None)
+            X_check = pd.read_sql_query(render_prediction_sql(config), conn)  # The games about to be predicted
+            if X_check.empty:
+                X_check = X_new
+            model, check = full_refit_check(model, X_all, y_all, X_check, None, config, cutoff)
+            print(f"🔎 {check['agreement']:.0%} agreement with a full refit"
+                  + (" - registering the full refit instead" if check["replaced"] else ""))
+            if check["replaced"]:
+                fitted = training_data
+
+    identity = model_identity("models.incremental_forest", config, fitted,
+                              get_partition_versions(conn, config.RF_TRAINING_DATA))
+    identity.update(base=base_sha, incremental=[config.INCREMENTAL_TREE_BUDGET, config.INCREMENTAL_TREES_PER_UPDATE,
+                                                config.INCREMENTAL_WINDOW_WEEKS, config.INCREMENTAL_FULL_REFIT_EVERY,
+                                                config.INCREMENTAL_MIN_AGREEMENT])
+    metadata = model_metadata(model, fitted)
+    if check is not None:
+        metadata["metrics"]["full_refit_check"] = check
+    registry.save(model, registry.model_key(**identity), config.MODEL_NAME, metadata,
+                  config.CURRENT_SEASON, config.TARGET_WEEK, identity)
+    return model, True
+
+
+def run_incremental_backtest(conn, season, weeks=range(1, 23), config=config, model_path=None):
+    """
+    Walk-forward backtest that refits the forest in full once and then updates it week by week.
+
+    Week 1 fits a full forest on the previous season (as the weekly scripts do). Each later
+    week grows new trees on the most recent config.INCREMENTAL_WINDOW_WEEKS weeks and retires
+    the oldest. Every config.INCREMENTAL_FULL_REFIT_EVERY updates a full refit on all history is
+    trained for comparison; if the two agree on fewer than config.INCREMENTAL_MIN_AGREEMENT of
+    the week's games, the incremental forest is replaced by the full refit.
+
+    Returns:
+        tuple: (predictions DataFrame, quality checks DataFrame)
+    """
+    weeks = sorted(weeks)
+    training_data = pd.read_sql(
+        f"SELECT * FROM {config.RF_TRAINING_DATA} WHERE season <= {season} ORDER BY {TRAINING_ORDER}",
+        conn
+    )
+    keys = training_data['season'] * 100 + training_data['week']
+    prediction_inputs = load_prediction_inputs(conn, config, seasons=[season])
+    outcomes = pd.read_sql(
+        f"SELECT game_id, outcome FROM int_schedules WHERE season = {season} AND home_score IS NOT NULL", conn
+    ).set_index('game_id')['outcome']
+
+    model, predictions, checks = None, [], []
+    for week in weeks:
+        start = time.perf_counter()
+        cutoff = season_week_key(season, week - 1) if week > 1 else season_week_key(season - 1, 99)
+        if model is None:
+            history = training_data[keys // 100 == season - 1] if week == 1 else training_data[keys <= cutoff]
+            if history.empty:
+                print(f"⚠️ Skipping Week {week} - Training data empty.")
+                continue
+            X, y = prepare_features_and_target(history, 'outcome', None)
+            model = fit_full_forest(X, y, config, cutoff)
+            mode, fitted_rows = "full", len(history)
+        else:
+            recent = window_rows(training_data, keys, cutoff, config)
+            X_new, y_new = prepare_features_and_target(recent, 'outcome', None)
+            updated = not recent.empty and update_forest(model, X_new, y_new, config, cutoff)
+            mode, fitted_rows = ("incremental", len(recent)) if updated else ("unchanged", 0)
+        fit_seconds = time.perf_counter() - start
+
+        week_inputs = prediction_inputs[prediction_inputs['week'] == week].reset_index(drop=True)
+        if week_inputs.empty:
+            print(f"⚠️ Skipping Week {week} - No prediction input data.")
+            continue
+        X_pred = week_inputs[list(model.feature_names_in_)]
+        y_check = week_inputs['game_id'].map(outcomes)
+        y_check = y_check.to_numpy() if y_check.notna().all() else None
+
+        if mode == "incremental" and full_refit_due(model, config):
+            X_all, y_all = prepare_features_and_target(training_data[keys <= cutoff], 'outcome', None)
+            model, check = full_refit_check(model, X_all, y_all, X_pred, y_check, config, cutoff)
+            check["week"] = week
+            checks.append(check)
+            print(f"🔎 Week {week} check: {check['agreement']:.0%} agreement with a full refit"
+                  + (" - replacing the incremental forest" if check["replaced"] else ""))
+            if check["replaced"]:
+                mode, fitted_rows = "full", len(X_all)
+
+        classes = list(model.classes_)
+        home_win_probability = model.predict_proba(X_pred)[:, classes.index(1)] if 1 in classes else 0.0
+        predictions.append(pd.DataFrame({
+            "config_name": "incremental",
+            "season": season,
+            "week": week,
+            "game_id": week_inputs["game_id"],
+            "home_team": week_inputs["home_team"],
+            "away_team": week_inputs["away_team"],
+            "predicted_outcome": model.predict(X_pred),
+            "home_win_probability": home_win_probability,
+            "training_rows": fitted_rows,
+            "training_mode": mode,
+            "fit_seconds": round(fit_seconds, 3),
+        }))
+        print(f"✅ Week {week}: {mode} fit in {fit_seconds:.2f}s, {len(model.estimators_)} trees "
+              f"(oldest trained through {min(model.tree_weeks_)})")
+
+    if model is not None and model_path:
+        joblib.dump(model, model_path, compress=config.MODEL_REGISTRY_COMPRESS)
+    if predictions:
+        predictions = pd.concat(predictions, ignore_index=True)
+        predictions['outcome'] = predictions['game_id'].map(outcomes)
+    else:
+        predictions = pd.DataFrame()
+    return predictions, pd.DataFrame(checks)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Walk-forward backtest with warm-start incremental forest updates.")
+    parser.add_argument("--season", type=int, default=config.CURRENT_SEASON)
+    parser.add_argument("--weeks", type=int, nargs=2, default=[1, 22], metavar=("FIRST", "LAST"))
+    parser.add_argument("--model-path", default=None,
+                        help="Also save the final forest to this file. The weekly model lives in the registry "
+                             "(config.INCREMENTAL_RETRAIN), not here.")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(config.DB_PATH)
+    weeks = range(args.weeks[0], args.weeks[1] + 1)
+    predictions, checks = run_incremental_backtest(conn, args.season, weeks, model_path=args.model_path)
+    # Weeks skipped this run must not keep the predictions of an earlier run
+    delete_keyed_rows(conn, config.BACKTEST_PREDICTIONS_TABLE, ['config_name', 'season', 'week'],
+                      [("incremental", args.season, week) for week in weeks])
+    if not predictions.empty:
+        upsert_dataframe(conn, predictions, config.BACKTEST_PREDICTIONS_TABLE, config.BACKTEST_PREDICTION_KEYS)
+        print(f"📁 {len(predictions)} predictions written to '{config.BACKTEST_PREDICTIONS_TABLE}'.")
+    if not checks.empty:
+        print(checks.to_string(index=False))
+    conn.close()
@@ -5,13 +5,14 @@ import numpy as np
 
 # Dynamically add the parent directory (neil/) to sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-import joblib
 from sklearn.model_selection import train_test_split, cross_val_score
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.impute import SimpleImputer
 from sklearn.metrics import accuracy_score, roc_auc_score, classification_report
 from config import NFLConfig
-from utils import training_data_filter
+from utils import training_data_filter, get_partition_versions
+from model_registry import model_registry, model_identity
+from instrumentation import instrumented
 
 import sqlite3
 
@@ -35,7 +36,7 @@ def show_missing_records(df, columns_with_nulls, conn):
 
 def prepare_features_and_target(df, columns_to_drop, target_column,conn):
     """Prepare the features and target for the model."""
-    X = df.drop(columns=columns_to_drop)
+    X = df.drop(columns=columns_to_drop, errors='ignore')
     y = df[target_column]
 
     # Convert season_type from categorical to numerical
@@ -44,7 +45,8 @@ def prepare_features_and_target(df, columns_to_drop, target_column,conn):
 
     print("Model feature columns:")
     print(', '.join(X.columns))
-    X.to_sql("X_training",conn, if_exists = "replace",index = False)
+    if conn is not None:  # Parallel backtest workers train without a connection
+        X.to_sql("X_training",conn, if_exists = "replace",index = False)
     return X, y
 
 def impute_missing_values(X_train, X_test, columns_with_nulls):
@@ -54,16 +56,32 @@ def impute_missing_values(X_train, X_test, columns_with_nulls):
     if existing_columns:
         imputer = SimpleImputer(strategy='mean')
         X_train[existing_columns] = imputer.fit_transform(X_train[existing_columns])
-        X_test[existing_columns] = imputer.transform(X_test[existing_columns])
+        if X_test is not None:  # None when training on every row (OOB evaluation)
+            X_test[existing_columns] = imputer.transform(X_test[existing_columns])
 
     return X_train, X_test
 
-def train_random_forest_model(X_train, y_train):
-    """Train a Random Forest classifier."""
-    model = RandomForestClassifier(random_state=42)
+def train_random_forest_model(X_train, y_train, params=None):
+    """Train a Random Forest classifier. params are RandomForestClassifier arguments (config.RF_PARAMS)."""
+    model = RandomForestClassifier(**(params or {'random_state': 42}))
     model.fit(X_train, y_train)
     return model
 
+def evaluate_oob(model, y):
+    """Evaluate the model on its out-of-bag predictions, so no rows are held back from training."""
+    proba = model.oob_decision_function_
+    scored = ~np.isnan(proba).any(axis=1)  # Rows that were in the bootstrap sample of every tree have no OOB vote
+    y_scored = np.asarray(y)[scored]
+    y_pred = model.classes_[proba[scored].argmax(axis=1)]
+    accuracy = model.oob_score_
+    roc_auc = None
+    if len(model.classes_) == 2 and len(np.unique(y_scored)) == 2:
+        roc_auc = roc_auc_score(y_scored, proba[scored, 1])
+    print(f'OOB Accuracy: {accuracy:.2f}')
+    print(f'OOB ROC-AUC Score: {roc_auc:.2f}' if roc_auc is not None else 'OOB ROC-AUC Score: n/a (one class)')
+    print(classification_report(y_scored, y_pred, zero_division=0))
+    return accuracy, roc_auc
+
 def evaluate_model(model, X_test, y_test):
     """Make predictions and evaluate the model."""
     y_pred = model.predict(X_test)
@@ -74,11 +92,11 @@ def evaluate_model(model, X_test, y_test):
     print(classification_report(y_test, y_pred))
     return accuracy, roc_auc
 
-def cross_validate_model(model, X, y):
-    """Perform cross-validation to check model stability."""
+def cross_validate_model(model, X, y, folds=5, n_jobs=None):
+    """Perform cross-validation to check model stability. Folds are fitted in parallel across n_jobs processes."""
     imputer = SimpleImputer(strategy='mean')
     X_imputed = pd.DataFrame(imputer.fit_transform(X), columns=X.columns)
-    scores = cross_val_score(model, X_imputed, y, cv=5, scoring='accuracy')
+    scores = cross_val_score(model, X_imputed, y, cv=folds, scoring='accuracy', n_jobs=n_jobs)
     print(f"Cross-Validation Accuracy: {scores.mean():.2f}")
     return scores.mean()
 
@@ -92,6 +110,7 @@ def feature_importance(model, feature_names):
     print(importances.head(10))
     return importances
 
+@instrumented("train_model.run_classification_pipeline")
 def run_classification_pipeline(df, config,conn):
     """Main function to run the classification model pipeline."""
     columns_to_drop = ['game_id', 'home_team', 'away_team', 'outcome', 'score_diff', 'game_total_points']
@@ -101,26 +120,33 @@ def run_classification_pipeline(df, config,conn):
     columns_with_nulls = check_missing_values(df)
 
     # Step 2: Show and save records (rows) with missing values
-    with sqlite3.connect(config.DB_PATH) as conn:
-        show_missing_records(df, columns_with_nulls, conn)
+    if conn is not None:
+        with sqlite3.connect(config.DB_PATH) as conn:
+            show_missing_records(df, columns_with_nulls, conn)
 
     # Step 3: Prepare features and target variable
     X, y = prepare_features_and_target(df, columns_to_drop, target_column,conn)
 
-    # Step 4: Train-test split
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42)
+    if config.MODEL_EVALUATION == "oob":
+        # Steps 4-7: One fit on every row, evaluated on its out-of-bag predictions
+        X, _ = impute_missing_values(X, None, columns_with_nulls)
+        model = train_random_forest_model(X, y, dict(config.RF_PARAMS, oob_score=True))
+        evaluate_oob(model, y)
+    else:
+        # Step 4: Train-test split
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42)
 
-    # Step 5: Impute missing values
-    X_train, X_test = impute_missing_values(X_train, X_test, columns_with_nulls)
+        # Step 5: Impute missing values
+        X_train, X_test = impute_missing_values(X_train, X_test, columns_with_nulls)
 
-    # Step 6: Train model
-    model = train_random_forest_model(X_train, y_train)
+        # Step 6: Train model
+        model = train_random_forest_model(X_train, y_train, config.RF_PARAMS)
 
-    # Step 7: Evaluate model
-    evaluate_model(model, X_test, y_test)
+        # Step 7: Evaluate model
+        evaluate_model(model, X_test, y_test)
 
-    # Step 8: Cross-validation
-    cross_validate_model(model, X, y)
+        # Step 8: Cross-validation
+        cross_validate_model(model, X, y, config.CV_FOLDS, config.CV_N_JOBS)
 
     # Step 9: Feature importance
     feature_importance(model, X.columns)
@@ -134,11 +160,14 @@ if __name__ == "__main__":
     with sqlite3.connect(config.DB_PATH) as conn:
         query = f"SELECT * FROM base_model WHERE {training_data_filter(config)}"
         merged_data = pd.read_sql_query(query, conn)
+        partition_versions = get_partition_versions(conn, "base_model")
 
-    # Run the full model training pipeline
-    model = run_classification_pipeline(merged_data, config,conn)
+        # Run the full model training pipeline, unless the registry already has this exact model
+        registry = model_registry(config)
+        model, trained = registry.get_or_train(
+            config.BASE_MODEL_NAME, model_identity("models.train_model", config, merged_data, partition_versions),
+            lambda: run_classification_pipeline(merged_data, config, conn), merged_data,
+            config.CURRENT_SEASON, config.TARGET_WEEK)
 
-    # Save trained model
-    model_filename = "random_forest_model.pkl"
-    joblib.dump(model, model_filename)
-    print(f"Model saved as {model_filename}")
+    print(f"Model {'trained and registered' if trained else 'unchanged, reused from the registry'} "
+          f"as '{config.BASE_MODEL_NAME}' in {config.MODEL_REGISTRY_DIR}")
@@ -5,26 +5,29 @@ import numpy as np
 
 # Dynamically add the parent directory (neil/) to sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-import joblib
 from sklearn.model_selection import train_test_split, cross_val_score
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.impute import SimpleImputer
 from sklearn.metrics import accuracy_score, roc_auc_score, classification_report
 from config import NFLConfig
-from utils import training_data_filter
+from utils import training_data_filter, get_partition_versions
+from model_registry import model_registry, model_identity
+from instrumentation import instrumented
+from models.train_model import evaluate_oob
 
 import sqlite3
 
 config = NFLConfig()
 def prepare_features_and_target(df, target_column, conn): 
-    X = df.drop(columns = ['home_team','away_team','outcome'])
+    X = df.drop(columns = ['home_team','away_team','outcome'], errors='ignore')  # Cached matrices have no team columns
     y = df[target_column]
-    X.to_sql("X_training",conn, if_exists = "replace", index = False)
+    if conn is not None:  # Parallel backtest workers train without a connection
+        X.to_sql("X_training",conn, if_exists = "replace", index = False)
     return X,y 
 
-def train_random_forest_model(X_train, y_train):
-    """Train a Random Forest classifier."""
-    model = RandomForestClassifier(random_state=42)
+def train_random_forest_model(X_train, y_train, params=None):
+    """Train a Random Forest classifier. params are RandomForestClassifier arguments (config.RF_PARAMS)."""
+    model = RandomForestClassifier(**(params or {'random_state': 42}))
     model.fit(X_train, y_train)
     return model
 
@@ -38,11 +41,11 @@ def evaluate_model(model, X_test, y_test):
     print(classification_report(y_test, y_pred))
     return accuracy, roc_auc
 
-def cross_validate_model(model, X, y):
-    """Perform cross-validation to check model stability."""
+def cross_validate_model(model, X, y, folds=5, n_jobs=None):
+    """Perform cross-validation to check model stability. Folds are fitted in parallel across n_jobs processes."""
     imputer = SimpleImputer(strategy='mean')
     X_imputed = pd.DataFrame(imputer.fit_transform(X), columns=X.columns)
-    scores = cross_val_score(model, X_imputed, y, cv=5, scoring='accuracy')
+    scores = cross_val_score(model, X_imputed, y, cv=folds, scoring='accuracy', n_jobs=n_jobs)
     print(f"Cross-Validation Accuracy: {scores.mean():.2f}")
     return scores.mean()
 
@@ -56,39 +59,62 @@ def feature_importance(model, feature_names):
     print(importances.head(10))
     return importances
 
+@instrumented("train_random_forest_base.run_classification_pipeline")
 def run_classification_pipeline(df, config,conn):
     target_column = 'outcome'
     # Step 3: Prepare features and target variable
     X, y = prepare_features_and_target(df, target_column,conn)
 
-    # Step 4: Train-test split
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42)
-    # Step 6: Train model
-    model = train_random_forest_model(X_train, y_train)
+    if config.MODEL_EVALUATION == "oob":
+        # Steps 4-7: One fit on every row, evaluated on its out-of-bag predictions
+        model = train_random_forest_model(X, y, dict(config.RF_PARAMS, oob_score=True))
+        evaluate_oob(model, y)
+    else:
+        # Step 4: Train-test split
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42)
+        # Step 6: Train model
+        model = train_random_forest_model(X_train, y_train, config.RF_PARAMS)
 
-    # Step 7: Evaluate model
-    evaluate_model(model, X_test, y_test)
+        # Step 7: Evaluate model
+        evaluate_model(model, X_test, y_test)
 
-    # Step 8: Cross-validation
-    cross_validate_model(model, X, y)
+        # Step 8: Cross-validation
+        cross_validate_model(model, X, y, config.CV_FOLDS, config.CV_N_JOBS)
 
     # Step 9: Feature importance
     feature_importance(model, X.columns)
 
     return model
 
-if __name__ == "__main__":
+def train_registered_model(conn, config):
+    """
+    Trains on the training rows of config.RF_TRAINING_DATA and registers the model as
+    config.MODEL_NAME, unless the registry already has this exact model. With
+    config.INCREMENTAL_RETRAIN the registered forest is updated with the new weeks instead
+    (models/incremental_forest.py).
 
+    Returns:
+        tuple: (model, True if it was trained now)
+    """
+    if config.INCREMENTAL_RETRAIN:
+        from models.incremental_forest import retrain_incremental_model
+        return retrain_incremental_model(conn, config)
 
     # Load data from SQLite
-    with sqlite3.connect(config.DB_PATH) as conn:
-        query = f"SELECT * FROM rf_training_data WHERE {training_data_filter(config)}"
-        merged_data = pd.read_sql_query(query, conn)
+    query = f"SELECT * FROM {config.RF_TRAINING_DATA} WHERE {training_data_filter(config)}"
+    merged_data = pd.read_sql_query(query, conn)
+    partition_versions = get_partition_versions(conn, config.RF_TRAINING_DATA)
+
+    # Run the full model training pipeline, unless the registry already has this exact model
+    registry = model_registry(config)
+    return registry.get_or_train(
+        config.MODEL_NAME, model_identity("models.train_random_forest_base", config, merged_data, partition_versions),
+        lambda: run_classification_pipeline(merged_data, config, conn), merged_data,
+        config.CURRENT_SEASON, config.TARGET_WEEK)
 
-    # Run the full model training pipeline
-    model = run_classification_pipeline(merged_data, config,conn)
+if __name__ == "__main__":
+    with sqlite3.connect(config.DB_PATH) as conn:
+        model, trained = train_registered_model(conn, config)
 
-    # Save trained model
-    model_filename = "random_forest_model.pkl"
-    joblib.dump(model, model_filename)
-    print(f"Model saved as {model_filename}")
+    print(f"Model {'trained and registered' if trained else 'unchanged, reused from the registry'} "
+          f"as '{config.MODEL_NAME}' in {config.MODEL_REGISTRY_DIR}")
@@ -0,0 +1,167 @@
+import sys
+import os
+import json
+import math
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+# Dynamically add the parent directory (neil/) to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import sqlite3
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import log_loss
+from sklearn.model_selection import ParameterGrid
+from config import NFLConfig
+from utils import bulk_write_dataframe
+from feature_cache import FeatureMatrix, training_matrix
+
+config = NFLConfig()
+
+# Set in each worker by init_tuning_worker
+_MATRIX = None
+
+
+def walk_forward_folds(season_week_keys, validation_seasons, fold_weeks):
+    """
+    Splits each validation season into blocks of fold_weeks weeks. Every block is validated
+    on a model trained on all rows before it, so no fold sees a later week.
+
+    Args:
+        season_week_keys (np.ndarray): season * 100 + week of each row, in ascending order.
+
+    Returns:
+        list: (label, train_stop, valid_stop) per fold; training rows are [0, train_stop) and
+            validation rows [train_stop, valid_stop).
+    """
+    folds = []
+    for season in validation_seasons:
+        weeks = np.unique(season_week_keys[season_week_keys // 100 == season] % 100)
+        for i in range(0, len(weeks), fold_weeks):
+            block = weeks[i:i + fold_weeks]
+            train_stop = np.searchsorted(season_week_keys, season * 100 + block[0], side="left")
+            valid_stop = np.searchsorted(season_week_keys, season * 100 + block[-1], side="right")
+            if train_stop > 0:
+                folds.append((f"{season} wk {block[0]}-{block[-1]}", int(train_stop), int(valid_stop)))
+    return folds
+
+
+def init_tuning_worker(matrix_path):
+    """
+    Process pool initializer: maps the cached training matrix (feature_cache.py) once per worker.
+    Every fold is a pair of row ranges into it, so no candidate rebuilds or copies a fold.
+    """
+    global _MATRIX
+    _MATRIX = FeatureMatrix.load(matrix_path)
+
+
+def run_trial(params, fold):
+    """
+    Fits one candidate on one fold's training rows and scores its validation rows.
+    Runs inside a worker process.
+
+    Returns:
+        dict: Log loss, accuracy and fit seconds.
+    """
+    start = time.perf_counter()
+    label, train_stop, valid_stop = fold
+    model = RandomForestClassifier(**params)
+    model.fit(_MATRIX.X[:train_stop], _MATRIX.y[:train_stop])
+    y_valid = _MATRIX.y[train_stop:valid_stop]
+    proba = model.predict_proba(_MATRIX.X[train_stop:valid_stop])
+    return {
+        "fold": label,
+        "log_loss": log_loss(y_valid, proba, labels=model.classes_),
+        "accuracy": float(np.mean(model.classes_[proba.argmax(axis=1)] == y_valid)),
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def successive_halving(executor, candidates, folds, config):
+    """
+    Scores every candidate on every fold with few trees, keeps the best 1/factor by mean
+    log loss and repeats with factor times more trees, until one candidate is left or the
+    tree limit is reached. All (candidate, fold) trials of a rung run concurrently.
+
+    Returns:
+        tuple: (winning parameters, trials DataFrame)
+    """
+    factor = config.TUNING_HALVING_FACTOR
+    n_estimators = config.TUNING_MIN_ESTIMATORS
+    trials, rung = [], 0
+    while True:
+        futures = []
+        for index, candidate in enumerate(candidates):
+            params = dict(config.RF_PARAMS, **candidate, n_estimators=n_estimators, n_jobs=1)
+            futures.extend((index, executor.submit(run_trial, params, fold)) for fold in folds)
+        rung_trials = pd.DataFrame([
+            dict(future.result(), rung=rung, n_estimators=n_estimators, candidate=index,
+                 params=json.dumps(candidates[index], sort_keys=True))
+            for index, future in futures
+        ])
+        trials.append(rung_trials)
+        scores = rung_trials.groupby("candidate")[["log_loss", "accuracy"]].mean().sort_values("log_loss")
+        print(f"🪜 Rung {rung}: {len(candidates)} candidates x {len(folds)} folds with {n_estimators} trees; "
+              f"best log loss {scores['log_loss'].iloc[0]:.4f} ({scores['accuracy'].iloc[0]:.1%} accuracy)")
+
+        if len(candidates) == 1 or n_estimators >= config.TUNING_MAX_ESTIMATORS:
+            best = dict(candidates[scores.index[0]], n_estimators=n_estimators)
+            return best, pd.concat(trials, ignore_index=True)
+        keep = max(1, math.ceil(len(candidates) / factor))
+        candidates = [candidates[i] for i in scores.index[:keep]]
+        n_estimators = min(n_estimators * factor, config.TUNING_MAX_ESTIMATORS)
+        rung += 1
+
+
+def tune_random_forest(conn, validation_seasons=None, fold_weeks=None, max_workers=None, config=config):
+    """
+    Tunes the random forest over config.TUNING_PARAM_GRID with walk-forward folds.
+
+    Returns:
+        tuple: (winning parameters, trials DataFrame)
+    """
+    validation_seasons = sorted(validation_seasons or config.TUNING_VALIDATION_SEASONS)
+    fold_weeks = fold_weeks or config.TUNING_FOLD_WEEKS
+    max_workers = max_workers or config.TUNING_MAX_WORKERS or os.cpu_count()
+    start = time.perf_counter()
+
+    matrix = training_matrix(conn, config)
+    folds = walk_forward_folds(matrix.keys, validation_seasons, fold_weeks)
+    if not folds:
+        raise ValueError(f"No walk-forward folds: no training rows before seasons {validation_seasons}.")
+    candidates = list(ParameterGrid(config.TUNING_PARAM_GRID))
+    print(f"🔧 Tuning {len(candidates)} candidates on {len(folds)} folds ({folds[-1][2]} rows) with {max_workers} workers")
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=init_tuning_worker,
+                             initargs=(matrix.path,)) as executor:
+        best, trials = successive_halving(executor, candidates, folds, config)
+
+    print(f"🏁 Tuned in {time.perf_counter() - start:.2f}s ({len(trials)} trials); best: {best}")
+    return best, trials
+
+
+def save_tuned_params(params, path):
+    """Writes the winning parameters where NFLConfig merges them into RF_PARAMS."""
+    with open(path, "w") as f:
+        json.dump(params, f, indent=2, sort_keys=True)
+    print(f"📁 Tuned parameters saved to {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Walk-forward successive-halving search for the random forest.")
+    parser.add_argument("--seasons", type=int, nargs="+", default=None,
+                        help="Validation seasons (default: config.TUNING_VALIDATION_SEASONS).")
+    parser.add_argument("--fold-weeks", type=int, default=None, help="Weeks per validation fold.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all CPUs).")
+    parser.add_argument("--dry-run", action="store_true", help=f"Do not write {config.RF_PARAMS_PATH}.")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(config.DB_PATH)
+    best, trials = tune_random_forest(conn, args.seasons, args.fold_weeks, args.workers)
+    bulk_write_dataframe(trials, conn, config.TUNING_TRIALS_TABLE, verbose=False)
+    conn.close()
+    if not args.dry_run:
+        save_tuned_params(best, config.RF_PARAMS_PATH)
@@ -0,0 +1,207 @@
+# pipeline.py
+import time
+import sqlite3
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from config import NFLConfig
+from instrumentation import stage
+
+config = NFLConfig()
+
+# Stages in run order; --from-stage/--to-stage select a contiguous range of them
+STAGES = ["import", "transform", "build_sql_tables", "train", "predict"]
+
+
+class PipelineStep:
+    """
+    One unit of work of a stage. run(conn, results) gets its thread's connection and the
+    return values of the upstream steps that ran in this process (a step whose stage was not
+    selected is missing from results, and the step falls back to reading its table).
+    """
+
+    def __init__(self, name, stage, run, upstream=()):
+        self.name = name
+        self.stage = stage
+        self.run = run
+        self.upstream = list(upstream)
+
+    def __repr__(self):
+        return f"PipelineStep({self.stage}:{self.name} <- {self.upstream})"
+
+
+# Each step imports its stage's modules itself, so a run only loads what its stages use
+# (no sklearn for --to-stage build_sql_tables, no nfl_data_py for --from-stage transform).
+
+def import_step(conn, results):
+    from data_import.import_concurrent import import_seasons_concurrently
+    # Only the staging tables: the transform stage rewrites the final tables from them
+    return import_seasons_concurrently(conn, config)
+
+
+def transform_weekly_scores_step(conn, results):
+    from data_transform.transform_weekly_scores import transform_weekly_scores
+    return transform_weekly_scores(conn)
+
+
+def transform_schedules_step(conn, results):
+    from data_transform.transform_schedules import transform_schedules
+    return transform_schedules(conn)
+
+
+def transform_base_model_step(conn, results):
+    from data_transform.transform_base_model import transform_base_model
+    return transform_base_model(conn, results.get("transform_schedules"), results.get("transform_weekly_scores"))
+
+
+def build_sql_tables_step(conn, results):
+    from data_transform.build_sql_tables import build_sql_tables
+    return build_sql_tables(db_path=config.DB_PATH)
+
+
+def train_step(conn, results):
+    from models.train_random_forest_base import train_registered_model
+    model, trained = train_registered_model(conn, config)
+    print(f"Model {'trained and registered' if trained else 'unchanged, reused from the registry'} "
+          f"as '{config.MODEL_NAME}'")
+    return model
+
+
+def predict_step(conn, results):
+    from utils import render_prediction_sql
+    from model_registry import model_registry
+    from models.forest_arrays import compile_forest
+    from prediction.rf_predict_outcomes import run_prediction_pipeline
+    model = results.get("train")
+    if model is None:
+        model = model_registry(config).load_latest(config.MODEL_NAME, compiled=config.USE_COMPILED_FOREST)
+    elif config.USE_COMPILED_FOREST:
+        model = compile_forest(model)  # The model just trained, scored the way the registry would load it
+    return run_prediction_pipeline(conn, model, config, render_prediction_sql(config))
+
+
+# The pandas transforms only feed base_model; the SQL tables, training and prediction read the
+# staging tables, so both branches run side by side once the import is done.
+PIPELINE_STEPS = [
+    PipelineStep("import", "import", import_step),
+    PipelineStep("transform_weekly_scores", "transform", transform_weekly_scores_step, ["import"]),
+    PipelineStep("transform_schedules", "transform", transform_schedules_step, ["import"]),
+    PipelineStep("transform_base_model", "transform", transform_base_model_step,
+                 ["transform_weekly_scores", "transform_schedules"]),
+    PipelineStep("build_sql_tables", "build_sql_tables", build_sql_tables_step, ["import"]),
+    PipelineStep("train", "train", train_step, ["build_sql_tables"]),
+    PipelineStep("predict", "predict", predict_step, ["train"]),
+]
+
+
+class Pipeline:
+    """
+    Runs the weekly refresh (import -> transform -> build_sql_tables -> train -> predict) in one
+    process, replacing the chain of scripts in zarchived/run_full_model.py.
+
+    Libraries are imported and the database is opened once: each worker thread keeps one
+    connection for every step it runs, and steps hand their DataFrames and models to the steps
+    after them instead of re-reading the tables just written. Steps whose upstream steps are
+    done run concurrently on a thread pool; SQLite serializes their writes (WAL plus a busy
+    timeout), while reads, model fitting and the SQL builds overlap.
+    """
+
+    def __init__(self, steps=PIPELINE_STEPS, db_path=None):
+        self.steps = {step.name: step for step in steps}
+        self.db_path = db_path or config.DB_PATH
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+
+    def connection(self):
+        """The calling thread's connection, opened on its first step."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=60, check_same_thread=False)
+            conn.execute("PRAGMA busy_timeout=60000")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self):
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+        self._local = threading.local()
+
+    def selected_steps(self, from_stage=None, to_stage=None):
+        """Names of the steps whose stage lies between from_stage and to_stage, inclusive."""
+        first = STAGES.index(from_stage) if from_stage else 0
+        last = STAGES.index(to_stage) if to_stage else len(STAGES) - 1
+        if first > last:
+            raise ValueError(f"--from-stage {from_stage} comes after --to-stage {to_stage}.")
+        return [name for name, step in self.steps.items() if first <= STAGES.index(step.stage) <= last]
+
+    def run_step(self, name, results):
+        step = self.steps[name]
+        upstream_results = {upstream: results[upstream] for upstream in step.upstream if upstream in results}
+        with stage(f"pipeline:{name}"):
+            return step.run(self.connection(), upstream_results)
+
+    def run(self, from_stage=None, to_stage=None, max_workers=None):
+        """
+        Runs the selected steps; upstream steps outside the selection count as done.
+
+        Args:
+            from_stage (str, optional): First stage to run. Defaults to the first of STAGES.
+            to_stage (str, optional): Last stage to run. Defaults to the last of STAGES.
+            max_workers (int, optional): Concurrent steps. Defaults to config.PIPELINE_MAX_WORKERS.
+
+        Returns:
+            dict: Step name -> its return value.
+        """
+        max_workers = max_workers or config.PIPELINE_MAX_WORKERS
+        selected = self.selected_steps(from_stage, to_stage)
+        print(f"🚦 Running {len(selected)} pipeline steps: {selected}")
+
+        start = time.perf_counter()
+        results, timings = {}, {}
+        pending = list(selected)
+        finished = set(self.steps) - set(selected)
+        running = {}
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pipeline") as executor:
+                while pending or running:
+                    for name in list(pending):
+                        if all(upstream in finished for upstream in self.steps[name].upstream):
+                            pending.remove(name)
+                            running[executor.submit(self.run_step, name, results)] = (name, time.perf_counter())
+                    if not running:
+                        raise RuntimeError(f"Pipeline steps {pending} are waiting on steps that never finished.")
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        name, step_start = running.pop(future)
+                        results[name] = future.result()
+                        timings[name] = time.perf_counter() - step_start
+                        finished.add(name)
+                        print(f"✅ {name} finished in {timings[name]:.2f}s")
+        finally:
+            self.close()
+
+        print(f"🏁 Pipeline finished in {time.perf_counter() - start:.2f}s "
+              f"({sum(timings.values()):.2f}s of step time)")
+        return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run the weekly refresh (import -> transform -> build_sql_tables -> train -> predict) in one process.")
+    parser.add_argument("--from-stage", choices=STAGES, default=None, help="First stage to run (default: import).")
+    parser.add_argument("--to-stage", choices=STAGES, default=None, help="Last stage to run (default: predict).")
+    parser.add_argument("--workers", type=int, default=config.PIPELINE_MAX_WORKERS, help="Concurrent steps.")
+    args = parser.parse_args()
+
+    pipeline = Pipeline()
+    try:
+        pipeline.selected_steps(args.from_stage, args.to_stage)
+    except ValueError as e:
+        parser.error(str(e))
+    pipeline.run(args.from_stage, args.to_stage, args.workers)
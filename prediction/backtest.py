@@ -0,0 +1,198 @@
+import sys
+import os
+import time
+import json
+import argparse
+import importlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Dynamically add the parent directory (neil/) to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import sqlite3
+import pandas as pd
+from config import NFLConfig
+from utils import load_prediction_inputs, upsert_dataframe, delete_keyed_rows
+from prediction import parallel_backtest
+from prediction.parallel_backtest import init_worker
+from feature_cache import training_matrix
+
+config = NFLConfig()
+
+
+def make_config(season, week, overrides=None):
+    """NFLConfig for one backtest job, with the named attributes overridden."""
+    job_config = NFLConfig(target_week=week, training_cutoff_week=week - 1)
+    job_config.CURRENT_SEASON = season
+    for name, value in (overrides or {}).items():
+        if not hasattr(job_config, name):
+            raise ValueError(f"NFLConfig has no attribute '{name}' to override.")
+        setattr(job_config, name, value)
+    return job_config
+
+
+def run_backtest_job(config_name, overrides, pipeline_module, season, week, window, prediction_inputs):
+    """
+    Trains on one slice of the shared training matrix and predicts one (season, week).
+    Runs inside a worker process.
+
+    Returns:
+        dict: Job identifiers, predictions (DataFrame or None), seconds and a skip reason if any.
+    """
+    start = time.perf_counter()
+    result = {"config_name": config_name, "season": season, "week": week, "predictions": None, "skipped": None}
+    training_data = parallel_backtest._TRAINING_MATRIX.frame(window)
+    if training_data.empty:
+        result["skipped"] = "training data empty"
+    elif prediction_inputs.empty:
+        result["skipped"] = "no prediction input data"
+    else:
+        job_config = make_config(season, week, overrides)
+        pipeline = importlib.import_module(pipeline_module)
+        model = pipeline.run_classification_pipeline(training_data, job_config, None)
+        X_pred = prediction_inputs[list(model.feature_names_in_)]
+        classes = list(model.classes_)
+        home_win_probability = model.predict_proba(X_pred)[:, classes.index(1)] if 1 in classes else 0.0
+        result["predictions"] = pd.DataFrame({
+            "config_name": config_name,
+            "season": season,
+            "week": week,
+            "game_id": prediction_inputs["game_id"],
+            "home_team": prediction_inputs["home_team"],
+            "away_team": prediction_inputs["away_team"],
+            "predicted_outcome": model.predict(X_pred),
+            "home_win_probability": home_win_probability,
+            "training_rows": len(training_data),
+        })
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def run_backtest(conn, seasons, weeks=range(1, 23), configs=None, max_workers=None,
+                 pipeline_module="models.train_random_forest_base", output_table=None):
+    """
+    Backtests every (config, season, week) combination in one process pool.
+
+    The training table comes from the feature cache (feature_cache.py) as one memory-mapped
+    matrix in season/week order; each job trains on a contiguous slice of it, so the expanding
+    window is never re-read. Prediction inputs for all seasons come from one query. Results
+    are upserted into one table keyed by (config_name, season, week, game_id), so re-running
+    a config replaces its rows and different configs sit side by side. The rows of every
+    scheduled (config, season, week) are deleted first, so skipped weeks and games no longer
+    predicted do not keep stale rows.
+
+    Args:
+        conn (sqlite3.Connection): SQLite connection object.
+        seasons (list): Seasons to backtest.
+        weeks (iterable): Target weeks per season.
+        configs (dict, optional): config name -> NFLConfig attribute overrides, e.g.
+            {"baseline": {}, "shallow": {"RF_PARAMS": {"max_depth": 6, "random_state": 42}}}.
+            Overrides apply to training; team_features is materialized, so feature-window
+            settings need a SQL rebuild instead.
+        max_workers (int, optional): Process pool size. Defaults to config.BACKTEST_MAX_WORKERS or the CPU count.
+        pipeline_module (str): Module providing run_classification_pipeline(df, config, conn).
+        output_table (str, optional): Defaults to config.BACKTEST_PREDICTIONS_TABLE.
+
+    Returns:
+        pd.DataFrame: All predictions with the actual outcome where the game has been played.
+    """
+    configs = configs or {"baseline": {}}
+    for overrides in configs.values():
+        make_config(seasons[0], 1, overrides)  # Fail on unknown attributes before starting any work
+    max_workers = max_workers or config.BACKTEST_MAX_WORKERS or os.cpu_count()
+    output_table = output_table or config.BACKTEST_PREDICTIONS_TABLE
+    seasons, weeks = sorted(seasons), list(weeks)
+    start = time.perf_counter()
+
+    matrix = training_matrix(conn, config)
+    prediction_inputs = load_prediction_inputs(conn, config, seasons=seasons)
+    print(f"📊 Loaded {len(matrix)} training rows and {len(prediction_inputs)} prediction rows "
+          f"in {time.perf_counter() - start:.2f}s")
+
+    results = []
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker, initargs=(matrix.path,)) as executor:
+        futures = []
+        for season in seasons:
+            season_inputs = prediction_inputs[prediction_inputs['season'] == season]
+            for week in weeks:
+                window = matrix.window(season, week)
+                week_inputs = season_inputs[season_inputs['week'] == week].reset_index(drop=True)
+                for config_name, overrides in configs.items():
+                    futures.append(executor.submit(run_backtest_job, config_name, overrides, pipeline_module,
+                                                   season, week, window, week_inputs))
+        print(f"🗓️ Scheduled {len(futures)} jobs on {max_workers} workers")
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if result["skipped"] is None:
+                print(f"✅ {result['config_name']} {result['season']} week {result['week']} "
+                      f"in {result['seconds']:.2f}s")
+
+    delete_keyed_rows(conn, output_table, ['config_name', 'season', 'week'],
+                      [(r["config_name"], r["season"], r["week"]) for r in results])
+    predictions = [r["predictions"] for r in results if r["predictions"] is not None]
+    skipped = sum(r["skipped"] is not None for r in results)
+    if not predictions:
+        print(f"⚠️ No predictions produced ({skipped} jobs skipped).")
+        return pd.DataFrame()
+    predictions = pd.concat(predictions, ignore_index=True).sort_values(
+        ['config_name', 'season', 'week', 'game_id'], ignore_index=True)
+
+    outcomes = pd.read_sql(
+        f"SELECT game_id, outcome FROM int_schedules WHERE season IN ({', '.join(str(s) for s in seasons)}) "
+        f"AND home_score IS NOT NULL", conn
+    )
+    predictions = predictions.merge(outcomes, on='game_id', how='left')
+    upsert_dataframe(conn, predictions, output_table, config.BACKTEST_PREDICTION_KEYS)
+
+    print(f"🏁 {len(results) - skipped} jobs ({skipped} skipped) in {time.perf_counter() - start:.2f}s; "
+          f"{len(predictions)} predictions written to '{output_table}'.")
+    return predictions
+
+
+def summarize_backtest(predictions):
+    """Accuracy per config and season over the games that have an outcome."""
+    played = predictions.dropna(subset=['outcome'])
+    played = played.assign(correct=(played['predicted_outcome'] == played['outcome']).astype(int))
+    return played.groupby(['config_name', 'season']).agg(games=('correct', 'size'), accuracy=('correct', 'mean'))
+
+
+def parse_range(values):
+    """Expands CLI values such as ["2018-2020", "2024"] to [2018, 2019, 2020, 2024]."""
+    expanded = []
+    for value in values:
+        first, _, last = str(value).partition("-")
+        expanded.extend(range(int(first), int(last or first) + 1))
+    return sorted(set(expanded))
+
+
+def parse_configs(values):
+    """Parses repeated NAME=JSON arguments, e.g. shallow='{"RF_PARAMS": {"max_depth": 6}}'."""
+    configs = {}
+    for value in values or []:
+        name, _, overrides = value.partition("=")
+        configs[name] = json.loads(overrides) if overrides else {}
+    return configs or {"baseline": {}}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Walk-forward backtest over several seasons and model configs.")
+    parser.add_argument("--seasons", nargs="+", default=[str(config.CURRENT_SEASON)],
+                        help="Seasons or ranges, e.g. 2018-2024.")
+    parser.add_argument("--weeks", nargs="+", default=["1-22"], help="Target weeks or ranges (default 1-22).")
+    parser.add_argument("--config", action="append", dest="configs",
+                        help="NAME=JSON of NFLConfig overrides; repeat to compare configs (default: baseline).")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all CPUs).")
+    parser.add_argument("--pipeline", default="models.train_random_forest_base",
+                        help="Module providing run_classification_pipeline.")
+    parser.add_argument("--table", default=config.BACKTEST_PREDICTIONS_TABLE, help="Keyed predictions table.")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(config.DB_PATH)
+    predictions = run_backtest(conn, parse_range(args.seasons), weeks=parse_range(args.weeks),
+                               configs=parse_configs(args.configs), max_workers=args.workers,
+                               pipeline_module=args.pipeline, output_table=args.table)
+    conn.close()
+
+    if not predictions.empty:
+        print(summarize_backtest(predictions).to_string())
@@ -0,0 +1,143 @@
+import sys
+import os
+import time
+import importlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Dynamically add the parent directory (neil/) to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pandas as pd
+from config import NFLConfig
+from utils import bulk_write_dataframe, load_prediction_inputs, get_partition_versions
+from model_registry import model_registry, model_identity
+from feature_cache import FeatureMatrix, training_matrix
+
+config = NFLConfig()
+
+# Set in each worker by init_worker
+_TRAINING_MATRIX = None
+
+
+def init_worker(matrix_path):
+    """Process pool initializer: maps the cached training matrix once per worker."""
+    global _TRAINING_MATRIX
+    _TRAINING_MATRIX = FeatureMatrix.load(matrix_path)
+
+
+def backtest_week(week, season, prediction_inputs, pipeline_module, model_name=None, partition_versions=None):
+    """
+    Trains the model for one target week on the shared training matrix and predicts that week.
+    Runs inside a worker process; nothing is written to the database here.
+
+    With a model_name the model is looked up in the model registry first and only trained
+    (and registered) when no model with the same pipeline, parameters and training data exists.
+
+    Returns:
+        dict: week, predictions (DataFrame or None), seconds and a skip reason if any.
+    """
+    start = time.perf_counter()
+    week_config = NFLConfig(target_week=week, training_cutoff_week=week - 1)
+    week_config.CURRENT_SEASON = season
+    training_data = _TRAINING_MATRIX.frame(_TRAINING_MATRIX.window(season, week))
+    if training_data.empty:
+        return {"week": week, "predictions": None, "seconds": time.perf_counter() - start,
+                "skipped": "training data empty"}
+    if prediction_inputs.empty:
+        return {"week": week, "predictions": None, "seconds": time.perf_counter() - start,
+                "skipped": "no prediction input data"}
+
+    pipeline = importlib.import_module(pipeline_module)
+
+    def train():
+        return pipeline.run_classification_pipeline(training_data, week_config, None)
+
+    if model_name:
+        identity = model_identity(pipeline_module, week_config, training_data, partition_versions)
+        model, trained = model_registry(week_config).get_or_train(model_name, identity, train, training_data,
+                                                                    season, week)
+    else:
+        model, trained = train(), True
+
+    y_pred = model.predict(prediction_inputs[list(model.feature_names_in_)])
+    predictions = pd.DataFrame({
+        "game_id": prediction_inputs["game_id"],
+        "home_team": prediction_inputs["home_team"],
+        "away_team": prediction_inputs["away_team"],
+        "predicted_outcome": y_pred,
+        "week": week
+    })
+    return {"week": week, "predictions": predictions, "seconds": time.perf_counter() - start, "skipped": None,
+            "trained": trained}
+
+
+def run_parallel_backtest(conn, weeks=range(1, 23), season=None, max_workers=None,
+                          pipeline_module="models.train_random_forest_base",
+                          prediction_table="rf_game_predictions_2024", input_table_prefix="rf_prediction_inputs_week_",
+                          model_name="random_forest_base_backtest"):
+    """
+    Walk-forward backtest with one process per target week.
+
+    The training table comes from the feature cache (feature_cache.py), whose memory-mapped
+    matrix every worker maps read-only; prediction inputs for the whole season come from one query.
+    Workers only train and predict. The parent collects their predictions and writes them
+    with one bulk write at the end (after the per-week input tables), so SQLite never sees
+    concurrent writers.
+
+    Args:
+        conn (sqlite3.Connection): SQLite connection object.
+        weeks (iterable): Target weeks to backtest.
+        season (int, optional): Season to backtest. Defaults to config.CURRENT_SEASON.
+        max_workers (int, optional): Process pool size. Defaults to config.BACKTEST_MAX_WORKERS or the CPU count.
+        pipeline_module (str): Module providing run_classification_pipeline(df, config, conn).
+        prediction_table (str): Table the predictions are appended to.
+        input_table_prefix (str, optional): Prefix of the per-week prediction input tables; None skips them.
+        model_name (str, optional): Registry name of the weekly models; None trains without the registry.
+
+    Returns:
+        pd.DataFrame: All predictions, ordered by week.
+    """
+    season = season or config.CURRENT_SEASON
+    max_workers = max_workers or config.BACKTEST_MAX_WORKERS or os.cpu_count()
+    weeks = list(weeks)
+    start = time.perf_counter()
+
+    matrix = training_matrix(conn, config)
+    prediction_inputs = load_prediction_inputs(conn, config, seasons=[season])
+    partition_versions = get_partition_versions(conn, config.RF_TRAINING_DATA)
+    print(f"📊 Loaded {len(matrix)} training rows and {len(prediction_inputs)} prediction rows "
+          f"in {time.perf_counter() - start:.2f}s")
+
+    results = []
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker, initargs=(matrix.path,)) as executor:
+        futures = {}
+        for week in weeks:
+            week_inputs = prediction_inputs[prediction_inputs['week'] == week].reset_index(drop=True)
+            futures[executor.submit(backtest_week, week, season, week_inputs, pipeline_module, model_name,
+                                    partition_versions)] = week
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if result["skipped"]:
+                print(f"⚠️ Skipping Week {result['week']} - {result['skipped']}.")
+            else:
+                action = "trained" if result["trained"] else "reused from the registry"
+                print(f"✅ Week {result['week']} {action} and predicted in {result['seconds']:.2f}s")
+
+    predictions = [r["predictions"] for r in sorted(results, key=lambda r: r["week"]) if r["predictions"] is not None]
+    if not predictions:
+        print("⚠️ No predictions produced.")
+        return pd.DataFrame()
+    predictions = pd.concat(predictions, ignore_index=True)
+
+    # Only the parent writes: the per-week input tables the sequential loop saved, then all predictions at once
+    if input_table_prefix:
+        for week in predictions['week'].unique():
+            week_inputs = prediction_inputs[prediction_inputs['week'] == week]
+            bulk_write_dataframe(week_inputs, conn, f"{input_table_prefix}{week}", verbose=False)
+    bulk_write_dataframe(predictions, conn, prediction_table, if_exists="append")
+
+    slowest = max(r["seconds"] for r in results)
+    print(f"🏁 Backtested {len(predictions['week'].unique())} weeks in {time.perf_counter() - start:.2f}s "
+          f"with {max_workers} workers (slowest week {slowest:.2f}s).")
+    return predictions
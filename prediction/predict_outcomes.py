@@ -5,9 +5,10 @@ import numpy as np
 
 # Dynamically add the parent directory (neil/) to sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-import joblib
 from config import NFLConfig
-from utils import load_existing_nfl_data , prediction_week_filter, training_data_filter
+from model_registry import model_registry
+from instrumentation import instrumented
+from utils import load_existing_nfl_data , prediction_week_filter, training_data_filter, bulk_write_dataframe
 
 import sqlite3
 
@@ -49,9 +50,10 @@ def predict_outcomes(model, X):
 
 def save_predictions_to_sqlite(predictions_df, conn, table_name="game_predictions"):
     """Saves predictions to an SQLite table."""
-    predictions_df.to_sql(table_name, conn, if_exists='append', index=False)
+    bulk_write_dataframe(predictions_df, conn, table_name, if_exists='append')
     print(f"Predictions saved to '{table_name}' table.")
 
+@instrumented("predict_outcomes.run_prediction_pipeline")
 def run_prediction_pipeline(conn, merged_data, model, config):
     training_cutoff_week = config.TRAINING_CUTOFF_WEEK
     target_week = config.TARGET_WEEK
@@ -112,7 +114,7 @@ if __name__ == "__main__":
     conn = sqlite3.connect("nfl_data.db")
     base_model =  load_existing_nfl_data(conn,config.BASE_MODEL_TABLE, training_data_filter(config) )
     # Load the trained model
-    model = joblib.load("random_forest_model.pkl")
+    model = model_registry(config).load_latest(config.BASE_MODEL_NAME, compiled=config.USE_COMPILED_FOREST)
 
     # Run the prediction pipeline
     run_prediction_pipeline(conn, base_model, model, config)
@@ -0,0 +1,236 @@
+import sys
+import os
+import json
+import time
+import asyncio
+import argparse
+from urllib.parse import urlsplit
+
+# Dynamically add the parent directory (neil/) to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import sqlite3
+import numpy as np
+from config import NFLConfig
+from model_registry import model_registry
+from models.forest_arrays import CompiledForest
+from utils import load_prediction_inputs, get_table_versions
+from prediction.rf_predict_outcomes import prediction_features
+
+config = NFLConfig()
+
+STATUS_LINES = {200: "200 OK", 400: "400 Bad Request", 404: "404 Not Found", 503: "503 Service Unavailable"}
+
+
+class PredictionService:
+    """
+    Long-running prediction server for the rf_predict_outcomes pipeline.
+
+    The latest registered model and the prediction inputs of the current season (schedule plus
+    materialized team features) stay in memory, with the features already extracted by
+    prediction_features, so a request is a row lookup and a model call.
+    Requests that arrive within config.PREDICTION_BATCH_WINDOW_MS of each other are scored
+    together in one model call. A watcher polls the registry and the input tables' versions every
+    config.PREDICTION_RELOAD_SECONDS and swaps in a new model or new inputs without a restart.
+
+    Endpoints (HTTP/1.1, JSON):
+        GET /predict/game/{game_id}
+        GET /predict/week/{week}
+        GET /health
+    """
+
+    def __init__(self, config=config):
+        self.config = config
+        self.registry = model_registry(config)
+        self.state = None
+        self.queue = None
+        self.requests_served = 0
+
+    # --- State loading (runs in a worker thread; the event loop only swaps the result in)
+
+    def load_state(self):
+        """
+        Loads the model and/or prediction inputs if either changed since the current state.
+
+        Returns:
+            dict: The new serving state (model, inputs, feature matrix, row lookups), or None if
+                nothing changed.
+        """
+        current = self.state or {}
+        sha = self.registry.latest_sha(self.config.MODEL_NAME)
+        if sha is None:
+            raise FileNotFoundError(f"No '{self.config.MODEL_NAME}' model in the registry; train one first.")
+        with sqlite3.connect(self.config.DB_PATH) as conn:
+            versions = get_table_versions(conn, self.config.PREDICTION_SERVICE_TABLES)
+            if sha == current.get("model_sha") and versions == current.get("input_versions"):
+                return None
+            if versions == current.get("input_versions"):
+                inputs = current["inputs"]
+            else:
+                inputs = load_prediction_inputs(conn, self.config, seasons=[self.config.CURRENT_SEASON])
+        model = current["model"] if sha == current.get("model_sha") else \
+            self.registry.load_artifact(sha, compiled=self.config.USE_COMPILED_FOREST)
+
+        # Features are extracted once per state; requests only gather rows by position
+        features = prediction_features(model, inputs)
+        if isinstance(model, CompiledForest):
+            features = features.to_numpy(dtype="float32")
+        return {
+            "model": model,
+            "model_sha": sha,
+            "inputs": inputs,
+            "input_versions": versions,
+            "features": features,
+            "rows": inputs[["game_id", "home_team", "away_team", "week"]].to_dict("records"),
+            "game_positions": {game_id: i for i, game_id in enumerate(inputs["game_id"])},
+            "week_positions": {int(week): list(positions) for week, positions in inputs.groupby("week").indices.items()},
+        }
+
+    async def watch(self):
+        while True:
+            await asyncio.sleep(self.config.PREDICTION_RELOAD_SECONDS)
+            try:
+                state = await asyncio.to_thread(self.load_state)
+            except Exception as e:
+                print(f"⚠️ Reload failed, still serving the previous state: {e}")
+                continue
+            if state is not None:
+                # Swapped on the event loop thread between batches, so a batch never sees half a reload
+                previous, self.state = self.state, state
+                if state["model_sha"] != previous["model_sha"]:
+                    print(f"🔄 Hot-swapped model {state['model_sha'][:12]}")
+                if state["input_versions"] != previous["input_versions"]:
+                    print(f"🔄 Reloaded {len(state['inputs'])} prediction inputs")
+
+    # --- Batching
+
+    async def predict(self, state, positions):
+        """
+        Queues input rows for the next batch and waits for their predictions. positions index
+        the rows of `state`, which is scored even if a reload swaps in a newer one meanwhile.
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((state, positions, future))
+        return await future
+
+    @staticmethod
+    def score(state, requests):
+        """Scores the (positions, future) requests that share one state with one model call."""
+        positions = np.concatenate([positions for positions, _ in requests])
+        features = state["features"]
+        X = features[positions] if isinstance(features, np.ndarray) else features.iloc[positions]
+        proba = state["model"].predict_proba(X)
+        classes = list(state["model"].classes_)
+        home_win = proba[:, classes.index(1)] if 1 in classes else np.zeros(len(positions))
+        outcomes = state["model"].classes_.take(proba.argmax(axis=1))
+        records = [dict(state["rows"][p], predicted_outcome=int(o), home_win_probability=float(h))
+                   for p, o, h in zip(positions, outcomes, home_win)]
+        start = 0
+        for positions, future in requests:
+            future.set_result(records[start:start + len(positions)])
+            start += len(positions)
+
+    async def batcher(self):
+        window = self.config.PREDICTION_BATCH_WINDOW_MS / 1000
+        while True:
+            batch = [await self.queue.get()]
+            if window:
+                await asyncio.sleep(window)
+            while not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            # Requests resolved against a state that has since been replaced are still scored with it
+            by_state = {}
+            for state, positions, future in batch:
+                by_state.setdefault(id(state), (state, []))[1].append((positions, future))
+            for state, requests in by_state.values():
+                try:
+                    self.score(state, requests)
+                except Exception as e:
+                    for _, future in requests:
+                        if not future.done():
+                            future.set_exception(e)
+
+    # --- HTTP
+
+    async def route(self, method, target):
+        if method != "GET":
+            return 400, {"error": f"{method} is not supported"}
+        url = urlsplit(target)
+        parts = [p for p in url.path.split("/") if p]
+        state = self.state
+        if parts == ["health"]:
+            return 200, {"model": state["model_sha"], "prediction_inputs": len(state["inputs"]),
+                         "input_versions": state["input_versions"], "requests_served": self.requests_served}
+        if len(parts) != 3 or parts[0] != "predict":
+            return 404, {"error": f"unknown path {url.path}"}
+
+        if parts[1] == "game":
+            if parts[2] not in state["game_positions"]:
+                return 404, {"error": f"no prediction inputs for game {parts[2]}"}
+            positions = [state["game_positions"][parts[2]]]
+        elif parts[1] == "week":
+            if not parts[2].isdigit():
+                return 400, {"error": "week must be a number"}
+            positions = state["week_positions"].get(int(parts[2]))
+            if not positions:
+                return 404, {"error": f"no prediction inputs for week {parts[2]}"}
+        else:
+            return 404, {"error": f"unknown path {url.path}"}
+        start = time.perf_counter()
+        predictions = await self.predict(state, positions)
+        return 200, {"season": self.config.CURRENT_SEASON, "predictions": predictions, "model": state["model_sha"],
+                     "milliseconds": round((time.perf_counter() - start) * 1000, 2)}
+
+    async def handle_connection(self, reader, writer):
+        """Serves requests on one keep-alive connection until the client closes it."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass  # Headers are not needed; requests have no body
+                try:
+                    method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                    status, body = await self.route(method, target)
+                except ValueError:
+                    status, body = 400, {"error": "malformed request line"}
+                except Exception as e:
+                    status, body = 503, {"error": str(e)}
+                self.requests_served += 1
+                payload = json.dumps(body, default=lambda o: o.item() if hasattr(o, "item") else str(o)).encode()
+                writer.write(f"HTTP/1.1 {STATUS_LINES[status]}\r\nContent-Type: application/json\r\n"
+                             f"Content-Length: {len(payload)}\r\n\r\n".encode() + payload)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host=None, port=None, socket_path=None):
+        self.state = self.load_state()
+        print(f"📦 Loaded model {self.state['model_sha'][:12]} and {len(self.state['inputs'])} prediction inputs")
+        self.queue = asyncio.Queue()
+        if socket_path:
+            server = await asyncio.start_unix_server(self.handle_connection, path=socket_path)
+            print(f"🚀 Prediction service listening on unix:{socket_path}")
+        else:
+            host = host or self.config.PREDICTION_SERVICE_HOST
+            port = port or self.config.PREDICTION_SERVICE_PORT
+            server = await asyncio.start_server(self.handle_connection, host, port)
+            print(f"🚀 Prediction service listening on http://{host}:{port}")
+        async with server:
+            await asyncio.gather(server.serve_forever(), self.batcher(), self.watch())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve game predictions from memory over HTTP.")
+    parser.add_argument("--host", default=config.PREDICTION_SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=config.PREDICTION_SERVICE_PORT)
+    parser.add_argument("--socket", default=config.PREDICTION_SERVICE_SOCKET, help="Listen on a Unix socket instead.")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(PredictionService().serve(args.host, args.port, args.socket))
+    except KeyboardInterrupt:
+        print("\n👋 Prediction service stopped.")
@@ -4,66 +4,95 @@ import os
 # Dynamically add the parent directory (neil/) to sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+import argparse
 import sqlite3
 import pandas as pd
-import joblib
 from config import NFLConfig
 from models.train_model import run_classification_pipeline
-from predict_outcomes import run_prediction_pipeline
-from utils import load_existing_nfl_data
+from utils import load_prediction_inputs, bulk_write_dataframe, get_partition_versions
+from model_registry import model_registry, model_identity
+from feature_cache import training_matrix
+from prediction.parallel_backtest import run_parallel_backtest
 
-# SQLite connection
-conn = sqlite3.connect(NFLConfig().DB_PATH)
 
-# Create or ensure the predictions table exists
-drop_table_query = "DROP TABLE IF EXISTS game_predictions;"
-create_table_query = """
-CREATE TABLE game_predictions (
-    game_id TEXT,
-    home_team TEXT,
-    away_team TEXT,
-    predicted_outcome INTEGER
-);
-"""
-conn.execute(drop_table_query)
-conn.execute(create_table_query)
-conn.commit()
-
-# Loop through all regular season and playoff weeks
-for week in range(1, 23):  # 18 Regular Season + 4 Playoff Weeks
-    print(f"\n--- Processing Week {week} ---\n")
-    
-    # Dynamically create config with correct week settings
-    config = NFLConfig(target_week=week, training_cutoff_week=week - 1)
+def run_sequential_backtest(conn):
+    """
+    Retrains and predicts every week of the season one after another. The week's games come
+    from utils.load_prediction_inputs, as in --parallel, so both modes write the same rows.
+    """
+    registry = model_registry(NFLConfig())
+    partition_versions = get_partition_versions(conn, NFLConfig().RF_TRAINING_DATA)
+    matrix = training_matrix(conn, NFLConfig())
+    prediction_inputs = load_prediction_inputs(conn, NFLConfig())
+    # Loop through all regular season and playoff weeks
+    for week in range(1, 23):  # 18 Regular Season + 4 Playoff Weeks
+        print(f"\n--- Processing Week {week} ---\n")
     
-    # Load training data
-    if week == 1:
-        query = f"SELECT * FROM {config.RF_TRAINING_DATA} WHERE season == {config.CURRENT_SEASON} - 1 AND week >= 1"
-    else:
-        query = f"SELECT * FROM {config.RF_TRAINING_DATA} WHERE season < {config.CURRENT_SEASON} OR (season == {config.CURRENT_SEASON} AND week <= {config.TRAINING_CUTOFF_WEEK})"
-    training_data = pd.read_sql(query, conn)
+        # Dynamically create config with correct week settings
+        config = NFLConfig(target_week=week, training_cutoff_week=week - 1)
     
-    if training_data.empty:
-        print(f"Skipping Week {week} - Not enough data to train.")
-        continue
+        # Slice training data from the cached matrix (week 1: the previous season; later weeks: every week before)
+        training_data = matrix.frame(matrix.window(config.CURRENT_SEASON, week))
+        week_inputs = prediction_inputs[prediction_inputs['week'] == week].reset_index(drop=True)
     
-    # Retrain the model
-    model = run_classification_pipeline(training_data, config, conn)
-    model_path = f"random_forest_model_week_{week}.pkl"
-    joblib.dump(model, model_path)
-    print(f"Model for Week {week} saved as {model_path}")
+        if training_data.empty:
+            print(f"Skipping Week {week} - Not enough data to train.")
+            continue
+        if week_inputs.empty:
+            print(f"Skipping Week {week} - No prediction input data.")
+            continue
     
-    # Load base data again to ensure it's up to date
-    base_model_data = pd.read_sql(
-    f"SELECT * FROM {config.RF_TRAINING_DATA} WHERE season <= {config.CURRENT_SEASON} AND week <= {week-1}",
-    conn
-)
+        # Retrain the model, or reuse it if the registry has one for the same parameters and training data
+        identity = model_identity("models.train_model", config, training_data, partition_versions)
+        model, trained = registry.get_or_train("train_model_backtest", identity,
+                                               lambda: run_classification_pipeline(training_data, config, conn),
+                                               training_data, config.CURRENT_SEASON, week)
+        print(f"Model for Week {week} {'trained and registered' if trained else 'reused from the registry'}")
     
-    # Run predictions
-    prediction_week_data = base_model_data[base_model_data["week"] <= week]
-    run_prediction_pipeline(conn, prediction_week_data, model, config)
+        # Run predictions
+        predictions = pd.DataFrame({
+            "game_id": week_inputs["game_id"],
+            "home_team": week_inputs["home_team"],
+            "away_team": week_inputs["away_team"],
+            "predicted_outcome": model.predict(week_inputs[list(model.feature_names_in_)]),
+            "week": week
+        })
+        bulk_write_dataframe(predictions, conn, "game_predictions", if_exists="append", verbose=False)
+
+        print(f"Predictions for Week {week} saved to SQLite database")
+
 
-    print(f"Predictions for Week {week} saved to SQLite database")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Walk-forward backtest: retrain and predict each week of the season.")
+    parser.add_argument("--parallel", action="store_true", help="Train and predict the weeks in a process pool.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for --parallel (default: all CPUs).")
+    args = parser.parse_args()
+
+    # SQLite connection
+    conn = sqlite3.connect(NFLConfig().DB_PATH)
+
+    # Create or ensure the predictions table exists
+    drop_table_query = "DROP TABLE IF EXISTS game_predictions;"
+    create_table_query = """
+    CREATE TABLE game_predictions (
+        game_id TEXT,
+        home_team TEXT,
+        away_team TEXT,
+        predicted_outcome INTEGER,
+        week INTEGER
+    );
+    """
+    conn.execute(drop_table_query)
+    conn.execute(create_table_query)
+    conn.commit()
+
+    if args.parallel:
+        # Predictions are collected from the workers and written once
+        run_parallel_backtest(conn, max_workers=args.workers, pipeline_module="models.train_model",
+                              prediction_table="game_predictions", input_table_prefix=None,
+                              model_name="train_model_backtest")
+    else:
+        run_sequential_backtest(conn)
 
-conn.close()
-print("\nCompleted backtesting for all regular season and playoff weeks!")
+    conn.close()
+    print("\nCompleted backtesting for all regular season and playoff weeks!")
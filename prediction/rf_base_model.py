@@ -1,8 +1,8 @@
 import sys
 import os
+import argparse
 import sqlite3
 import pandas as pd
-import joblib
 from sklearn.ensemble import RandomForestClassifier
 
 # Add parent directory for local imports
@@ -11,97 +11,98 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from config import NFLConfig
 from models.train_random_forest_base import run_classification_pipeline
 from utils import (
-    training_data_filter,
-    build_season_week_filter
+    load_prediction_inputs,
+    get_partition_versions
 )
+from model_registry import model_registry, model_identity
+from feature_cache import training_matrix
+from prediction.parallel_backtest import run_parallel_backtest
+
+
+def run_sequential_backtest():
+    """Retrains and predicts each week of the season one after another."""
+    with sqlite3.connect(NFLConfig().DB_PATH) as conn:
+        conn.execute("DROP TABLE IF EXISTS rf_game_predictions_2024")
+        print("🧹 Dropped existing rf_game_predictions_2024 table.")
+
+        # Prediction inputs for every week of the season in one query; each week below takes a slice
+        all_prediction_inputs = load_prediction_inputs(conn, NFLConfig())
+        print(f"📊 Prediction inputs loaded for {all_prediction_inputs['week'].nunique()} weeks: {len(all_prediction_inputs)} records")
+        partition_versions = get_partition_versions(conn, NFLConfig().RF_TRAINING_DATA)
+        # Training rows for every week in one memory-mapped matrix; each week below takes a row range
+        matrix = training_matrix(conn, NFLConfig())
+    registry = model_registry(NFLConfig())
+
+    # --- Main loop: retrain and predict for each week in 2024 season
+    for week in range(1, 23):
+        print(f"\n--- Processing Week {week} ---\n")
+
+        # Set dynamic config for this week's training & prediction
+        config = NFLConfig(target_week=week, training_cutoff_week=week - 1)
+        conn = sqlite3.connect(config.DB_PATH)
+
+        # Step 1: Slice training data (week 1: the previous season; later weeks: every week before this one)
+        training_data = matrix.frame(matrix.window(config.CURRENT_SEASON, week))
+
+        if training_data.empty:
+            print(f"⚠️ Skipping Week {week} - Training data empty.")
+            conn.close()
+            continue
+
+        # Step 2: Train the model, or reuse it if the registry has one for the same parameters and training data
+        identity = model_identity("models.train_random_forest_base", config, training_data, partition_versions)
+        model, trained = registry.get_or_train("random_forest_base_backtest", identity,
+                                               lambda: run_classification_pipeline(training_data, config, conn),
+                                               training_data, config.CURRENT_SEASON, week)
+        print(f"✅ Model for Week {week} {'trained and registered' if trained else 'reused from the registry'}")
+
+        # Step 3: Slice this week's prediction input
+        prediction_week_data = all_prediction_inputs[all_prediction_inputs['week'] == week].reset_index(drop=True)
+
+        if prediction_week_data.empty:
+            print(f"⚠️ Skipping Week {week} - No prediction input data.")
+            conn.close()
+            continue
+
+        print(f"📊 Prediction input loaded: {len(prediction_week_data)} records")
+
+        # ✅ Save prediction input data to week-specific SQL table
+        pred_input_table = f"rf_prediction_inputs_week_{week}"
+        prediction_week_data.to_sql(pred_input_table, conn, if_exists="replace", index=False)
+        print(f"📁 Saved input features to table: {pred_input_table}")
+
+        # Step 4: Predict and save results
+        X_pred = prediction_week_data[config.TRAINING_COLUMNS]
+        y_pred = model.predict(X_pred)
+
+        predictions_df = pd.DataFrame({
+            "game_id": prediction_week_data["game_id"],
+            "home_team": prediction_week_data["home_team"],
+            "away_team": prediction_week_data["away_team"],
+            "predicted_outcome": y_pred,
+            "week": week
+        })
+        prediction_output_table = "rf_game_predictions_2024"
+        predictions_df.to_sql(prediction_output_table, conn, if_exists="append", index=False)
+        print(f"📁 Appended predictions to table: {prediction_output_table}")
 
-def render_prediction_sql(config, sql_file_path=None):
-    """
-    Reads the SQL prediction table template and substitutes dynamic placeholders.
-    """
-    if sql_file_path is None:
-        sql_file_path = os.path.join(os.path.dirname(__file__), "rf_prediction_table.sql")
 
-    with open(sql_file_path, "r", encoding="utf-8") as f:
-        sql_template = f.read()
-
-    season_week_filter = build_season_week_filter(config)
-    query = sql_template.format(
-        season=config.CURRENT_SEASON,
-        target_week=config.TARGET_WEEK,
-        season_week_filter=season_week_filter
-    )
-    return query
-
-with sqlite3.connect(NFLConfig().DB_PATH) as conn:
-    conn.execute("DROP TABLE IF EXISTS rf_game_predictions_2024")
-    print("🧹 Dropped existing rf_game_predictions_2024 table.")
-
-
-# --- Main loop: retrain and predict for each week in 2024 season
-for week in range(1, 23):
-    print(f"\n--- Processing Week {week} ---\n")
-
-    # Set dynamic config for this week's training & prediction
-    config = NFLConfig(target_week=week, training_cutoff_week=week - 1)
-    conn = sqlite3.connect(config.DB_PATH)
-
-    # Step 1: Load training data
-    if week == 1:
-        train_query = f"SELECT * FROM rf_training_data WHERE season = {config.CURRENT_SEASON - 1}"
-    else:
-        train_query = f"SELECT * FROM rf_training_data WHERE {training_data_filter(config)}"
-
-    training_data = pd.read_sql(train_query, conn)
-
-    if training_data.empty:
-        print(f"⚠️ Skipping Week {week} - Training data empty.")
         conn.close()
-        continue
-
-    # Step 2: Train the model
-    model = run_classification_pipeline(training_data, config, conn)
-    model_path = f"random_forest_model_week_{week}.pkl"
-    joblib.dump(model, model_path)
-    print(f"✅ Model for Week {week} saved as {model_path}")
-
-    # Step 3: Build prediction SQL and load input
-    prediction_sql = render_prediction_sql(config)
-    try:
-        prediction_week_data = pd.read_sql_query(prediction_sql, conn)
-    except Exception as e:
-        print(f"❌ Error loading prediction data for Week {week}: {e}")
-        conn.close()
-        continue
-
-    if prediction_week_data.empty:
-        print(f"⚠️ Skipping Week {week} - No prediction input data.")
-        conn.close()
-        continue
-
-    print(f"📊 Prediction input loaded: {len(prediction_week_data)} records")
 
-    # ✅ Save prediction input data to week-specific SQL table
-    pred_input_table = f"rf_prediction_inputs_week_{week}"
-    prediction_week_data.to_sql(pred_input_table, conn, if_exists="replace", index=False)
-    print(f"📁 Saved input features to table: {pred_input_table}")
 
-    # Step 4: Predict and save results
-    X_pred = prediction_week_data[config.TRAINING_COLUMNS]
-    y_pred = model.predict(X_pred)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the random forest over the season.")
+    parser.add_argument("--parallel", action="store_true", help="Train and predict the weeks in a process pool.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for --parallel (default: all CPUs).")
+    args = parser.parse_args()
 
-    predictions_df = pd.DataFrame({
-        "game_id": prediction_week_data["game_id"],
-        "home_team": prediction_week_data["home_team"],
-        "away_team": prediction_week_data["away_team"],
-        "predicted_outcome": y_pred,
-        "week": week
-    })
-    prediction_output_table = "rf_game_predictions_2024"
-    predictions_df.to_sql(prediction_output_table, conn, if_exists="append", index=False)
-    print(f"📁 Appended predictions to table: {prediction_output_table}")
-
-
-    conn.close()
+    if args.parallel:
+        with sqlite3.connect(NFLConfig().DB_PATH) as conn:
+            conn.execute("DROP TABLE IF EXISTS rf_game_predictions_2024")
+            print("🧹 Dropped existing rf_game_predictions_2024 table.")
+            run_parallel_backtest(conn, max_workers=args.workers)
+        conn.close()
+    else:
+        run_sequential_backtest()
 
-print("\n🏁 Completed backtesting for all regular season and playoff weeks!")
+    print("\n🏁 Completed backtesting for all regular season and playoff weeks!")
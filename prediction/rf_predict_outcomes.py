@@ -4,10 +4,12 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 import sqlite3
 import pandas as pd
-import joblib
 from config import NFLConfig
+from model_registry import model_registry
+from instrumentation import instrumented
 from utils import (load_existing_nfl_data, prediction_week_filter,
-                   training_data_filter, build_season_week_filter)
+                   training_data_filter,
+                   bulk_write_dataframe, render_prediction_sql)
 
 # Initialize config
 config = NFLConfig()
@@ -18,9 +20,46 @@ def predict_outcomes(model, X):
 
 def save_predictions_to_sqlite(predictions_df, conn, table_name="rf_game_predictions"):
     """Saves predictions to an SQLite table."""
-    predictions_df.to_sql(table_name, conn, if_exists='append', index=False)
+    bulk_write_dataframe(predictions_df, conn, table_name, if_exists='append')
     print(f"Predictions saved to '{table_name}' table.")
 
+def prediction_features(model, prediction_df):
+    """The model's feature columns of the prediction inputs, in training order."""
+    X_pred = prediction_df.drop(
+        columns=['game_id', 'home_team', 'away_team', 'OUTCOME', 'score_diff', 'game_total_points'],
+        errors='ignore'
+    )
+    if hasattr(model, 'feature_names_in_'):
+        X_pred = X_pred[list(model.feature_names_in_)]
+    return X_pred
+
+def build_predictions(model, prediction_df, week=None, probabilities=False):
+    """
+    Predicts every row of the prediction inputs with one model call.
+
+    Args:
+        week (int, optional): Week column of the output; defaults to the rows' own week.
+        probabilities (bool): If True, adds home_win_probability.
+    """
+    X_pred = prediction_features(model, prediction_df)
+
+    # Run prediction
+    predictions = pd.DataFrame({
+        "game_id": prediction_df["game_id"],
+        "home_team": prediction_df["home_team"],
+        "away_team": prediction_df["away_team"],
+    })
+    if probabilities:
+        proba = model.predict_proba(X_pred)
+        classes = list(model.classes_)
+        predictions["predicted_outcome"] = model.classes_.take(proba.argmax(axis=1))
+        predictions["home_win_probability"] = proba[:, classes.index(1)] if 1 in classes else 0.0
+    else:
+        predictions["predicted_outcome"] = predict_outcomes(model, X_pred)
+    predictions["week"] = week if week is not None else prediction_df["week"]
+    return predictions
+
+@instrumented("rf_predict_outcomes.run_prediction_pipeline")
 def run_prediction_pipeline(conn, model, config, prediction_sql):
     """
     Runs the prediction pipeline using a fully rendered SQL query.
@@ -40,24 +79,7 @@ def run_prediction_pipeline(conn, model, config, prediction_sql):
         print("⚠️ No prediction data found; skipping prediction.")
         return
 
-    # Prepare prediction features
-    X_pred = prediction_df.drop(
-        columns=['game_id', 'home_team', 'away_team', 'OUTCOME', 'score_diff', 'game_total_points'],
-        errors='ignore'
-    )
-    y_true = prediction_df.get("OUTCOME")
-
-    # Run prediction
-    y_pred = predict_outcomes(model, X_pred)
-
-    # Save predictions with metadata
-    predictions_to_save = pd.DataFrame({
-        "game_id": prediction_df["game_id"],
-        "home_team": prediction_df["home_team"],
-        "away_team": prediction_df["away_team"],
-        "predicted_outcome": y_pred,
-        "week": config.TARGET_WEEK
-    })
+    predictions_to_save = build_predictions(model, prediction_df, config.TARGET_WEEK)
 
     save_predictions_to_sqlite(predictions_to_save, conn)
     print("📦 Predictions:")
@@ -69,10 +91,10 @@ if __name__ == "__main__":
     config = NFLConfig()
     conn = sqlite3.connect(config.DB_PATH)
     
-    # Load the trained model (make sure that model file corresponds to the week being predicted)
-    model = joblib.load("random_forest_model.pkl")
+    # Load the most recently registered model (as node arrays when USE_COMPILED_FOREST is set)
+    model = model_registry(config).load_latest(config.MODEL_NAME, compiled=config.USE_COMPILED_FOREST)
     
     # Run the prediction pipeline using dynamic rolling window input
-    run_prediction_pipeline(conn, model, config)
+    run_prediction_pipeline(conn, model, config, render_prediction_sql(config))
     
     conn.close()
@@ -1,30 +1,493 @@
 # data_utils.py
-import pandas as pd
-import nfl_data_py as nfl
+# pandas is imported inside the functions that use it, so SQL-only commands (build_sql_tables,
+# check_query_plans) start without loading it
+import os
+import re
 import sqlite3
+import time
+from contextlib import contextmanager
 from datetime import datetime
 from config import NFLConfig
+from instrumentation import stage, instrumented
 
 config = NFLConfig()
 
-def import_nfl_data(seasons, endpoint, conn, table_name):
+ROW_HASH_COLUMN = "_row_hash"
+
+def ensure_partition_log(conn):
+    """Creates the table that tracks loaded (season, week) partitions per staging table."""
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {config.INGEST_PARTITIONS_TABLE} (
+            table_name TEXT NOT NULL,
+            season INTEGER NOT NULL,
+            week INTEGER NOT NULL,
+            row_count INTEGER,
+            is_complete INTEGER NOT NULL DEFAULT 0,
+            loaded_at TEXT,
+            PRIMARY KEY (table_name, season, week)
+        )
+    """)
+
+
+def load_partition_log(conn, table_name):
+    """
+    Returns the partition log for a staging table as a DataFrame of
+    season, week, row_count and is_complete.
+
+    Tables that were populated before partitions were tracked are bootstrapped from
+    their distinct (season, week) pairs and marked incomplete, so the first
+    incremental run re-fetches them once and records accurate completeness.
+    """
+    import pandas as pd
+    ensure_partition_log(conn)
+    log = pd.read_sql(
+        f"SELECT season, week, row_count, is_complete FROM {config.INGEST_PARTITIONS_TABLE} WHERE table_name = ?",
+        conn, params=(table_name,)
+    )
+    if log.empty and table_exists(conn, table_name):
+        existing = pd.read_sql(f"SELECT season, week, COUNT(*) AS row_count FROM {table_name} GROUP BY season, week", conn)
+        if not existing.empty:
+            existing['is_complete'] = 0
+            conn.executemany(
+                f"INSERT OR IGNORE INTO {config.INGEST_PARTITIONS_TABLE} "
+                "(table_name, season, week, row_count, is_complete, loaded_at) VALUES (?, ?, ?, ?, ?, ?)",
+                [(table_name, int(r.season), int(r.week), int(r.row_count), 0, datetime.now().isoformat())
+                 for r in existing.itertuples(index=False)]
+            )
+            conn.commit()
+            log = existing
+    return log
+
+
+def record_loaded_partitions(conn, table_name, data):
+    """
+    Records the (season, week) partitions contained in a freshly loaded DataFrame.
+
+    A partition is complete once its season is over, or once its week is behind the
+    current week of the current season. Complete partitions are never requested again.
+    """
+    if data.empty:
+        return
+    ensure_partition_log(conn)
+    current_week = calculate_current_week()
+    loaded_at = datetime.now().isoformat()
+    counts = data.groupby(['season', 'week']).size()
+    rows = []
+    for (season, week), row_count in counts.items():
+        is_complete = season < config.CURRENT_SEASON or week < current_week
+        rows.append((table_name, int(season), int(week), int(row_count), int(is_complete), loaded_at))
+    conn.executemany(
+        f"""INSERT INTO {config.INGEST_PARTITIONS_TABLE}
+            (table_name, season, week, row_count, is_complete, loaded_at) VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(table_name, season, week) DO UPDATE SET
+                row_count = excluded.row_count,
+                is_complete = excluded.is_complete,
+                loaded_at = excluded.loaded_at""",
+        rows
+    )
+    conn.commit()
+
+
+def seasons_to_import(conn, table_name, seasons):
+    """
+    Returns the subset of seasons that still have open partitions for a staging table.
+
+    A season is open if it is the current season, has never been loaded, or has any
+    partition that was not complete when it was loaded.
+    """
+    log = load_partition_log(conn, table_name)
+    open_seasons = []
+    for season in seasons:
+        season_log = log[log['season'] == season]
+        if season >= config.CURRENT_SEASON or season_log.empty or not season_log['is_complete'].all():
+            open_seasons.append(season)
+    return open_seasons
+
+
+def table_exists(conn, table_name):
+    """Returns True if the table exists in the SQLite database."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table_name,))
+    return cursor.fetchone() is not None
+
+
+def ensure_table_versions(conn):
+    """Creates the table that records a version counter per data table."""
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {config.TABLE_VERSIONS_TABLE} (
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL,
+            updated_at TEXT,
+            base_version INTEGER
+        )
+    """)
+    columns = [row[1] for row in conn.execute(f"PRAGMA table_info({config.TABLE_VERSIONS_TABLE})")]
+    if 'base_version' not in columns:
+        # Databases created before partition tracking; NULL means every partition is at the table version
+        conn.execute(f"ALTER TABLE {config.TABLE_VERSIONS_TABLE} ADD COLUMN base_version INTEGER")
+
+
+def ensure_partition_versions(conn):
+    """Creates the table that records the table version at which each (season, week) partition last changed."""
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {config.PARTITION_VERSIONS_TABLE} (
+            table_name TEXT NOT NULL,
+            season INTEGER NOT NULL,
+            week INTEGER NOT NULL,
+            version INTEGER NOT NULL,
+            PRIMARY KEY (table_name, season, week)
+        )
+    """)
+
+
+def bump_table_version(conn, table_name, partitions=None):
+    """
+    Increments the version of a table after its contents changed and commits.
+    Downstream SQL models compare these versions to decide whether to rebuild.
+
+    Args:
+        partitions (iterable, optional): (season, week) pairs that changed. Writers that know
+            exactly which partitions they touched pass them so incremental models can rebuild
+            just those. When omitted the whole table is treated as rewritten.
+
+    Returns:
+        int: The new version.
+    """
+    ensure_table_versions(conn)
+    ensure_partition_versions(conn)
+    conn.execute(
+        f"""INSERT INTO {config.TABLE_VERSIONS_TABLE} (table_name, version, updated_at) VALUES (?, 1, ?)
+            ON CONFLICT(table_name) DO UPDATE SET version = version + 1, updated_at = excluded.updated_at""",
+        (table_name, datetime.now().isoformat())
+    )
+    version = conn.execute(f"SELECT version FROM {config.TABLE_VERSIONS_TABLE} WHERE table_name = ?",
+                           (table_name,)).fetchone()[0]
+    if partitions is None:
+        # Every partition is now at this version; per-partition history is superseded
+        conn.execute(f"UPDATE {config.TABLE_VERSIONS_TABLE} SET base_version = version WHERE table_name = ?",
+                     (table_name,))
+        conn.execute(f"DELETE FROM {config.PARTITION_VERSIONS_TABLE} WHERE table_name = ?", (table_name,))
+    else:
+        conn.executemany(
+            f"INSERT OR REPLACE INTO {config.PARTITION_VERSIONS_TABLE} (table_name, season, week, version) VALUES (?, ?, ?, ?)",
+            [(table_name, int(season), int(week), version) for season, week in partitions]
+        )
+    conn.commit()
+    return version
+
+
+def get_partition_versions(conn, table_name):
+    """
+    Returns the version at which each (season, week) partition of a table last changed.
+
+    Returns:
+        tuple: (base_version, {(season, week): version}). Partitions missing from the dict are at
+        base_version, the version of the last whole-table write. None if the table is untracked.
+    """
+    ensure_table_versions(conn)
+    ensure_partition_versions(conn)
+    row = conn.execute(f"SELECT version, base_version FROM {config.TABLE_VERSIONS_TABLE} WHERE table_name = ?",
+                       (table_name,)).fetchone()
+    if row is None:
+        return None
+    base_version = row[1] if row[1] is not None else row[0]
+    rows = conn.execute(
+        f"SELECT season, week, version FROM {config.PARTITION_VERSIONS_TABLE} WHERE table_name = ?", (table_name,)
+    ).fetchall()
+    return base_version, {(season, week): version for season, week, version in rows}
+
+
+def get_table_versions(conn, table_names):
+    """Returns {table_name: version} for the given tables; untracked tables map to None."""
+    ensure_table_versions(conn)
+    rows = dict(conn.execute(f"SELECT table_name, version FROM {config.TABLE_VERSIONS_TABLE}").fetchall())
+    return {table_name: rows.get(table_name) for table_name in table_names}
+
+
+def sqlite_column_type(dtype):
+    """Maps a pandas dtype to an SQLite column type."""
+    import pandas as pd
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(dtype):
+        return "REAL"
+    return "TEXT"
+
+
+def sqlite_rows(data):
+    """Converts a DataFrame into a list of tuples SQLite can bind (no numpy scalars, NaN as NULL)."""
+    import pandas as pd
+    values = []
+    for column in data.columns:
+        series = data[column]
+        if pd.api.types.is_float_dtype(series):
+            # SQLite stores a bound NaN as NULL, so float columns skip the per-value check
+            values.append(series.to_numpy(dtype='float64').tolist())
+            continue
+        if pd.api.types.is_datetime64_any_dtype(series):
+            series = series.astype(str)
+        values.append(series.astype(object).where(series.notna(), None).tolist())
+    return list(zip(*values))
+
+
+def table_columns(conn, table_name):
+    """Returns (column names, primary key columns) of an SQLite table."""
+    info = conn.execute(f'PRAGMA table_info("{table_name}")').fetchall()
+    columns = [row[1] for row in info]
+    primary_key = [row[1] for row in sorted(info, key=lambda row: row[5]) if row[5] > 0]
+    return columns, primary_key
+
+
+def row_fingerprints(data):
+    """
+    Returns a 64-bit fingerprint of every row's values, stored as signed SQLite INTEGERs.
+
+    Columns are hashed in name order so the fingerprint does not depend on column order.
+    """
+    import pandas as pd
+    values = data[sorted(c for c in data.columns if c != ROW_HASH_COLUMN)]
+    return pd.util.hash_pandas_object(values, index=False).astype('int64')
+
+
+def ensure_keyed_table(conn, table_name, column_types, key_columns):
+    """
+    Creates table_name with a primary key on key_columns and a row fingerprint column.
+
+    Args:
+        column_types (dict): Column name -> SQLite type, in table order.
+
+    Existing tables without the primary key are rebuilt in place (duplicates collapse to the
+    last row per key), and columns that are missing from the table are added.
+    Tables that do not even contain the key columns (e.g. replaced by a transform) are
+    recreated empty.
+    """
+    columns = [c for c in column_types if c != ROW_HASH_COLUMN]
+    column_defs = ", ".join(f'"{c}" {column_types[c]}' for c in columns)
+    key_list = ", ".join(f'"{c}"' for c in key_columns)
+    create_sql = (f'CREATE TABLE "{{name}}" ({column_defs}, "{ROW_HASH_COLUMN}" INTEGER, '
+                  f'PRIMARY KEY ({key_list}))')
+
+    def ensure_partition_index():
+        # Partition-incremental SQL models read these tables one (season, week) at a time
+        if 'season' in columns and 'week' in columns:
+            conn.execute(f'CREATE INDEX IF NOT EXISTS "idx_{table_name}_season_week" ON "{table_name}" (season, week)')
+
+    if not table_exists(conn, table_name):
+        conn.execute(create_sql.format(name=table_name))
+        ensure_partition_index()
+        return
+
+    existing_columns, primary_key = table_columns(conn, table_name)
+    if primary_key == list(key_columns) and ROW_HASH_COLUMN in existing_columns:
+        for column in columns:
+            if column not in existing_columns:
+                conn.execute(f'ALTER TABLE "{table_name}" ADD COLUMN "{column}" {column_types[column]}')
+        ensure_partition_index()
+        return
+
+    print(f"Rebuilding {table_name} with primary key ({', '.join(key_columns)}).")
+    keyed_name = f"{table_name}__keyed"
+    conn.execute(f'DROP TABLE IF EXISTS "{keyed_name}"')
+    conn.execute(create_sql.format(name=keyed_name))
+    if all(c in existing_columns for c in key_columns):
+        shared = ", ".join(f'"{c}"' for c in columns if c in existing_columns)
+        conn.execute(f'INSERT OR REPLACE INTO "{keyed_name}" ({shared}) SELECT {shared} FROM "{table_name}"')
+    conn.execute(f'DROP TABLE "{table_name}"')
+    conn.execute(f'ALTER TABLE "{keyed_name}" RENAME TO "{table_name}"')
+    ensure_partition_index()
+    conn.commit()
+
+
+def upsert_dataframe(conn, data, table_name, key_columns):
+    """
+    Writes only the new or changed rows of a DataFrame into a keyed table.
+
+    Each row is fingerprinted; rows whose key already exists with the same fingerprint
+    are skipped, the rest are written with INSERT ... ON CONFLICT DO UPDATE.
+
+    Returns:
+        pd.DataFrame: The rows that were inserted or updated.
+    """
+    import pandas as pd
+    if data.empty:
+        return data
+    data = data.drop_duplicates(subset=key_columns, keep='last').reset_index(drop=True)
+    data[ROW_HASH_COLUMN] = row_fingerprints(data)
+    column_types = {c: sqlite_column_type(data[c].dtype) for c in data.columns}
+    ensure_keyed_table(conn, table_name, column_types, key_columns)
+
+    # Only pull keys and fingerprints, and only for the seasons being written
+    query = f'SELECT {", ".join(key_columns)}, COALESCE({ROW_HASH_COLUMN}, 0) AS _existing_hash FROM "{table_name}"'
+    params = ()
+    if 'season' in data.columns:
+        seasons = sorted(int(s) for s in data['season'].dropna().unique())
+        query += f" WHERE season IN ({', '.join('?' for _ in seasons)})"
+        params = tuple(seasons)
+    existing = pd.read_sql(query, conn, params=params)
+
+    if not existing.empty:
+        for column in key_columns:
+            existing[column] = existing[column].astype(data[column].dtype)
+        merged = data.merge(existing, on=key_columns, how='left')
+        changed = data[(merged['_existing_hash'] != merged[ROW_HASH_COLUMN]).to_numpy()]
+    else:
+        changed = data
+
+    if changed.empty:
+        return changed
+
+    columns = list(changed.columns)
+    column_list = ", ".join(f'"{c}"' for c in columns)
+    placeholders = ", ".join("?" for _ in columns)
+    updates = ", ".join(f'"{c}" = excluded."{c}"' for c in columns if c not in key_columns)
+    conn.executemany(
+        f'INSERT INTO "{table_name}" ({column_list}) VALUES ({placeholders}) '
+        f'ON CONFLICT({", ".join(key_columns)}) DO UPDATE SET {updates}',
+        sqlite_rows(changed)
+    )
+    conn.commit()
+    partitions = None
+    if 'season' in changed.columns and 'week' in changed.columns:
+        partitions = changed[['season', 'week']].drop_duplicates().itertuples(index=False, name=None)
+    bump_table_version(conn, table_name, partitions)
+    return changed
+
+
+def delete_keyed_rows(conn, table_name, key_columns, keys):
+    """
+    Deletes the rows of a keyed table whose key_columns equal one of keys, e.g. every
+    (config_name, season, week) a backtest run scheduled. Upserting alone never removes rows,
+    so a game or week the run no longer predicts would otherwise keep its old prediction.
+
+    Returns:
+        int: Rows deleted.
+    """
+    keys = [tuple(key) for key in keys]
+    if not keys or not table_exists(conn, table_name):
+        return 0
+    condition = " AND ".join(f'"{c}" = ?' for c in key_columns)
+    deleted = conn.executemany(f'DELETE FROM "{table_name}" WHERE {condition}', keys).rowcount
+    conn.commit()
+    if deleted:
+        partitions = None
+        if 'season' in key_columns and 'week' in key_columns:
+            season, week = key_columns.index('season'), key_columns.index('week')
+            partitions = {(key[season], key[week]) for key in keys}
+        bump_table_version(conn, table_name, partitions)
+    return deleted
+
+
+def sync_keyed_table(conn, source_table, target_table, key_columns):
+    """
+    Copies new or changed rows from a keyed staging table into a keyed final table.
+
+    The comparison runs entirely inside SQLite: a row is written only when the target has
+    no row with the same key and fingerprint.
+
+    Returns:
+        int: Number of rows written.
+    """
+    info = conn.execute(f'PRAGMA table_info("{source_table}")').fetchall()
+    column_types = {row[1]: row[2] or "TEXT" for row in info}
+    columns = list(column_types)
+    ensure_keyed_table(conn, target_table, column_types, key_columns)
+
+    column_list = ", ".join(f'"{c}"' for c in columns)
+    select_list = ", ".join(f's."{c}"' for c in columns)
+    key_match = " AND ".join(f't."{c}" = s."{c}"' for c in key_columns)
+    updates = ", ".join(f'"{c}" = excluded."{c}"' for c in columns if c not in key_columns)
+    cursor = conn.execute(
+        f'INSERT INTO "{target_table}" ({column_list}) '
+        f'SELECT {select_list} FROM "{source_table}" AS s '
+        f'WHERE NOT EXISTS (SELECT 1 FROM "{target_table}" AS t WHERE {key_match} AND t."{ROW_HASH_COLUMN}" IS s."{ROW_HASH_COLUMN}") '
+        f'ON CONFLICT({", ".join(key_columns)}) DO UPDATE SET {updates}'
+    )
+    conn.commit()
+    if cursor.rowcount:
+        bump_table_version(conn, target_table)
+    print(f"Synced {cursor.rowcount} new or changed rows from {source_table} into {target_table}.")
+    return cursor.rowcount
+
+
+def import_nfl_data_incremental(seasons, endpoint, conn, table_name):
+    """
+    Imports only the seasons that still have open (season, week) partitions.
+
+    Returns:
+        pd.DataFrame: The DataFrame of rows written to the table.
+    """
+    import pandas as pd
+    open_seasons = seasons_to_import(conn, table_name, seasons)
+    if not open_seasons:
+        print(f"All partitions of {table_name} are complete. Nothing to import.")
+        return pd.DataFrame()
+
+    print(f"Importing {len(open_seasons)} of {len(seasons)} seasons into {table_name}: {open_seasons}")
+    new_data = endpoint(open_seasons)
+    return write_open_partitions(conn, table_name, new_data)
+
+
+def write_open_partitions(conn, table_name, new_data):
+    """
+    Writes freshly fetched rows into a staging table, partition by partition.
+
+    Rows for partitions that are already complete are dropped and the partition log is
+    updated. Keyed tables (config.TABLE_KEYS) receive an upsert of new or changed rows only;
+    other tables have their open partitions replaced with the fresh rows.
+
+    Returns:
+        pd.DataFrame: The DataFrame of rows written to the table.
+    """
+    log = load_partition_log(conn, table_name)
+    complete = log.loc[log['is_complete'] == 1, ['season', 'week']]
+    if not complete.empty and not new_data.empty:
+        new_data = new_data.merge(complete, on=['season', 'week'], how='left', indicator=True)
+        new_data = new_data[new_data['_merge'] == 'left_only'].drop(columns=['_merge'])
+
+    if new_data.empty:
+        print("No new data to add.")
+        return new_data
+
+    key_columns = config.TABLE_KEYS.get(table_name)
+    if key_columns:
+        written = upsert_dataframe(conn, new_data, table_name, key_columns)
+    else:
+        if table_exists(conn, table_name):
+            partitions = new_data[['season', 'week']].drop_duplicates()
+            conn.executemany(
+                f"DELETE FROM {table_name} WHERE season = ? AND week = ?",
+                [(int(r.season), int(r.week)) for r in partitions.itertuples(index=False)]
+            )
+        bulk_write_dataframe(new_data, conn, table_name, if_exists='append')
+        written = new_data
+
+    record_loaded_partitions(conn, table_name, new_data)
+    print(f"Wrote {len(written)} of {len(new_data)} fetched records across {new_data[['season', 'week']].drop_duplicates().shape[0]} partitions to {table_name}.")
+    return written
+
+
+def import_nfl_data(seasons, endpoint, conn, table_name, incremental=None):
     """
     Imports weekly NFL data for the specified endpoint and saves it to an SQLite table.
-    
+
     Args:
         seasons (list): List of NFL seasons to import.
         endpoint (function): NFL API function to call (e.g., nfl.import_weekly_data).
         conn (sqlite3.Connection): SQLite connection object.
         table_name (str): Name of the SQLite table to store data.
-        
+        incremental (bool, optional): Only request seasons with open partitions.
+            Defaults to config.INCREMENTAL_IMPORT.
+
     Returns:
         pd.DataFrame: The DataFrame of imported NFL data.
     """
-    cursor = conn.cursor()
-    cursor.execute(f"SELECT name FROM sqlite_master WHERE type='table' AND name='{table_name}'")
-    table_exists = cursor.fetchone() is not None
+    import pandas as pd
+    if incremental is None:
+        incremental = config.INCREMENTAL_IMPORT
+    if incremental:
+        return import_nfl_data_incremental(seasons, endpoint, conn, table_name)
 
-    if table_exists:
+    if table_exists(conn, table_name):
         existing_data = pd.read_sql(f"SELECT DISTINCT season, week FROM {table_name}", conn)
         new_data = endpoint(seasons)
         new_data = new_data.merge(existing_data, on=['season', 'week'], how='left', indicator=True)
@@ -46,13 +509,117 @@ def calculate_current_week():
     days_difference = (today - config.SEASON_START_DATE).days
     return max(1, (days_difference // 7) + (1 if days_difference % 7 else 0))
 
+def configure_bulk_pragmas(conn):
+    """
+    Tunes a connection for bulk loads: WAL journal, a large page cache and in-memory
+    temp storage. WAL is persistent for the database file; the others last for the connection.
+    """
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(f"PRAGMA cache_size=-{config.SQLITE_CACHE_SIZE_KB}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+
+
+@contextmanager
+def bulk_load_session(conn):
+    """
+    Applies the bulk-load pragmas and relaxes synchronous for the duration of a load.
+
+    synchronous=OFF is only safe because the whole load runs in one transaction that can be
+    replayed from the source; the previous setting is restored afterwards.
+    """
+    if conn.in_transaction:
+        conn.commit()
+    previous_synchronous = conn.execute("PRAGMA synchronous").fetchone()[0]
+    configure_bulk_pragmas(conn)
+    conn.execute("PRAGMA synchronous=OFF")
+    try:
+        yield conn
+    finally:
+        conn.execute(f"PRAGMA synchronous={previous_synchronous}")
+
+
+def bulk_write_dataframe(data, conn, table_name, if_exists='replace', chunk_size=None, verbose=True):
+    """
+    Writes a DataFrame to SQLite with chunked executemany inside one explicit transaction.
+
+    Args:
+        data (pd.DataFrame): Data to write.
+        conn (sqlite3.Connection): SQLite connection object.
+        table_name (str): Target table.
+        if_exists (str): "replace", "append" or "fail", as in DataFrame.to_sql.
+        chunk_size (int, optional): Rows per executemany batch. Defaults to config.BULK_CHUNK_SIZE.
+        verbose (bool): If True, prints rows written and rows per second.
+
+    Returns:
+        int: Number of rows written.
+    """
+    if if_exists not in ('replace', 'append', 'fail'):
+        raise ValueError(f"'{if_exists}' is not valid for if_exists")
+    chunk_size = chunk_size or config.BULK_CHUNK_SIZE
+    start = time.perf_counter()
+
+    columns = list(data.columns)
+    column_defs = ", ".join(f'"{c}" {sqlite_column_type(data[c].dtype)}' for c in columns)
+    column_list = ", ".join(f'"{c}"' for c in columns)
+    placeholders = ", ".join("?" for _ in columns)
+    insert_sql = f'INSERT INTO "{table_name}" ({column_list}) VALUES ({placeholders})'
+
+    with bulk_load_session(conn):
+        exists = table_exists(conn, table_name)
+        if exists and if_exists == 'fail':
+            raise ValueError(f"Table '{table_name}' already exists.")
+        conn.execute("BEGIN")
+        try:
+            if exists and if_exists == 'replace':
+                conn.execute(f'DROP TABLE "{table_name}"')
+            if not exists or if_exists == 'replace':
+                conn.execute(f'CREATE TABLE "{table_name}" ({column_defs})')
+            for chunk_start in range(0, len(data), chunk_size):
+                conn.executemany(insert_sql, sqlite_rows(data.iloc[chunk_start:chunk_start + chunk_size]))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    bump_table_version(conn, table_name)
+
+    elapsed = time.perf_counter() - start
+    if verbose:
+        rate = len(data) / elapsed if elapsed > 0 else float('inf')
+        print(f"Wrote {len(data)} rows to {table_name} in {elapsed:.2f}s ({rate:,.0f} rows/s).")
+    return len(data)
+
+
 def load_to_sqlite(data, conn, table_name):
     """Loads the DataFrame into an SQLite table."""
-    data.to_sql(table_name, conn, if_exists='replace', index=False)
+    bulk_write_dataframe(data, conn, table_name, if_exists='replace')
     print(f"Data successfully loaded into {table_name} table.")
 
 
-def load_existing_nfl_data(conn, table_name, where_clause=None):
+def apply_table_dtypes(data, table_name):
+    """
+    Casts a frame read from table_name to the compact dtypes declared in config.TABLE_DTYPES:
+    listed columns to their dtype, every other float column to config.COMPACT_FLOAT_DTYPE.
+    A column whose values do not fit its dtype (e.g. NULLs in an integer column) keeps its
+    pandas default. Frames of tables without a schema are returned unchanged.
+    """
+    import pandas as pd
+    schema = config.TABLE_DTYPES.get(table_name)
+    if not schema:
+        return data
+    for column in data.columns:
+        dtype = schema.get(column)
+        if dtype is None and pd.api.types.is_float_dtype(data[column]):
+            dtype = config.COMPACT_FLOAT_DTYPE
+        if dtype is None or data[column].dtype == dtype:
+            continue
+        try:
+            data[column] = data[column].astype(dtype)
+        except (TypeError, ValueError):
+            pass
+    return data
+
+
+def load_existing_nfl_data(conn, table_name, where_clause=None, compact=None):
     """
     Loads existing NFL weekly data from SQLite with an optional WHERE clause.
 
@@ -60,16 +627,21 @@ def load_existing_nfl_data(conn, table_name, where_clause=None):
         conn (sqlite3.Connection): SQLite connection object.
         table_name (str): Name of the SQLite table to read from.
         where_clause (str, optional): Optional WHERE clause (e.g., "season = 2024").
+        compact (bool, optional): Cast to the table's compact dtypes (see apply_table_dtypes).
+            Defaults to config.COMPACT_DTYPES.
 
     Returns:
         pd.DataFrame: The DataFrame of existing NFL weekly data.
     """
+    import pandas as pd
+    compact = config.COMPACT_DTYPES if compact is None else compact
     try:
         query = f"SELECT * FROM {table_name}"
         if where_clause:
             query += f" WHERE {where_clause}"
 
-        return pd.read_sql(query, conn)
+        data = pd.read_sql(query, conn)
+        return apply_table_dtypes(data, table_name) if compact else data
     except Exception as e:
         print(f"Error loading data from {table_name}: {e}")
         return pd.DataFrame()
@@ -94,6 +666,7 @@ def schedule_filter(config):
     return f"season <= {config.CURRENT_SEASON} & week <= {calculate_current_week()}"
 
 
+@instrumented()
 def import_data(conn, table_name, endpoint=None, final_table=None):
     """
     General function to import NFL data and save it into SQLite.
@@ -105,22 +678,27 @@ def import_data(conn, table_name, endpoint=None, final_table=None):
         final_table (str, optional): Name of the final table to store data (if different from table_name).
     
     Returns:
-        pd.DataFrame: The DataFrame of imported NFL data.
+        pd.DataFrame: The DataFrame of NFL data imported in this run.
     """
-    cursor = conn.cursor()
-    cursor.execute(f"SELECT name FROM sqlite_master WHERE type='table' AND name='{table_name}'")
-    table_exists = cursor.fetchone() is not None
+    key_columns = config.TABLE_KEYS.get(table_name)
 
-    if not table_exists:
+    if not table_exists(conn, table_name):
         print(f"Table {table_name} does not exist. Creating it now...")
         data = import_nfl_data(config.SEASONS, endpoint, conn, table_name) if endpoint else import_nfl_data(config.SEASONS, conn, table_name)
+    elif endpoint and config.INCREMENTAL_IMPORT:
+        # Refresh open partitions only; complete seasons are never requested again
+        data = import_nfl_data(config.SEASONS, endpoint, conn, table_name)
     else:
         data = load_existing_nfl_data(conn, table_name)
         if data.empty:
             print(f"No existing data found for {table_name}. Importing new data...")
             data = import_nfl_data(config.SEASONS, endpoint, conn, table_name) if endpoint else import_nfl_data(config.SEASONS, conn, table_name)
 
-    load_to_sqlite(data, conn, final_table or table_name)
+    if final_table and key_columns:
+        # Only new or changed rows are copied; fingerprints are compared inside SQLite
+        sync_keyed_table(conn, table_name, final_table, key_columns)
+    else:
+        load_to_sqlite(load_existing_nfl_data(conn, table_name), conn, final_table or table_name)
 
     if final_table:
         print(f"Data imported successfully into {final_table} (up to week {calculate_current_week()} of {config.CURRENT_SEASON})")
@@ -128,7 +706,194 @@ def import_data(conn, table_name, endpoint=None, final_table=None):
     return data
 
 
-def run_sql_file_and_save_to_table(conn, sql_file_path, output_table_name, if_exists="replace", verbose=True):
+def read_sql_file(sql_file_path):
+    """Reads a SQL model file and strips the trailing semicolon so it can be embedded."""
+    with open(sql_file_path, "r", encoding="utf-8") as file:
+        return file.read().strip().rstrip(";").strip()
+
+
+def materialize_query(conn, query, output_table_name, if_exists="replace"):
+    """
+    Materializes a SELECT entirely inside SQLite, without pulling rows into Python.
+
+    "replace" builds the result with CREATE TABLE ... AS SELECT into a scratch table and swaps
+    it in within one transaction, so readers never see a missing or half-built table.
+    "append" runs INSERT INTO ... SELECT (creating the table if needed).
+
+    Returns:
+        int: Number of rows in the output table.
+    """
+    if if_exists not in ('replace', 'append', 'fail'):
+        raise ValueError(f"'{if_exists}' is not valid for if_exists")
+    exists = table_exists(conn, output_table_name)
+    if exists and if_exists == 'fail':
+        raise ValueError(f"Table '{output_table_name}' already exists.")
+
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN IMMEDIATE")  # Take the write lock up front so a concurrent commit cannot invalidate the read
+    try:
+        if exists and if_exists == 'append':
+            conn.execute(f'INSERT INTO main."{output_table_name}" {query}')
+        else:
+            scratch_table = f"{output_table_name}__build"
+            conn.execute(f'DROP TABLE IF EXISTS main."{scratch_table}"')
+            conn.execute(f'CREATE TABLE main."{scratch_table}" AS {query}')
+            conn.execute(f'DROP TABLE IF EXISTS main."{output_table_name}"')
+            conn.execute(f'ALTER TABLE main."{scratch_table}" RENAME TO "{output_table_name}"')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    bump_table_version(conn, output_table_name)
+    return conn.execute(f'SELECT COUNT(*) FROM main."{output_table_name}"').fetchone()[0]
+
+
+INDEX_DIRECTIVE = re.compile(r"^\s*--\s*index:\s*(.+?)\s*$", re.MULTILINE | re.IGNORECASE)
+
+SQL_KEYWORDS = {
+    'on', 'where', 'group', 'order', 'left', 'right', 'inner', 'outer', 'cross', 'join', 'union',
+    'using', 'limit', 'having', 'natural', 'full', 'window', 'select', 'as',
+}
+
+
+def parse_model_directive(sql_text, name, default=None):
+    """
+    Returns the value of a "-- name: value" directive in a SQL model file, e.g.
+    "-- materialized: incremental" or "-- partition_by: season, week".
+    """
+    match = re.search(rf"^\s*--\s*{name}:\s*(.+?)\s*$", sql_text, flags=re.MULTILINE | re.IGNORECASE)
+    return match.group(1) if match else default
+
+
+def parse_model_indexes(sql_text):
+    """
+    Returns the index definitions declared in a SQL model file.
+
+    Each "-- index: col_a, col_b" line in the file declares one index on the model's
+    output table, created after the table is materialized.
+    """
+    return [tuple(c.strip() for c in match.split(",")) for match in INDEX_DIRECTIVE.findall(sql_text)]
+
+
+def create_model_indexes(conn, table_name, indexes, verbose=True):
+    """Creates the declared indexes on a materialized table and refreshes planner statistics."""
+    for columns in indexes:
+        index_name = f"idx_{table_name}_{'_'.join(columns)}"
+        conn.execute(f'CREATE INDEX IF NOT EXISTS "{index_name}" ON "{table_name}" ({", ".join(columns)})')
+        if verbose:
+            print(f"Index {index_name} ready.")
+    if indexes:
+        conn.execute(f'ANALYZE "{table_name}"')
+        conn.commit()
+
+
+def strip_sql_comments(query):
+    """Removes -- line comments and /* */ block comments from a SQL string."""
+    query = re.sub(r"/\*.*?\*/", " ", query, flags=re.DOTALL)
+    return re.sub(r"--[^\n]*", " ", query)
+
+
+def table_aliases(query):
+    """
+    Maps each alias used in FROM/JOIN clauses to the table it refers to.
+    CTE names are excluded, so only real tables are returned.
+    """
+    query = strip_sql_comments(query)
+    cte_names = {name.lower() for name in re.findall(r"([A-Za-z_]\w*)\s+AS\s*\(", query, flags=re.IGNORECASE)}
+    aliases = {}
+    for table, alias in re.findall(r"\b(?:FROM|JOIN)\s+([A-Za-z_]\w*)(?:\s+(?:AS\s+)?([A-Za-z_]\w*))?",
+                                   query, flags=re.IGNORECASE):
+        if table.lower() in cte_names:
+            continue
+        if not alias or alias.lower() in SQL_KEYWORDS:
+            alias = table
+        aliases[alias] = table
+    return aliases
+
+
+def check_query_plan(conn, query, allow_driving_scan=True):
+    """
+    Runs EXPLAIN QUERY PLAN and reports table accesses that fall back to a full scan.
+
+    A problem is any real table (not a CTE) that is
+      - scanned on the inner side of a join (every row of the outer loop rescans it),
+      - searched through an AUTOMATIC index (SQLite builds a throwaway index per query
+        because no declared index fits), or
+      - scanned as the driving table when allow_driving_scan is False.
+
+    Returns:
+        list[str]: One message per problem; empty when every join uses an index.
+    """
+    aliases = table_aliases(query)
+    plan = conn.execute(f"EXPLAIN QUERY PLAN {query}").fetchall()
+    problems = []
+    first_access = set()
+    for node_id, parent_id, _, detail in plan:
+        match = re.match(r"(SCAN|SEARCH) (\w+)", detail)
+        if not match or detail.startswith("SCAN CONSTANT ROW"):
+            continue
+        access, alias = match.groups()
+        is_driving = parent_id not in first_access
+        first_access.add(parent_id)
+        if alias not in aliases:
+            continue
+        table = aliases[alias]
+        if "AUTOMATIC" in detail:
+            problems.append(f"{table} ({alias}) has no usable index: {detail}")
+        elif access == "SCAN" and not is_driving:
+            problems.append(f"{table} ({alias}) is fully scanned inside a join: {detail}")
+        elif access == "SCAN" and not allow_driving_scan:
+            problems.append(f"{table} ({alias}) is fully scanned: {detail}")
+    return problems
+
+
+def render_prediction_sql(config, sql_file_path=None, seasons=None):
+    """
+    Reads the SQL prediction table template and substitutes dynamic placeholders.
+
+    Args:
+        seasons (list, optional): Render the inputs for every game of these seasons in one query
+            instead of only config.TARGET_WEEK of config.CURRENT_SEASON. The features are
+            point-in-time (team_features only looks at games before each game), so slicing the
+            result by week gives the same rows as rendering each week on its own.
+    """
+    if sql_file_path is None:
+        sql_file_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prediction", "rf_prediction_table.sql")
+
+    with open(sql_file_path, "r", encoding="utf-8") as f:
+        sql_template = f.read()
+
+    if seasons is None:
+        schedule_filter = f"season = {config.CURRENT_SEASON} AND week = {config.TARGET_WEEK}"
+    else:
+        schedule_filter = f"season IN ({', '.join(str(int(season)) for season in seasons)})"
+
+    query = sql_template.format(
+        season=config.CURRENT_SEASON,
+        target_week=config.TARGET_WEEK,
+        schedule_filter=schedule_filter
+    )
+    return query
+
+
+def load_prediction_inputs(conn, config, seasons=None):
+    """
+    Loads the prediction inputs for every game of the given seasons with a single query,
+    ordered by season, week and game. Backtests slice this frame per week instead of
+    rendering and running the prediction SQL once per target week.
+
+    Args:
+        seasons (list, optional): Defaults to [config.CURRENT_SEASON].
+    """
+    import pandas as pd
+    seasons = seasons or [config.CURRENT_SEASON]
+    query = render_prediction_sql(config, seasons=seasons)
+    return pd.read_sql_query(query, conn).sort_values(['season', 'week', 'game_id'], ignore_index=True)
+
+
+def run_sql_file_and_save_to_table(conn, sql_file_path, output_table_name, if_exists="replace", verbose=True,
+                                   materialize=None):
     """
     Reads a SQL query from a file, executes it, and saves the result to a table.
     
@@ -138,46 +903,40 @@ def run_sql_file_and_save_to_table(conn, sql_file_path, output_table_name, if_ex
         output_table_name: Name for the output table.
         if_exists: What to do if the table exists ("replace", "append", or "fail").
         verbose: If True, prints status messages.
-    """
-    # Read SQL file
-    with open(sql_file_path, "r", encoding="utf-8") as file:
-        query = file.read().strip()
-    
-    if verbose:
-        print("Executing SQL from:", sql_file_path)
-    
-    # Execute query and load result into DataFrame
-    df = pd.read_sql_query(query, conn)
-    
-    # Save the result to the target table
-    df.to_sql(output_table_name, conn, if_exists=if_exists, index=False)
-    
-    if verbose:
-        print(f"Table '{output_table_name}' created with {len(df)} rows.")
-        print(df.head())
-    
-    return df
+        materialize: "table" builds the output inside SQLite (CREATE TABLE ... AS SELECT) and only
+            fetches a row count and a small sample; "dataframe" round-trips the result through
+            pandas. Defaults to config.SQL_MATERIALIZATION.
 
+    Indexes declared in the file with "-- index: col, ..." lines are created on the output table.
 
-def build_season_week_filter(config, lag_window=3):
-    """
-    Builds a SQL-compatible WHERE clause for weeks leading up to the target week.
-    Handles cross-season logic for early weeks.
+    Returns:
+        pd.DataFrame: The full result in "dataframe" mode, or a sample of
+        config.SQL_SAMPLE_ROWS rows in "table" mode.
     """
-    current_season = config.CURRENT_SEASON
-    target_week = config.TARGET_WEEK
+    import pandas as pd
+    materialize = materialize or config.SQL_MATERIALIZATION
+    with stage(f"sql:{output_table_name}") as run:
+        query = read_sql_file(sql_file_path)
 
-    if target_week == 1:
-        return "(season = {prev_season} AND week IN (16, 17, 18))".format(prev_season=current_season - 1)
-    elif target_week == 2:
-        return ("(season = {prev_season} AND week IN (17, 18)) "
-                "OR (season = {current_season} AND week = 1)").format(
-                    prev_season=current_season - 1, current_season=current_season)
-    elif target_week == 3:
-        return ("(season = {prev_season} AND week = 18) "
-                "OR (season = {current_season} AND week IN (1, 2))").format(
-                    prev_season=current_season - 1, current_season=current_season)
-    else:
-        lag_weeks = list(range(target_week - lag_window, target_week))
-        lag_week_str = ", ".join(str(w) for w in lag_weeks)
-        return f"(season = {current_season} AND week IN ({lag_week_str}))"
+        if verbose:
+            print("Executing SQL from:", sql_file_path)
+
+        if materialize == "table":
+            row_count = materialize_query(conn, query, output_table_name, if_exists=if_exists)
+            df = pd.read_sql_query(f'SELECT * FROM "{output_table_name}" LIMIT {config.SQL_SAMPLE_ROWS}', conn)
+        else:
+            # Execute query and load result into DataFrame
+            df = pd.read_sql_query(query, conn)
+
+            # Save the result to the target table
+            bulk_write_dataframe(df, conn, output_table_name, if_exists=if_exists, verbose=verbose)
+            row_count = len(df)
+        run.rows_out = row_count
+
+        create_model_indexes(conn, output_table_name, parse_model_indexes(query), verbose=verbose)
+
+        if verbose:
+            print(f"Table '{output_table_name}' created with {row_count} rows.")
+            print(df.head())
+
+    return df